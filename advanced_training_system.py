@@ -1,17 +1,18 @@
 # advanced_training_system.py - نظام التدريب المتقدم لتطوير ذكاء نانو
-import json
 import random
 import time
 from datetime import datetime
 from typing import List, Dict, Set
 import re
 import os
+from corpus_store import open_corpus
 
 class AdvancedTrainingSystem:
     """نظام التدريب المتقدم لنانو"""
     
     def __init__(self, corpus_path="corpus.json"):
         self.corpus_path = corpus_path
+        self.corpus = open_corpus(corpus_path)
         self.training_sessions = 0
         self.quality_filters = self.setup_quality_filters()
         self.conversation_patterns = self.setup_conversation_patterns()
@@ -304,17 +305,6 @@ class AdvancedTrainingSystem:
         print(f"\n🎯 جلسة التدريب رقم {session_number}")
         print("=" * 50)
         
-        # تحميل البيانات الحالية
-        try:
-            with open(self.corpus_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                current_sentences = data.get("sentences", [])
-        except FileNotFoundError:
-            current_sentences = []
-        
-        initial_count = len(current_sentences)
-        print(f"📊 الجمل الحالية: {initial_count}")
-        
         # توليد محتوى جديد حسب مستوى الجلسة
         new_content = []
         
@@ -344,25 +334,19 @@ class AdvancedTrainingSystem:
             cleaned_text, is_good, score = self.filter_and_improve_text(text)
             total_processed += 1
             
-            if is_good and cleaned_text not in current_sentences:
+            if is_good:
                 high_quality_content.append(cleaned_text)
         
-        # إضافة المحتوى الجديد
-        current_sentences.extend(high_quality_content)
-        
-        # حفظ البيانات المحدثة
-        updated_data = {"sentences": current_sentences}
-        with open(self.corpus_path, 'w', encoding='utf-8') as f:
-            json.dump(updated_data, f, ensure_ascii=False, indent=2)
+        # إضافة المحتوى الجديد (غير الموجود فقط) كجزء في قاعدة الجمل
+        added_count, final_count = self.corpus.add_new(
+            high_quality_content, source="advanced_training", category=f"session_{session_number}")
+        print(f"📊 الجمل السابقة: {final_count - added_count}")
         
         # إحصائيات الجلسة
-        final_count = len(current_sentences)
-        added_count = final_count - initial_count
-        
         print(f"✅ تم معالجة: {total_processed} نص")
         print(f"✅ تم إضافة: {added_count} جملة عالية الجودة")
         print(f"📈 إجمالي الجمل الآن: {final_count}")
-        print(f"⭐ معدل الجودة: {(added_count/total_processed)*100:.1f}%")
+        print(f"⭐ معدل الجودة: {(added_count/max(total_processed, 1))*100:.1f}%")
         
         return added_count
     
@@ -1,6 +1,7 @@
 # app.py (v1.1 - Synchronous Training Fix)
 from flask import Flask, render_template, request, jsonify
 from enhanced_nano_module import EnhancedNano
+from model_watcher import ModelWatcher
 import time
 
 # --- إعداد التطبيق والخادم ---
@@ -11,13 +12,17 @@ print("="*30)
 print("INITIALIZING NANO'S CORE...")
 print("Please wait, Nano is currently training...")
 
-nano_mind = EnhancedNano()
 start_time = time.time()
 
 # نقوم بالتدريب الآن بشكل مباشر وننتظر حتى ينتهي
-# force_retrain=True تجبر نانو على إعادة التدريب في كل مرة
-# يمكنك تغييرها إلى False بعد أول تشغيل ناجح لتسريع بدء التشغيل في المستقبل
-nano_mind.train(force_retrain=True) 
+# update=True تحمّل النموذج المحفوظ وتتدرب فقط على الجمل الجديدة في corpus.json
+# (أول تشغيل بدون نموذج محفوظ يبني النموذج كاملاً). النموذج المحمّل مشترك
+# في العملية، فأي وحدة أخرى تطلبه لا تعيد تحميله.
+nano_mind = EnhancedNano.shared(update=True)
+# ردود جاهزة مسبقاً تُعبأ في الخلفية لزمن استجابة ثابت
+nano_mind.enable_reply_pool()
+# عند حفظ نموذج جديد (مثلاً من daily_scheduler.py) يُحمّل في الخلفية ويُبدَّل بدون إعادة تشغيل
+nano_watcher = ModelWatcher(nano_mind).start()
 
 end_time = time.time()
 print(f"NANO'S TRAINING COMPLETED in {end_time - start_time:.2f} seconds.")
@@ -34,14 +39,21 @@ def home():
 def ask():
     user_message = request.json.get('message', '')
     
-    # استخدام النموذج المحسن للرد الذكي
-    nano_reply = nano_mind.generate_smart_response(user_message)
+    # استخدام النموذج المحسن للرد الذكي (النسخة الحالية تُقرأ مرة واحدة لكل طلب)
+    nano = nano_watcher.model
+    nano_reply = nano.generate_smart_response(user_message)
     
     if not nano_reply:
         nano_reply = "والله ما فهمت عليك، قول لي مرة ثانية"
         
     return jsonify({'reply': nano_reply})
 
+@app.route('/pool_stats', methods=['GET'])
+def pool_stats():
+    """عدادات مخزون الردود الجاهزة"""
+    nano = nano_watcher.model
+    return jsonify(nano.reply_pool.stats() if nano.reply_pool else {})
+
 
 # --- تشغيل الخادم ---
 if __name__ == '__main__':
@@ -1,6 +1,8 @@
 # app_v2.py - التطبيق الجديد مع نظام نانو المتكامل
 from flask import Flask, render_template, request, jsonify
 from nano_core import NanoCore
+from model_watcher import ModelWatcher
+from riyadh_dialect_generative_module import RiyadhDialectGenerative
 import time
 
 # --- إعداد التطبيق والخادم ---
@@ -12,6 +14,8 @@ print("🤖 INITIALIZING NANO'S ADVANCED CORE...")
 print("Loading modules, emotions, and personality...")
 
 nano_mind = NanoCore()
+# النموذج اللغوي المشترك يُعاد تحميله في الخلفية عند حفظ نسخة جديدة منه
+model_watcher = ModelWatcher(RiyadhDialectGenerative.shared()).start()
 
 print("✅ NANO'S ADVANCED SYSTEM READY!")
 print("📊 Modules loaded:", len(nano_mind.modules))
@@ -0,0 +1,122 @@
+# arabic_tokenizer.py - تقسيم النص العربي وتوحيد أشكال الحروف (مشترك بين كل الأنظمة)
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from typing import FrozenSet, Iterable, Tuple
+
+# التشكيل (الفتحة إلى السكون + الألف الخنجرية) والتطويل
+_DIACRITICS = re.compile("[\u064B-\u0652\u0670\u0640]")
+# كلمة = حروف وأرقام متصلة (علامات الترقيم والرموز والإيموجي فواصل)
+_WORD = re.compile(r"[^\W_]+")
+# توحيد أشكال الهمزة على الألف، والتاء المربوطة، والألف المقصورة
+# (replace لكل حرف أسرع من str.translate بجدول dict في النصوص الطويلة)
+_LETTERS = (("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"), ("ة", "ه"), ("ى", "ي"))
+# حرف ليس من حروف الكلمات ولا مسافة: ترقيم أو رمز أو إيموجي
+_NON_WORD = re.compile(r"[^\w\s\0]|_")
+
+# السوابق المتصلة: حرف عطف ثم حرف جر ثم "ال" التعريف
+_CONJUNCTIONS = ("و", "ف")
+_PREPOSITIONS = ("ب", "ل", "ك")
+_ARTICLE = "ال"
+# أقل طول للكلمة بعد حذف السابقة (حتى لا تتحول "الله" إلى "له")
+_MIN_STEM = 3
+# أطول عبارة (بعدد الكلمات) تُضاف للمصطلحات، مثل "ان شاء الله"
+MAX_PHRASE = 4
+
+CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class Tokens:
+    """نتيجة تقسيم نص: الكلمات الموحّدة بالترتيب، والمصطلحات للمطابقة"""
+    words: Tuple[str, ...]
+    # الكلمات + جذوعها بدون السوابق + عبارات حتى MAX_PHRASE كلمات
+    terms: FrozenSet[str]
+
+    def __len__(self):
+        return len(self.words)
+
+
+def normalize(text: str) -> str:
+    """توحيد النص: حروف صغيرة، بدون تشكيل أو تطويل، وأشكال موحّدة للألف والتاء والياء"""
+    text = _DIACRITICS.sub("", text).lower()
+    for letter, replacement in _LETTERS:
+        text = text.replace(letter, replacement)
+    return text
+
+
+def surface_words(text: str) -> list:
+    """الكلمات كما كُتبت (بدون علامات الترقيم والتشكيل)، للبحث في قاموس النموذج"""
+    return _WORD.findall(_DIACRITICS.sub("", text))
+
+
+def strip_clitics(word: str) -> list:
+    """أشكال الكلمة بعد حذف السوابق المتصلة واحدة واحدة: "وبالبيت" -> بالبيت، البيت، بيت"""
+    stems = []
+    for prefixes in (_CONJUNCTIONS, _PREPOSITIONS, (_ARTICLE,)):
+        for prefix in prefixes:
+            if word.startswith(prefix) and len(word) - len(prefix) >= _MIN_STEM:
+                word = word[len(prefix):]
+                stems.append(word)
+                break
+    return stems
+
+
+def analyze(text: str) -> Tokens:
+    """تقسيم بدون ذاكرة مؤقتة (للمعالجة الدفعية لجمل لا تتكرر)"""
+    words = tuple(_WORD.findall(normalize(text)))
+    terms = set(words)
+    for word in words:
+        terms.update(strip_clitics(word))
+    for n in range(2, min(MAX_PHRASE, len(words)) + 1):
+        for i in range(len(words) - n + 1):
+            terms.add(" ".join(words[i:i + n]))
+    return Tokens(words, frozenset(terms))
+
+
+def batch_words(texts: Iterable[str]) -> list:
+    """
+    كلمات عدة نصوص (نفس words في Tokens) مع توحيد النص المجمّع مرة واحدة
+    بدل نص نص، للفحص الدفعي لآلاف الجمل.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    # \0 لا يغيّره التوحيد ولا يطابق _WORD، فيبقى فاصلاً بين النصوص
+    text = normalize("\0".join(texts))
+    parts = text.split("\0")
+    if len(parts) != len(texts):
+        # نص يحوي \0 بنفسه: نص نص
+        return [_WORD.findall(normalize(t)) for t in texts]
+
+    # أغلب الجمل حروف ومسافات فقط، وكلماتها = split (أسرع من _WORD.findall).
+    # الجمل التي فيها ترقيم أو رموز يحددها بحث واحد في النص المجمّع.
+    words = [part.split() for part in parts]
+    if text.replace(" ", "").replace("\0", "").isalnum():
+        return words
+    starts = list(accumulate((len(part) + 1 for part in parts), initial=0))
+    dirty = {bisect_right(starts, match.start()) - 1 for match in _NON_WORD.finditer(text)}
+    for i in dirty:
+        words[i] = _WORD.findall(parts[i])
+    return words
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def tokenize(text: str) -> Tokens:
+    """
+    تقسيم رسالة مع ذاكرة مؤقتة (LRU): نفس الرسالة تمر على أنظمة المشاعر
+    والذاكرة والسياق، فتُقسَّم مرة واحدة فقط.
+    """
+    return analyze(text)
+
+
+def keyword_set(keywords: Iterable[str]) -> FrozenSet[str]:
+    """قائمة كلمات مفتاحية (أو عبارات) بنفس التوحيد، للمطابقة مع Tokens.terms"""
+    return frozenset(" ".join(_WORD.findall(normalize(keyword))) for keyword in keywords)
+
+
+def keyword_map(keywords: Iterable[str]) -> dict:
+    """مثل keyword_set لكن مع الاحتفاظ بالشكل الأصلي: {الشكل الموحّد: الأصل}"""
+    return {" ".join(_WORD.findall(normalize(keyword))): keyword for keyword in keywords}
@@ -112,6 +112,33 @@ def benchmark_context_memory():
     
     return processing_time, avg_time_per_conversation
 
+def benchmark_sentence_generation():
+    """مقارنة التوليد جملة جملة مع توليد الدفعات"""
+    from riyadh_dialect_generative_module import RiyadhDialectGenerative
+    
+    print("\n✍️ مقارنة أداء توليد الجمل")
+    print("=" * 50)
+    
+    nano = RiyadhDialectGenerative()
+    nano.train()
+    count = 10000
+    
+    start_time = time.time()
+    for _ in range(count):
+        nano.generate_sentence()
+    loop_time = time.time() - start_time
+    print(f"🐌 جملة جملة: {loop_time:.3f} ثانية لـ {count} جملة")
+    
+    start_time = time.time()
+    nano.generate_batch(count, seed=0)
+    batch_time = time.time() - start_time
+    print(f"⚡ دفعة واحدة: {batch_time:.3f} ثانية لـ {count} جملة")
+    
+    speedup = loop_time / batch_time if batch_time > 0 else 1
+    print(f"🚀 تسريع بمعامل: {speedup:.2f}x")
+    
+    return loop_time, batch_time
+
 def benchmark_integrated_system():
     """مقارنة أداء النظام المتكامل"""
     from nano_advanced_system import NanoAdvancedSystem
@@ -169,6 +196,9 @@ def main():
         # اختبار الذاكرة السياقية
         cm_time, cm_avg = benchmark_context_memory()
         
+        # اختبار توليد الجمل
+        gen_loop, gen_batch = benchmark_sentence_generation()
+        
         # اختبار النظام المتكامل
         int_fast, int_regular = benchmark_integrated_system()
         
@@ -185,6 +215,7 @@ def main():
     print(f"🚀 نظام التعلم المستمر: {cl_fast:.3f}s (سريع) vs {cl_regular:.3f}s (عادي)")
     print(f"💭 الذكاء العاطفي: {ei_avg:.2f}ms متوسط لكل رسالة")
     print(f"🧠 الذاكرة السياقية: {cm_avg:.2f}ms متوسط لكل محادثة") 
+    print(f"✍️ توليد الجمل: {gen_batch:.3f}s (دفعة) vs {gen_loop:.3f}s (جملة جملة)")
     print(f"🤖 النظام المتكامل: {int_fast:.3f}s (سريع) vs {int_regular:.3f}s (عادي)")
     
     print(f"\n✨ نانو محسّن ومستعد للأداء العالي! ✨")
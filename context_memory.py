@@ -7,6 +7,8 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict
 import re
 
+from arabic_tokenizer import Tokens, tokenize, keyword_set, keyword_map
+
 @dataclass
 class ConversationContext:
     """سياق المحادثة المتقدم"""
@@ -101,29 +103,31 @@ class AdvancedContextMemory:
         
     def _compile_pattern_sets(self):
         """Pre-compile keyword sets for faster pattern matching"""
-        # Emotion keyword sets (lowercase)
+        # Emotion keyword sets (normalized, see arabic_tokenizer)
         self._emotion_sets = {}
         for emotion, keywords in self.emotion_keywords.items():
-            self._emotion_sets[emotion] = set(kw.lower() for kw in keywords)
+            self._emotion_sets[emotion] = keyword_set(keywords)
             
-        # Topic classifier sets (lowercase)
+        # Topic classifier sets (normalized)
         self._topic_sets = {}
         for topic, keywords in self.topic_classifiers.items():
-            self._topic_sets[topic] = set(kw.lower() for kw in keywords)
+            self._topic_sets[topic] = keyword_set(keywords)
             
-        # Cultural pattern sets (lowercase)
+        # Cultural pattern maps (normalized -> original pattern)
         self._cultural_sets = {}
         for category, patterns in self.cultural_patterns.items():
-            self._cultural_sets[category] = set(p.lower() for p in patterns)
+            self._cultural_sets[category] = keyword_map(patterns)
+        
+        self._personal_keywords = keyword_set(["اسمي", "أنا", "بيتي", "عائلتي", "شغلي"])
     
-    def detect_emotion(self, text: str) -> Tuple[str, float]:
+    def detect_emotion(self, text: str, tokens: Optional[Tokens] = None) -> Tuple[str, float]:
         """كشف المشاعر من النص (محسّن الأداء)"""
-        text_lower = text.lower()
-        text_words = set(text_lower.split())
+        tokens = tokens or tokenize(text)
+        text_words = tokens.terms
         
         emotion_scores = {}
-        for emotion, keyword_set in self._emotion_sets.items():
-            matches = len(text_words & keyword_set)
+        for emotion, keywords in self._emotion_sets.items():
+            matches = len(text_words & keywords)
             if matches > 0:
                 emotion_scores[emotion] = matches
         
@@ -131,17 +135,17 @@ class AdvancedContextMemory:
             return "neutral", 0.5
         
         dominant_emotion = max(emotion_scores, key=emotion_scores.get)
-        confidence = min(emotion_scores[dominant_emotion] / len(text_words), 1.0)
+        confidence = min(emotion_scores[dominant_emotion] / len(tokens), 1.0)
         
         return dominant_emotion, confidence
     
-    def classify_topic(self, text: str) -> str:
+    def classify_topic(self, text: str, tokens: Optional[Tokens] = None) -> str:
         """تصنيف موضوع النص (محسّن الأداء)"""
-        text_words = set(text.lower().split())
+        text_words = (tokens or tokenize(text)).terms
         
         topic_scores = {}
-        for topic, keyword_set in self._topic_sets.items():
-            matches = len(text_words & keyword_set)
+        for topic, keywords in self._topic_sets.items():
+            matches = len(text_words & keywords)
             if matches > 0:
                 topic_scores[topic] = matches
         
@@ -150,15 +154,15 @@ class AdvancedContextMemory:
         
         return max(topic_scores, key=topic_scores.get)
     
-    def extract_cultural_markers(self, text: str) -> List[str]:
+    def extract_cultural_markers(self, text: str, tokens: Optional[Tokens] = None) -> List[str]:
         """استخراج العلامات الثقافية (محسّن الأداء)"""
-        text_words = set(text.lower().split())
+        text_words = (tokens or tokenize(text)).terms
         markers = []
         
-        for category, pattern_set in self._cultural_sets.items():
-            matches = text_words & pattern_set
+        for category, pattern_map in self._cultural_sets.items():
+            matches = text_words & pattern_map.keys()
             for match in matches:
-                markers.append(f"{category}:{match}")
+                markers.append(f"{category}:{pattern_map[match]}")
         
         return markers
     
@@ -171,8 +175,7 @@ class AdvancedContextMemory:
             importance += 2
         
         # زيادة الأهمية للمعلومات الشخصية
-        personal_keywords = ["اسمي", "أنا", "بيتي", "عائلتي", "شغلي"]
-        if any(keyword in context.user_message.lower() for keyword in personal_keywords):
+        if tokenize(context.user_message).terms & self._personal_keywords:
             importance += 3
         
         # زيادة الأهمية للعلامات الثقافية
@@ -185,11 +188,16 @@ class AdvancedContextMemory:
         
         return min(importance, 10)
     
-    def add_conversation_context(self, user_message: str, nano_response: str) -> ConversationContext:
+    def add_conversation_context(self, user_message: str, nano_response: str,
+                                 tokens: Optional[Tokens] = None) -> ConversationContext:
         """إضافة سياق محادثة جديد"""
-        emotion, confidence = self.detect_emotion(user_message)
-        topic = self.classify_topic(user_message)
-        cultural_markers = self.extract_cultural_markers(user_message + " " + nano_response)
+        tokens = tokens or tokenize(user_message)
+        emotion, confidence = self.detect_emotion(user_message, tokens)
+        topic = self.classify_topic(user_message, tokens)
+        cultural_markers = self.extract_cultural_markers(user_message, tokens)
+        for marker in self.extract_cultural_markers(nano_response):
+            if marker not in cultural_markers:
+                cultural_markers.append(marker)
         
         context = ConversationContext(
             timestamp=datetime.now().isoformat(),
@@ -211,11 +219,13 @@ class AdvancedContextMemory:
         
         return context
     
-    def get_relevant_context(self, current_message: str, limit: int = 5) -> List[ConversationContext]:
+    def get_relevant_context(self, current_message: str, limit: int = 5,
+                             tokens: Optional[Tokens] = None) -> List[ConversationContext]:
         """استرجاع السياق ذي الصلة"""
-        current_emotion, _ = self.detect_emotion(current_message)
-        current_topic = self.classify_topic(current_message)
-        current_markers = self.extract_cultural_markers(current_message)
+        tokens = tokens or tokenize(current_message)
+        current_emotion, _ = self.detect_emotion(current_message, tokens)
+        current_topic = self.classify_topic(current_message, tokens)
+        current_markers = self.extract_cultural_markers(current_message, tokens)
         
         # تسجيل نقاط للمحادثات السابقة
         scored_contexts = []
@@ -251,12 +261,14 @@ class AdvancedContextMemory:
         
         return [context for context, score in scored_contexts[:limit]]
     
-    def generate_contextual_response_hints(self, user_message: str) -> Dict[str, Any]:
+    def generate_contextual_response_hints(self, user_message: str,
+                                           tokens: Optional[Tokens] = None) -> Dict[str, Any]:
         """توليد تلميحات للرد السياقي"""
-        relevant_contexts = self.get_relevant_context(user_message)
-        emotion, confidence = self.detect_emotion(user_message)
-        topic = self.classify_topic(user_message)
-        cultural_markers = self.extract_cultural_markers(user_message)
+        tokens = tokens or tokenize(user_message)
+        relevant_contexts = self.get_relevant_context(user_message, tokens=tokens)
+        emotion, confidence = self.detect_emotion(user_message, tokens)
+        topic = self.classify_topic(user_message, tokens)
+        cultural_markers = self.extract_cultural_markers(user_message, tokens)
         
         hints = {
             "detected_emotion": emotion,
@@ -274,7 +286,7 @@ class AdvancedContextMemory:
             ],
             "conversation_patterns": self.analyze_conversation_patterns(),
             "suggested_tone": self.suggest_response_tone(emotion, cultural_markers),
-            "memory_triggers": self.find_memory_triggers(user_message)
+            "memory_triggers": self.find_memory_triggers(user_message, tokens)
         }
         
         return hints
@@ -329,17 +341,17 @@ class AdvancedContextMemory:
         
         return base_tone
     
-    def find_memory_triggers(self, message: str) -> List[str]:
+    def find_memory_triggers(self, message: str, tokens: Optional[Tokens] = None) -> List[str]:
         """العثور على محفزات الذاكرة"""
         triggers = []
-        message_lower = message.lower()
+        message_words = set((tokens or tokenize(message)).words)
         
         # البحث في المحادثات السابقة عن مواضيع مشابهة
+        # (الرسائل السابقة تُقسَّم من الذاكرة المؤقتة للمقسّم غالباً)
         for context in self.conversation_history[-100:]:
-            user_words = set(context.user_message.lower().split())
-            message_words = set(message_lower.split())
+            user_words = tokenize(context.user_message).words
             
-            common_words = user_words & message_words
+            common_words = message_words.intersection(user_words)
             if len(common_words) > 2:
                 triggers.append(f"similar_to: {context.user_message[:50]}...")
         
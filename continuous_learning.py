@@ -3,11 +3,13 @@ import json
 import random
 import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, Iterable, Iterator
 import itertools
 import threading
-import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from corpus_store import open_corpus
+from arabic_tokenizer import keyword_set
+from quality_filter import BatchValidator, filter_sentences
+from expansion_pipeline import stream_into_corpus
 
 # محاولة استخدام orjson/ujson لتسريع JSON (والرجوع إلى json القياسي عند عدم توفرهما)
 try:
@@ -29,11 +31,44 @@ except Exception:
         def _json_dump(obj, f):
             json.dump(obj, f, ensure_ascii=False, indent=2)
 
+# الكلمات المهمة لفحص الجودة (موحّدة ومسبقة البناء كسِت)
+IMPORTANT_WORDS = keyword_set([
+    # كلمات دينية
+    "الله", "الحمدلله", "ان", "شاء", "الله", "بإذن", "استغفر", "بسم", "لا", "حول", "ولا", "قوة",
+    # كلمات زمنية
+    "اليوم", "امس", "بكرة", "الصبح", "المساء", "الليل", "العصر", "هالأسبوع", "الشهر", "السنة", "دائماً", "أحياناً",
+    # أنشطة يومية
+    "اكل", "شرب", "نوم", "شغل", "دراسة", "قراءة", "كتابة", "مشي", "رياضة", "طبخ", "تنظيف", "تسوق",
+    # علاقات اجتماعية
+    "اهل", "عائلة", "اصدقاء", "جيران", "زملاء", "أحباب", "والدين", "اخوة", "اطفال", "كبار", "صغار",
+    # مشاعر وأحاسيس
+    "سعيد", "فرحان", "مبسوط", "حزين", "متضايق", "خايف", "متحمس", "هادي", "مرتاح", "متعب", "محب", "معجب",
+    # صفات إيجابية
+    "حلو", "جميل", "رائع", "ممتاز", "بطل", "كفو", "زين", "مفيد", "نافع", "صحي", "طيب", "كريم", "أمين"
+])
+
+# معايير الجودة: 8-300 حرف، 3-25 كلمة، 60% حروف عربية، كلمتان مهمتان على الأقل
+QUALITY_VALIDATOR = BatchValidator(min_length=8, max_length=300, min_words=3, max_words=25,
+                                   min_arabic_ratio=0.6, words="tokens",
+                                   keywords=IMPORTANT_WORDS, min_keywords=2)
+
+
+def high_quality_mask(sentences: List[str]) -> List[bool]:
+    """قناع الجودة لدفعة جمل كاملة (دالة على مستوى الملف لتعمل داخل عمليات quality_filter)"""
+    return QUALITY_VALIDATOR.mask(sentences)
+
+
+def is_high_quality_sentence(sentence: str) -> bool:
+    """فحص جودة جملة واحدة"""
+    return QUALITY_VALIDATOR(sentence)
+
+
 class ContinuousLearningSystem:
     """نظام التعلم المستمر لنانو مع ذاكرة متطورة"""
     
     def __init__(self, corpus_path="corpus.json", verbose: bool = True):
         self.corpus_path = corpus_path
+        self.corpus = open_corpus(corpus_path)
         self.learning_sessions = []
         self.conversation_memory = []
         self.adaptive_patterns = {}
@@ -361,36 +396,17 @@ class ContinuousLearningSystem:
         self._print("🧠 نظام التعلم المستمر نشط الآن...")
         self._print("🔄" * 50)
         
-        # تحميل الcorpus الحالي (باستخدام JSON سريع إن توفر)
-        try:
-            with open(self.corpus_path, 'r', encoding='utf-8') as f:
-                data = _json_load(f)
-                current_sentences = data.get("sentences", [])
-        except Exception:
-            current_sentences = []
-        
-        # استخدام set لفحص العضوية بسرعة
-        sentences_set = set(current_sentences)
-        initial_count = len(current_sentences)
-        self._print(f"📊 الجمل الحالية: {initial_count}")
-        
         # معالجة وتصفية الجمل الجديدة (بشكل متوازٍ)
         processed_sentences = self.process_and_filter_sentences(expansion_set)
         
-        # إضافة الجمل الجديدة بكفاءة
-        added_count = 0
-        for sentence in processed_sentences:
-            if sentence not in sentences_set:
-                sentences_set.add(sentence)
-                current_sentences.append(sentence)
-                added_count += 1
-        
-        # حفظ البيانات المحدثة
-        updated_data = {"sentences": current_sentences}
-        with open(self.corpus_path, 'w', encoding='utf-8') as f:
-            _json_dump(updated_data, f)
-        
-        final_count = len(current_sentences)
+        # إلحاق الجديد كجزء في قاعدة الجمل (فحص التكرار ببصمات الجمل)
+        try:
+            added_count, final_count = self.corpus.add_new(processed_sentences, source="continuous_learning")
+        except json.JSONDecodeError:
+            self._print(f"❌ خطأ في قراءة '{self.corpus_path}'. لم يتم تعديل الملف.")
+            return 0, 0
+        initial_count = final_count - added_count
+        self._print(f"📊 الجمل السابقة: {initial_count}")
         
         self._print(f"✅ تم إضافة: {added_count} جملة جديدة")
         self._print(f"📈 إجمالي الجمل الآن: {final_count}")
@@ -400,67 +416,51 @@ class ContinuousLearningSystem:
         return added_count, final_count
     
     def process_and_filter_sentences(self, sentences: List[str]) -> List[str]:
-        """معالجة وتصفية الجمل (بتوازي خفيف وتقليل تخصيص السلاسل)"""
+        """معالجة وتصفية الجمل (أجزاء على عدة عمليات، بنفس ترتيب الإدخال)"""
         # تنظيف أولي سريع
         cleaned = [s.strip() for s in sentences if s and isinstance(s, str)]
         
-        results: List[str] = []
-        # استخدام ThreadPoolExecutor لأن كثير من عمليات النص داخل C وقد تستفيد
-        max_workers = min(8, (os.cpu_count() or 4))
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_map = {executor.submit(self.is_high_quality_sentence, s): s for s in cleaned}
-            for fut in as_completed(future_map):
-                s = future_map[fut]
-                try:
-                    ok = fut.result()
-                    if ok:
-                        results.append(s)
-                except Exception:
-                    # نتجاهل أي استثناء في جملة مفردة
-                    pass
+        if type(self).is_high_quality_sentence is ContinuousLearningSystem.is_high_quality_sentence:
+            results, stats = filter_sentences(cleaned, high_quality_mask, batch=True)
+        else:
+            # فحص مخصص في صنف فرعي: يبقى في نفس العملية
+            results, stats = filter_sentences(cleaned, self.is_high_quality_sentence, workers=1)
+        self._print(f"🔎 فحص {stats['checked']} جملة في {stats['seconds']:.2f} ثانية "
+                    f"({stats['sentences_per_sec']:,.0f} جملة/ثانية)، المقبول: {stats['kept']}")
         return results
     
     def is_high_quality_sentence(self, sentence: str) -> bool:
         """فحص جودة الجملة المتقدم (محسّن الأداء)"""
-        L = len(sentence)
-        if L < 8 or L > 300:
-            return False
-        
-        # توكنايزر بسيط (تفادي split المتكرر)
-        words = sentence.split()
-        wc = len(words)
-        if wc < 3 or wc > 25:
-            return False
-        
-        # فحص الأحرف العربية بسرعة
-        arabic_chars = 0
-        for c in sentence:
-            if '\u0600' <= c <= '\u06FF':
-                arabic_chars += 1
-        if arabic_chars < L * 0.6:
-            return False
-        
-        # مجموعة الكلمات المهمة (ثابتة ومسبقة البناء كسِت)
-        if not hasattr(self, "_important_words_set"):
-            self._important_words_set = set([
-                # كلمات دينية
-                "الله", "الحمدلله", "ان", "شاء", "الله", "بإذن", "استغفر", "بسم", "لا", "حول", "ولا", "قوة",
-                # كلمات زمنية
-                "اليوم", "امس", "بكرة", "الصبح", "المساء", "الليل", "العصر", "هالأسبوع", "الشهر", "السنة", "دائماً", "أحياناً",
-                # أنشطة يومية
-                "اكل", "شرب", "نوم", "شغل", "دراسة", "قراءة", "كتابة", "مشي", "رياضة", "طبخ", "تنظيف", "تسوق",
-                # علاقات اجتماعية
-                "اهل", "عائلة", "اصدقاء", "جيران", "زملاء", "أحباب", "والدين", "اخوة", "اطفال", "كبار", "صغار",
-                # مشاعر وأحاسيس
-                "سعيد", "فرحان", "مبسوط", "حزين", "متضايق", "خايف", "متحمس", "هادي", "مرتاح", "متعب", "محب", "معجب",
-                # صفات إيجابية
-                "حلو", "جميل", "رائع", "ممتاز", "بطل", "كفو", "زين", "مفيد", "نافع", "صحي", "طيب", "كريم", "أمين"
-            ])
-        
-        # تحويل الكلمات لحروف صغيرة للمقارنة التقريبية
-        lower_words = {w.lower() for w in words}
-        matches = len(lower_words & {w.lower() for w in self._important_words_set})
-        return matches >= 2
+        return is_high_quality_sentence(sentence)
+    
+    def announce_category(self, label: str, sentences: Iterable) -> Iterator:
+        """تمرير جمل فئة مع طباعة بدايتها وعددها عند انتهائها (بدون تجميعها)"""
+        self._print(f"📝 توليد جمل {label}...")
+        count = 0
+        for sentence in sentences:
+            count += 1
+            yield sentence
+        self._print(f"   ✅ تم توليد {count} جملة")
+    
+    def stream_to_corpus(self, sentences: Iterable, source: str) -> Dict:
+        """
+        إلحاق جمل مولّد (نصوص أو أزواج (جملة، وزن)) بقاعدة الجمل عبر خط
+        متدفق: حذف المكرر (داخل الدفعة ومع قاعدة الجمل) ثم فحص الجودة ثم
+        الكتابة بدفعات.
+        """
+        if type(self).is_high_quality_sentence is ContinuousLearningSystem.is_high_quality_sentence:
+            mask = high_quality_mask
+        else:
+            # فحص مخصص في صنف فرعي
+            def mask(batch):
+                return [self.is_high_quality_sentence(s) for s in batch]
+        known = self.corpus.index() if hasattr(self.corpus, "index") else None
+        stats = stream_into_corpus(self.corpus, sentences, mask, source=source, known=known)
+        first = stats["first_commit_seconds"]
+        self._print(f"🔎 {stats['unique']} جملة جديدة فريدة، المقبول: {stats['kept']} "
+                    f"في {stats['batches']} دفعة خلال {stats['seconds']:.2f} ثانية"
+                    + (f" (أول دفعة بعد {first * 1000:.0f} مللي ثانية)" if first is not None else ""))
+        return stats
     
     def run_continuous_learning_cycle(self):
         """تشغيل دورة التعلم المستمر"""
@@ -477,6 +477,9 @@ class ContinuousLearningSystem:
         # تطبيق التعلم
         added, total = self.apply_continuous_learning(expansion_set)
         
+        # أثر الإضافات يُقاس في التدريب اليومي (daily_training): النموذج المرشح
+        # المدرَّب عليها يُقيَّم على الجمل المحجوزة قبل ترقيته
+        
         # إنشاء تقرير التقدم
         self.create_progress_report(added, total)
         
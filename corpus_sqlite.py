@@ -0,0 +1,237 @@
+# corpus_sqlite.py - قاعدة الجمل في SQLite (صف لكل جملة + فهرس FTS5 للبحث)
+import os
+import sqlite3
+import threading
+from typing import Iterable, Iterator
+
+from arabic_tokenizer import analyze
+from corpus_store import sentence_hash, split_entry, iter_weighted
+
+_FETCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    hash INTEGER NOT NULL UNIQUE,
+    source TEXT,
+    category TEXT,
+    quality REAL,
+    weight INTEGER NOT NULL DEFAULT 1,
+    added_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS sentences_source ON sentences(source, category);
+"""
+
+# فهرس بدون محتوى (contentless): يحوي كلمات الجملة الموحّدة فقط، والنص في sentences
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sentences_fts USING fts5(
+    terms, content='', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS sentences_fts_insert AFTER INSERT ON sentences BEGIN
+    INSERT INTO sentences_fts(rowid, terms) VALUES (new.id, nano_terms(new.text));
+END;
+"""
+
+
+def _signed(h: int) -> int:
+    """بصمة 64-بت بدون إشارة -> عدد SQLite (64-بت بإشارة)"""
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def _terms(text):
+    """كلمات الجملة الموحّدة (arabic_tokenizer) كنص يفهرسه FTS5"""
+    return " ".join(analyze(text).words)
+
+
+class SQLiteCorpusStore:
+    """
+    بديل اختياري لـ CorpusStore بنفس الواجهة (قراءة متدفقة، add_new، count)
+    فوق SQLite: صف لكل جملة مع المصدر والفئة ودرجة الجودة ووقت الإضافة.
+
+    - التكرار يُمنع بعمود بصمة UNIQUE (INSERT OR IGNORE) بدون تحميل أي شيء.
+    - كل دفعة إضافة في معاملة واحدة، و WAL يسمح بالقراءة أثناء الكتابة
+      وبعدة كتّاب من عمليات مختلفة (SQLite تتولى القفل).
+    - فهرس FTS5 على الكلمات الموحّدة لـ search() (إذا كانت SQLite تدعمه،
+      وإلا بحث LIKE أبطأ).
+    """
+
+    def __init__(self, path: str = "corpus.sqlite", fts: bool = True):
+        self.path = path
+        self.corpus_path = path
+        self._local = threading.local()
+        self.fts = fts
+        conn = self._connect()
+        with conn:
+            conn.executescript(_SCHEMA)
+            # قواعد أُنشئت قبل عمود الوزن
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sentences)")}
+            if "weight" not in columns:
+                conn.execute("ALTER TABLE sentences ADD COLUMN weight INTEGER NOT NULL DEFAULT 1")
+            if self.fts:
+                try:
+                    conn.executescript(_FTS_SCHEMA)
+                except sqlite3.OperationalError as e:
+                    print(f"WARNING: SQLite بدون FTS5 ({e}). البحث سيستخدم LIKE.")
+                    self.fts = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """اتصال لكل خيط (اتصالات sqlite3 لا تُشارك بين الخيوط)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # الدالة يستخدمها trigger فهرس FTS، فتُسجَّل في كل اتصال يكتب
+        conn.create_function("nano_terms", 1, _terms, deterministic=True)
+        return conn
+
+    # ---------- القراءة ----------
+
+    def __iter__(self) -> Iterator[str]:
+        """الجمل بترتيب إضافتها عبر cursor (اتصال مستقل: لقطة ثابتة أثناء القراءة)"""
+        conn = self._open()
+        try:
+            cursor = conn.execute("SELECT text FROM sentences ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(_FETCH_SIZE)
+                if not rows:
+                    return
+                for (text,) in rows:
+                    yield text
+        finally:
+            conn.close()
+
+    def iter_weighted(self) -> Iterator[tuple]:
+        """أزواج (الجملة، الوزن) بترتيب الإضافة"""
+        conn = self._open()
+        try:
+            cursor = conn.execute("SELECT text, weight FROM sentences ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(_FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT count(*) FROM sentences").fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    # ---------- الإضافة ----------
+
+    def add_new(self, candidates: Iterable, source=None, category=None, quality=None) -> tuple:
+        """
+        إضافة الجمل غير الموجودة (نصوص أو أزواج (نص، وزن)) في معاملة واحدة.
+        يرجع (عدد المضاف، الإجمالي).
+        """
+        rows = ((sentence, _signed(sentence_hash(sentence)), source, category, quality, weight)
+                for sentence, weight in map(split_entry, candidates))
+        conn = self._connect()
+        with conn:
+            # rowcount لا يحسب صفوف FTS التي يضيفها الـ trigger ولا الصفوف المتجاهلة
+            added = conn.executemany(
+                "INSERT OR IGNORE INTO sentences (text, hash, source, category, quality, weight) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows).rowcount
+        return max(added, 0), self.count()
+
+    def append(self, sentences: Iterable, **meta) -> int:
+        return self.add_new(sentences, **meta)[0]
+
+    def import_from(self, corpus_path: str, source="import") -> tuple:
+        """استيراد ملف JSON/JSONL (أو قاعدة CorpusStore) بدفعات، مع أوزان الجمل"""
+        added = 0
+        batch = []
+        for sentence in iter_weighted(corpus_path):
+            batch.append(sentence)
+            if len(batch) >= 10000:
+                added += self.add_new(batch, source=source)[0]
+                batch = []
+        added += self.add_new(batch, source=source)[0]
+        return added, self.count()
+
+    # ---------- البحث والإحصاءات ----------
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """أقرب الجمل لكلمات النص (أي كلمة، مرتبة حسب bm25)"""
+        words = analyze(query).words
+        if not words:
+            return []
+        conn = self._connect()
+        if self.fts:
+            match = " OR ".join(f'"{word}"' for word in words)
+            rows = conn.execute(
+                "SELECT s.text FROM sentences_fts f JOIN sentences s ON s.id = f.rowid "
+                "WHERE sentences_fts MATCH ? ORDER BY f.rank LIMIT ?", (match, limit))
+        else:
+            # المطابقة على الكلمات الموحّدة (مثل FTS) وليس النص كما كُتب
+            clause = " OR ".join("nano_terms(text) LIKE ?" for _ in words)
+            rows = conn.execute(f"SELECT text FROM sentences WHERE {clause} LIMIT ?",
+                                [f"%{word}%" for word in words] + [limit])
+        return [text for (text,) in rows]
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        total, avg_quality, total_weight = conn.execute(
+            "SELECT count(*), avg(quality), coalesce(sum(weight), 0) FROM sentences").fetchone()
+        by_source = dict(conn.execute(
+            "SELECT coalesce(source, ''), count(*) FROM sentences GROUP BY source"))
+        by_category = dict(conn.execute(
+            "SELECT coalesce(category, ''), count(*) FROM sentences GROUP BY category"))
+        return {"sentences": total, "total_weight": total_weight, "avg_quality": avg_quality,
+                "by_source": by_source, "by_category": by_category}
+
+    def compact(self, wait: bool = True) -> int:
+        """دمج أجزاء فهرس FTS وتحديث إحصاءات SQLite (مقابل دمج الأجزاء في CorpusStore)"""
+        conn = self._connect()
+        with conn:
+            if self.fts:
+                conn.execute("INSERT INTO sentences_fts(sentences_fts) VALUES ('optimize')")
+            conn.execute("PRAGMA optimize")
+        return self.count()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="قاعدة الجمل في SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import", help="استيراد corpus.json (أو .jsonl) إلى قاعدة SQLite")
+    p.add_argument("source")
+    p.add_argument("database")
+    p = sub.add_parser("search", help="بحث نصي في الجمل")
+    p.add_argument("database")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=10)
+    p = sub.add_parser("stats", help="عدد الجمل حسب المصدر والفئة")
+    p.add_argument("database")
+    args = parser.parse_args()
+
+    store = SQLiteCorpusStore(args.database)
+    if args.command == "import":
+        added, total = store.import_from(args.source)
+        print(f"تم استيراد {added} جملة (الإجمالي {total})")
+    elif args.command == "search":
+        for sentence in store.search(args.query, args.limit):
+            print(sentence)
+    else:
+        stats = store.stats()
+        print(f"الجمل: {stats['sentences']}")
+        for name, count in sorted(stats["by_source"].items(), key=lambda x: -x[1]):
+            print(f"  {name or '-'}: {count}")
@@ -0,0 +1,756 @@
+# corpus_store.py - قراءة وكتابة قاعدة الجمل بشكل متدفق (بدون تحميل الملف كاملاً)
+import json
+import os
+import hashlib
+import threading
+from array import array
+from contextlib import suppress
+from typing import Iterable, Iterator
+
+from hash_index import HashIndex, write_hashes, read_hashes
+
+try:
+    import fcntl
+except ImportError:
+    # ويندوز: بدون قفل بين العمليات (القفل داخل العملية يبقى)
+    fcntl = None
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+
+MANIFEST_VERSION = 1
+# وزن الجملة الافتراضي (عدد مرات احتسابها في التدريب)
+DEFAULT_WEIGHT = 1
+# أقفال كل قاعدة بيانات (حسب المسار) مشتركة بين كل نسخ CorpusStore في العملية
+_store_locks = {}
+_store_locks_guard = threading.Lock()
+
+
+def _fsync_dir(path: str):
+    """تثبيت أسماء الملفات بعد os.replace (غير متاح على ويندوز)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _PathLock:
+    """
+    قفل قابل لإعادة الدخول: threading.RLock بين خيوط العملية، و fcntl.flock
+    (advisory) على ملف القفل بين العمليات. flock يُؤخذ عند الدخول الأول فقط.
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._rlock.acquire(blocking=blocking):
+            return False
+        if self._depth == 0 and fcntl is not None:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                self._rlock.release()
+                return False
+            self._fd = fd
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._rlock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _path_locks(corpus_path: str) -> tuple:
+    """(قفل التعديل، قفل الدمج) لقاعدة الجمل، نفس الكائنات لكل نسخ العملية"""
+    key = os.path.realpath(corpus_path)
+    with _store_locks_guard:
+        locks = _store_locks.get(key)
+        if locks is None:
+            locks = (_PathLock(corpus_path + ".lock"), _PathLock(corpus_path + ".compact.lock"))
+            _store_locks[key] = locks
+        return locks
+
+
+def sentence_hash(sentence: str) -> int:
+    """بصمة 64-بت ثابتة للجملة (مستقلة عن PYTHONHASHSEED)"""
+    digest = hashlib.blake2b(sentence.strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def is_heldout(sentence: str, heldout_percent: int) -> bool:
+    """
+    هل الجملة من الجمل المحجوزة للتقييم: heldout_percent% من الجمل حسب بصمتها،
+    فتبقى الجملة في نفس القسم مهما كبر الملف أو تغير ترتيبه.
+    """
+    return sentence_hash(sentence) % 100 < heldout_percent
+
+
+def split_entry(entry) -> tuple:
+    """
+    (الجملة، الوزن) لعنصر من قاعدة الجمل أو من المولّدات: نص (وزن 1)،
+    أو {"text": ..., "weight": n} كما يُحفظ في الملف، أو زوج (نص، وزن).
+    """
+    if isinstance(entry, str):
+        return entry, DEFAULT_WEIGHT
+    if isinstance(entry, dict):
+        text, weight = entry["text"], entry.get("weight", DEFAULT_WEIGHT)
+    else:
+        text, weight = entry
+    if weight != int(weight) or weight < 1:
+        raise ValueError(f"وزن الجملة يجب أن يكون عدداً صحيحاً موجباً: {weight!r}")
+    return text, int(weight)
+
+
+def entry_text(entry) -> str:
+    """نص العنصر بدون وزنه"""
+    return entry if isinstance(entry, str) else split_entry(entry)[0]
+
+
+def _encode_entry(entry) -> str:
+    """العنصر كنص JSON: الجملة كنص كما كانت، وكائن {"text", "weight"} فقط لوزن غير 1"""
+    text, weight = split_entry(entry)
+    if weight == DEFAULT_WEIGHT:
+        return json.dumps(text, ensure_ascii=False)
+    return json.dumps({"text": text, "weight": weight}, ensure_ascii=False)
+
+
+class _StreamingJSONReader:
+    """
+    قارئ JSON تدريجي: يقرأ الملف على دفعات ويفك قيمة واحدة في كل مرة،
+    فلا يبقى في الذاكرة إلا الجزء غير المقروء من الدفعة الحالية.
+    """
+
+    def __init__(self, f, chunk_size: int = _CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """أول حرف غير فراغ (أو "" عند نهاية الملف)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"توقعنا '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """فك قيمة JSON كاملة من الموضع الحالي (مع قراءة المزيد عند الحاجة)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # رقم في آخر الدفعة قد يكون مقطوعاً
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array_items(self) -> Iterator:
+        """عناصر مصفوفة JSON واحداً واحداً"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("توقعنا ',' أو ']'", self.buf, self.pos - 1)
+
+
+def iter_sentences(corpus_path: str = "corpus.json", key: str = "sentences") -> Iterator[str]:
+    """
+    قراءة الجمل واحدة واحدة.
+
+    يدعم صيغتين:
+    - JSON: {"sentences": [...]} (يُقرأ تدريجياً، والمفاتيح الأخرى تُتجاوز)
+    - JSONL: سطر لكل جملة (نص JSON)، للملفات التي تنتهي بـ .jsonl
+
+    إذا كان للملف أجزاء مُلحقة (CorpusStore) تُقرأ بعده بترتيب إضافتها،
+    وقاعدة SQLite (.sqlite/.db) تُقرأ صفاً صفاً عبر cursor.
+    """
+    if _is_sqlite(corpus_path):
+        return iter(open_corpus(corpus_path))
+    store = CorpusStore(corpus_path)
+    if os.path.exists(store.manifest_path):
+        return iter(store)
+    return map(entry_text, _iter_file(corpus_path, key))
+
+
+def iter_weighted(corpus_path: str = "corpus.json", key: str = "sentences") -> Iterator[tuple]:
+    """
+    مثل iter_sentences لكن أزواج (الجملة، الوزن). الجملة الموزونة محفوظة
+    مرة واحدة كـ {"text": ..., "weight": n} بدل تكرارها n مرة.
+    """
+    if _is_sqlite(corpus_path):
+        return open_corpus(corpus_path).iter_weighted()
+    store = CorpusStore(corpus_path)
+    if os.path.exists(store.manifest_path):
+        return store.iter_weighted()
+    return map(split_entry, _iter_file(corpus_path, key))
+
+
+def _iter_file(corpus_path: str, key: str = "sentences") -> Iterator[str]:
+    with open(corpus_path, 'r', encoding='utf-8') as f:
+        yield from _read_open(corpus_path, f, key)
+
+
+def _read_open(corpus_path: str, f, key: str = "sentences") -> Iterator:
+    """عناصر الجمل من ملف مفتوح كما حُفظت (نص أو كائن بوزن)، والصيغة حسب امتداد المسار"""
+    if corpus_path.endswith(".jsonl"):
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        return
+
+    reader = _StreamingJSONReader(f)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            yield from reader.array_items()
+        else:
+            reader.value()
+        char = reader.peek()
+        reader.pos += 1
+        if char == "}":
+            return
+        if char != ",":
+            raise json.JSONDecodeError("توقعنا ',' أو '}'", reader.buf, reader.pos - 1)
+
+
+def _iter_handles(files) -> Iterator:
+    """عناصر الجمل من قائمة (مسار، ملف مفتوح) بالترتيب، مع إغلاق كل الملفات في النهاية"""
+    try:
+        for path, f in files:
+            yield from _read_open(path, f)
+    finally:
+        for _, f in files:
+            f.close()
+
+
+def write_sentences(corpus_path: str, sentences: Iterable) -> int:
+    """
+    كتابة الجمل بشكل متدفق إلى ملف مؤقت ثم استبداله بشكل ذري.
+    يرجع عدد الجمل المكتوبة. الصيغة حسب الامتداد (.json أو .jsonl).
+    العناصر نصوص أو أزواج (نص، وزن) أو كائنات {"text", "weight"}.
+    """
+    # اسم مؤقت لكل عملية وخيط: كاتبان متزامنان لا يكتبان في نفس الملف المؤقت
+    tmp_path = f"{corpus_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    count = 0
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if corpus_path.endswith(".jsonl"):
+                for sentence in sentences:
+                    f.write(_encode_entry(sentence))
+                    f.write("\n")
+                    count += 1
+            else:
+                f.write('{\n  "sentences": [')
+                for sentence in sentences:
+                    f.write(",\n    " if count else "\n    ")
+                    f.write(_encode_entry(sentence))
+                    count += 1
+                f.write("\n  ]\n}" if count else "]\n}")
+            # المحتوى على القرص قبل إعادة التسمية: انقطاع الكهرباء لا يترك ملفاً فارغاً باسم الأصلي
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        # الملف الأصلي لا يُمس إذا فشلت القراءة أو الكتابة في المنتصف
+        # (الملف المؤقت قد لا يكون أُنشئ: الخطأ الأصلي هو الذي يُرفع)
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, corpus_path)
+    return count
+
+
+def append_new_sentences(corpus_path: str, candidates: Iterable[str]) -> tuple:
+    """
+    إضافة الجمل غير الموجودة إلى ملف البيانات (عبر CorpusStore: جزء جديد
+    يُلحق بدل إعادة كتابة الملف). يرجع (عدد المضاف، الإجمالي).
+    """
+    return open_corpus(corpus_path).add_new(candidates)
+
+
+def _is_sqlite(corpus_path: str) -> bool:
+    return corpus_path.endswith((".sqlite", ".sqlite3", ".db"))
+
+
+def open_corpus(corpus_path: str = "corpus.json"):
+    """
+    قاعدة الجمل المناسبة للمسار: SQLiteCorpusStore لملفات .sqlite/.db،
+    وإلا CorpusStore (JSON + أجزاء JSONL). الواجهة واحدة: القراءة المتدفقة
+    و add_new و count.
+    """
+    if _is_sqlite(corpus_path):
+        from corpus_sqlite import SQLiteCorpusStore
+        return SQLiteCorpusStore(corpus_path)
+    return CorpusStore(corpus_path)
+
+
+class CorpusStore:
+    """
+    قاعدة الجمل كملف أساسي (corpus.json) + أجزاء JSONL تُلحق ولا تُعدّل:
+
+        corpus.json                      الملف الأساسي (بنفس صيغته القديمة)
+        corpus.json.d/manifest.json      ترتيب الأجزاء وعدد جمل كل منها
+        corpus.json.d/segment-000001.jsonl ...
+        corpus.json.d/segment-000001.hashes  بصمات جمل الجزء
+        corpus.json.d/index.bin          فهرس بصمات الملف الأساسي (HashIndex)
+
+    - إضافة N جملة تكتب جزءاً جديداً بحجم N فقط (وملف manifest صغير).
+    - القراءة (iter_sentences / التدريب) تمر على الأساسي ثم الأجزاء بالترتيب،
+      فيبقى ترتيب الجمل ثابتاً والتدريب التراكمي على المسار السريع.
+    - الدمج (compact) يكتب الأساسي + الأجزاء في ملف أساسي جديد ويحذف الأجزاء.
+      يبدأ تلقائياً في خيط خلفي عند تجاوز max_segments جزءاً.
+    - فحص التكرار (add_new) عبر فهرس البصمات: يُحمّل مرة واحدة ثم تُضاف له
+      بصمات الأجزاء الجديدة فقط، ويُعاد بناؤه مع كل دمج.
+    """
+
+    def __init__(self, corpus_path: str = "corpus.json", max_segments: int = 16):
+        self.corpus_path = corpus_path
+        self.segment_dir = corpus_path + ".d"
+        self.manifest_path = os.path.join(self.segment_dir, "manifest.json")
+        self.index_path = os.path.join(self.segment_dir, "index.bin")
+        self.max_segments = max_segments
+        self._lock, self._compaction_lock = _path_locks(corpus_path)
+        self._compactor = None
+        self._index = None
+        self._index_stamp = None    # بصمة الملف الأساسي التي يطابقها الفهرس المحمّل
+        self._index_segments = set()  # الأجزاء المضافة بصماتها للفهرس
+
+    # ---------- manifest ----------
+
+    def _read_manifest(self) -> dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {"version": MANIFEST_VERSION, "base": None, "segments": [], "next_segment": 1}
+
+    def _write_manifest(self, manifest: dict):
+        """
+        كتابة manifest (نقطة الالتزام: الجزء موجود فقط بعد ظهوره هنا).
+        تُستدعى تحت القفل دائماً.
+        """
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        _fsync_dir(self.segment_dir)
+
+    def _base_stamp(self):
+        st = os.stat(self.corpus_path)
+        return [st.st_size, st.st_mtime_ns]
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.segment_dir, name)
+
+    def _hashes_path(self, name: str) -> str:
+        return self._segment_path(name[:-len(".jsonl")] + ".hashes")
+
+    # ---------- القراءة ----------
+
+    def _open_files(self, segments):
+        """
+        فتح الأساسي والأجزاء المطلوبة دفعة واحدة (تحت القفل عند الاستدعاء):
+        الدمج يستبدل الملفات تحت نفس القفل، والملفات المفتوحة تبقى مقروءة
+        بعد استبدالها أو حذفها.
+        """
+        paths = [self.corpus_path] if os.path.exists(self.corpus_path) else []
+        paths.extend(self._segment_path(segment["file"]) for segment in segments)
+        files = []
+        try:
+            for path in paths:
+                files.append((path, open(path, 'r', encoding='utf-8')))
+        except BaseException:
+            for _, f in files:
+                f.close()
+            raise
+        return files
+
+    def _iter_entries(self) -> Iterator:
+        with self._lock:
+            files = self._open_files(self._read_manifest()["segments"])
+        return _iter_handles(files)
+
+    def __iter__(self) -> Iterator[str]:
+        return map(entry_text, self._iter_entries())
+
+    def iter_weighted(self) -> Iterator[tuple]:
+        """أزواج (الجملة، الوزن) بنفس ترتيب القراءة"""
+        return map(split_entry, self._iter_entries())
+
+    def count(self) -> int:
+        """عدد الجمل: عدد الأساسي محفوظ في manifest (يُعاد عدّه فقط إذا تغيّر الملف)"""
+        with self._lock:
+            manifest = self._read_manifest()
+            base = manifest.get("base")
+            total = sum(segment["count"] for segment in manifest["segments"])
+            if not os.path.exists(self.corpus_path):
+                return total
+            stamp = self._base_stamp()
+            if base is None or base.get("stamp") != stamp:
+                base = {"count": sum(1 for _ in _iter_file(self.corpus_path)), "stamp": stamp}
+                if os.path.exists(self.segment_dir):
+                    manifest["base"] = base
+                    self._write_manifest(manifest)
+            return base["count"] + total
+
+    def __len__(self):
+        return self.count()
+
+    # ---------- الإضافة ----------
+
+    def append(self, sentences: Iterable) -> int:
+        """
+        إلحاق الجمل (نصوص أو أزواج (نص، وزن)) كجزء جديد بدون فحص التكرار.
+        يرجع عدد الجمل المكتوبة.
+        """
+        with self._lock:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            if not os.path.exists(self.corpus_path):
+                write_sentences(self.corpus_path, [])
+            manifest = self._read_manifest()
+            name = f"segment-{manifest['next_segment']:06d}.jsonl"
+            hashes = array('Q')
+
+            def hashed():
+                for sentence in sentences:
+                    hashes.append(sentence_hash(entry_text(sentence)))
+                    yield sentence
+
+            count = write_sentences(self._segment_path(name), hashed())
+            if count == 0:
+                os.remove(self._segment_path(name))
+                return 0
+            # البصمات قبل manifest: جزء بدون بصمات لا يظهر، وبصمات بدون جزء تُتجاهل
+            write_hashes(self._hashes_path(name), hashes)
+            manifest["next_segment"] += 1
+            manifest["segments"].append({"file": name, "count": count})
+            self._write_manifest(manifest)
+            segments = len(manifest["segments"])
+            if self._index is not None:
+                for h in hashes:
+                    self._index.add(h)
+                self._index_segments.add(name)
+        if segments >= self.max_segments:
+            self.compact_in_background()
+        return count
+
+    def add_new(self, candidates: Iterable, source=None, category=None, quality=None) -> tuple:
+        """
+        إلحاق الجمل غير الموجودة (ولا المكررة داخل candidates). العناصر نصوص
+        أو أزواج (نص، وزن)؛ وزن جملة موجودة مسبقاً لا يتغير.
+        يرجع (عدد المضاف، الإجمالي). source/category/quality تُحفظ فقط في
+        مخزن SQLite (نفس الواجهة)، وتُتجاهل هنا.
+        """
+        # البصمات وحذف المكرر داخل الدفعة قبل أخذ القفل، فيبقى القفل
+        # (بين العمليات أيضاً) محجوزاً لفحص الفهرس والكتابة فقط
+        batch = {}
+        for sentence in candidates:
+            batch.setdefault(sentence_hash(entry_text(sentence)), sentence)
+
+        with self._lock:
+            index = self.index()
+            added = self.append(sentence for h, sentence in batch.items() if h not in index)
+            return added, self.count()
+
+    def index(self) -> HashIndex:
+        """
+        فهرس بصمات كل الجمل (الأساسي + الأجزاء)، محدَّث حسب manifest الحالي:
+        يُحمّل من index.bin مرة واحدة، ثم تُضاف بصمات الأجزاء الجديدة فقط.
+        يُبنى من الملف الأساسي فقط إذا لم يوجد أو تغيّر الملف من خارج CorpusStore.
+        """
+        with self._lock:
+            manifest = self._read_manifest()
+            stamp = self._base_stamp() if os.path.exists(self.corpus_path) else None
+            if self._index is None or self._index_stamp != stamp:
+                self._index = self._load_base_index(manifest, stamp)
+                self._index_stamp = stamp
+                self._index_segments = set()
+            for segment in manifest["segments"]:
+                name = segment["file"]
+                if name in self._index_segments:
+                    continue
+                if os.path.exists(self._hashes_path(name)):
+                    hashes = read_hashes(self._hashes_path(name))
+                else:
+                    hashes = map(sentence_hash, map(entry_text, _iter_file(self._segment_path(name))))
+                for h in hashes:
+                    self._index.add(h)
+                self._index_segments.add(name)
+            return self._index
+
+    def _load_base_index(self, manifest: dict, stamp) -> HashIndex:
+        if stamp is None:
+            return HashIndex()
+        if manifest.get("index") == stamp and os.path.exists(self.index_path):
+            try:
+                return HashIndex.load(self.index_path)
+            except (OSError, ValueError) as e:
+                print(f"WARNING: تعذر قراءة فهرس البصمات ({e}). سيُعاد بناؤه.")
+        index = HashIndex.build(map(sentence_hash, map(entry_text, _iter_file(self.corpus_path))))
+        os.makedirs(self.segment_dir, exist_ok=True)
+        index.save(self.index_path)
+        manifest["index"] = stamp
+        self._write_manifest(manifest)
+        return index
+
+    def exists(self) -> bool:
+        return os.path.exists(self.corpus_path) or os.path.exists(self.manifest_path)
+
+    # ---------- الدمج ----------
+
+    def compact(self, wait: bool = True):
+        """
+        دمج الأساسي والأجزاء الحالية في ملف أساسي جديد. الأجزاء المضافة أثناء
+        الدمج تبقى كما هي. يرجع عدد الجمل في الملف الأساسي الجديد، أو None
+        إذا كان دمج آخر يعمل و wait=False.
+        """
+        if not self._compaction_lock.acquire(blocking=wait):
+            return None
+        try:
+            return self._compact()
+        finally:
+            self._compaction_lock.release()
+
+    def _compact(self) -> int:
+        with self._lock:
+            segments = self._read_manifest()["segments"]
+            if not segments:
+                return self.count()
+            merged = [segment["file"] for segment in segments]
+            files = self._open_files(segments)
+
+        # النسخ (الجزء الطويل) خارج القفل: القراءة والإضافة تستمر أثناءه.
+        # فهرس البصمات يُبنى من نفس القراءة
+        tmp_path = os.path.join(self.segment_dir, "compact.json")
+        hashes = array('Q')
+
+        def hashed():
+            # العناصر تُنسخ كما هي (مع أوزانها)
+            for entry in _iter_handles(files):
+                hashes.append(sentence_hash(entry_text(entry)))
+                yield entry
+
+        count = write_sentences(tmp_path, hashed())
+        index = HashIndex.build(hashes)
+
+        with self._lock:
+            os.replace(tmp_path, self.corpus_path)
+            _fsync_dir(os.path.dirname(self.corpus_path))
+            stamp = self._base_stamp()
+            index.save(self.index_path)
+            manifest = self._read_manifest()
+            manifest["segments"] = [s for s in manifest["segments"] if s["file"] not in merged]
+            manifest["base"] = {"count": count, "stamp": stamp}
+            manifest["index"] = stamp
+            self._write_manifest(manifest)
+            for name in merged:
+                for path in (self._segment_path(name), self._hashes_path(name)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            # الفهرس المحمّل يُستبدل بالجديد عند أول استخدام (تغيّرت بصمة الأساسي)
+        return count
+
+    def compact_in_background(self):
+        """بدء الدمج في خيط خلفي (إذا لم يكن يعمل). الخيط ليس daemon فيكمل قبل خروج البرنامج."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return self._compactor
+        self._compactor = threading.Thread(target=self._compact_quietly, name="corpus-compaction")
+        self._compactor.start()
+        return self._compactor
+
+    def _compact_quietly(self):
+        try:
+            self.compact(wait=False)
+        except Exception as e:
+            print(f"WARNING: فشل دمج أجزاء قاعدة الجمل: {e}")
+
+
+class CorpusWriter:
+    """
+    طابور إضافات مشترك بين عدة منتجين (خيوط الخادم، جدولة التدريب...):
+    submit() تضيف الجمل للطابور وترجع فوراً، وخيط واحد في الخلفية يجمع كل
+    ما وصل خلال max_delay ثانية (أو max_batch جملة) ويلتزم به كجزء واحد عبر
+    CorpusStore.add_new. flush() تنتظر حتى يُلتزم بكل ما أُرسل قبلها.
+
+    الخيط يبدأ تلقائياً مع أول submit/flush. إذا فشل الالتزام ترجع الدفعة
+    لأول الطابور وتُعاد المحاولة بانتظار يتضاعف (retry_delay حتى
+    max_retry_delay)، ولا يُعتبر ما فيها ملتزماً به: flush() ترجع False عند
+    الفشل، وstop() ترجع False إذا بقيت جمل لم تُحفظ (تبقى في الطابور).
+    """
+
+    def __init__(self, store, max_batch=10000, max_delay=0.5, retry_delay=0.5, max_retry_delay=30.0):
+        self.store = open_corpus(store) if isinstance(store, str) else store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._pending = []
+        self._condition = threading.Condition()
+        self._submitted = 0   # رقم آخر دفعة أُرسلت
+        self._committed = 0   # رقم آخر دفعة التُزم بها
+        self._stopped = False
+        self._thread = None
+
+        self.commits = 0
+        self.added = 0
+        self.errors = 0
+        self.last_error = None
+
+    def submit(self, sentences: Iterable[str]) -> int:
+        """إضافة جمل للطابور. يرجع رقم الدفعة (لـ flush)."""
+        with self._condition:
+            self._pending.extend(sentences)
+            self._submitted += 1
+            ticket = self._submitted
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify_all()
+            self.start()
+        return ticket
+
+    def flush(self, timeout=None) -> bool:
+        """
+        انتظار الالتزام بكل الدفعات المرسلة حتى الآن. يرجع False إذا انتهت
+        المهلة أو فشلت محاولة الالتزام (الجمل تبقى في الطابور لمحاولة تالية).
+        """
+        with self._condition:
+            ticket = self._submitted
+            errors = self.errors
+            if self._committed < ticket:
+                self.start()
+            self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: self._committed >= ticket or self.errors > errors, timeout)
+            return self._committed >= ticket
+
+    def start(self):
+        """تشغيل خيط الالتزام في الخلفية (إذا لم يكن يعمل)"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="corpus-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None) -> bool:
+        """
+        إيقاف الخيط بعد محاولة أخيرة للالتزام بما تبقى في الطابور.
+        يرجع False إذا بقيت جمل لم تُحفظ (start() لاحقاً يعيد المحاولة).
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._condition:
+            if self._thread is thread and not (thread and thread.is_alive()):
+                self._thread = None
+            return self._committed >= self._submitted
+
+    def _run(self):
+        delay = self.retry_delay
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopped or len(self._pending) >= self.max_batch,
+                    self.max_delay,
+                )
+                batch, self._pending = self._pending, []
+                ticket = self._submitted
+                stopped = self._stopped
+            error = self._commit(batch) if batch else None
+            with self._condition:
+                if error is None:
+                    self._committed = ticket
+                    delay = self.retry_delay
+                else:
+                    # الدفعة ترجع قبل ما وصل أثناء المحاولة، ورقم الالتزام لا يتقدم
+                    self._pending[:0] = batch
+                self._condition.notify_all()
+                if stopped:
+                    return
+                if error is not None:
+                    self._condition.wait_for(lambda: self._stopped, delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+
+    def _commit(self, batch):
+        """الالتزام بدفعة؛ يرجع الخطأ (أو None) بدل رفعه حتى يكمل الخيط"""
+        try:
+            added, _ = self.store.add_new(batch)
+        except Exception as e:
+            with self._condition:
+                self.errors += 1
+                self.last_error = e
+            print(f"WARNING: فشل حفظ دفعة من {len(batch)} جملة (ستُعاد المحاولة): {e}")
+            return e
+        with self._condition:
+            self.commits += 1
+            self.added += added
+        return None
+
+    def stats(self):
+        with self._condition:
+            return {"commits": self.commits, "added": self.added, "errors": self.errors,
+                    "queued": len(self._pending)}
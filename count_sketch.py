@@ -0,0 +1,115 @@
+# count_sketch.py - عدّ تقريبي بذاكرة ثابتة (Count-Min Sketch + الأكثر تكراراً)
+import heapq
+import random
+from array import array
+from operator import itemgetter
+
+# عدد أولي (2^89 - 1) أكبر من أي مفتاح n-gram مضغوط (4 كلمات × 21 بت)
+_PRIME = (1 << 89) - 1
+# تقدير تقريبي لحجم مدخل في القاموس (المفتاح والعدد كأعداد بايثون + خانة القاموس)
+_ENTRY_BYTES = 120
+
+
+class CountMinSketch:
+    """
+    مصفوفة عدادات depth × width: كل مفتاح يُعدّ في خانة واحدة لكل صف
+    (دالة hash مختلفة لكل صف) والتقدير أصغر الخانات. التقدير لا يقل أبداً
+    عن العدد الحقيقي، والخطأ محدود بحجم العرض.
+    """
+
+    def __init__(self, width, depth=4, seed=0):
+        self.width = width
+        self.depth = depth
+        self.table = array('I', bytes(4 * width * depth))
+        rng = random.Random(seed)
+        self._hashes = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(depth)]
+
+    def _cells(self, key):
+        width = self.width
+        return [row * width + (a * key + b) % _PRIME % width
+                for row, (a, b) in enumerate(self._hashes)]
+
+    def add(self, key, count=1):
+        """
+        إضافة عدد للمفتاح وإرجاع التقدير الجديد. الإضافة "محافظة": تُرفع فقط
+        الخانات التي تقل عن التقدير الجديد، فيقل تضخم التقديرات.
+        """
+        table = self.table
+        cells = self._cells(key)
+        estimate = min(table[cell] for cell in cells) + count
+        for cell in cells:
+            if table[cell] < estimate:
+                table[cell] = estimate
+        return estimate
+
+    def estimate(self, key):
+        table = self.table
+        return min(table[cell] for cell in self._cells(key))
+
+    def nbytes(self):
+        return self.table.itemsize * len(self.table)
+
+
+class ApproximateCounts:
+    """
+    بديل عدادات n-gram (القاموس) بذاكرة ثابتة: Count-Min Sketch لكل المفاتيح،
+    وقائمة بأكثر capacity مفتاحاً تكراراً (heavy hitters) هي التي تدخل جدول
+    الانتقالات. السياقات النادرة تسقط ويتراجع التوليد عنها لسياق أقصر.
+    """
+
+    def __init__(self, memory_bytes, depth=4, seed=0):
+        # نصف الميزانية للـ sketch ونصفها للمفاتيح المحفوظة (حتى ضعف capacity قبل التقليم)
+        self.memory_bytes = memory_bytes
+        self.sketch = CountMinSketch(max(64, memory_bytes // 2 // (4 * depth)), depth, seed)
+        self.capacity = max(16, memory_bytes // 2 // (2 * _ENTRY_BYTES))
+        self.heavy = {}
+        self.threshold = 0
+
+    @classmethod
+    def split_budget(cls, memory_mb, levels):
+        """ميزانية بالميغابايت موزعة بالتساوي على levels جدول"""
+        per_level = int(memory_mb * 1024 * 1024) // levels
+        return [cls(per_level, seed=n) for n in range(levels)]
+
+    def add(self, key, count=1):
+        estimate = self.sketch.add(key, count)
+        if estimate > self.threshold or key in self.heavy:
+            self.heavy[key] = estimate
+            if len(self.heavy) >= 2 * self.capacity:
+                self._prune()
+
+    def reserve(self, nbytes):
+        """
+        حجز nbytes من الميزانية لبيانات أخرى (مثل المفردات): تُصغَّر قائمة
+        المفاتيح المحفوظة حتى يبقى المجموع داخل memory_bytes.
+        """
+        available = self.memory_bytes - self.sketch.nbytes() - nbytes
+        capacity = max(16, available // (2 * _ENTRY_BYTES))
+        if capacity < self.capacity:
+            self.capacity = capacity
+            if len(self.heavy) >= 2 * capacity:
+                self._prune()
+
+    def update(self, counts):
+        """إضافة عدادات قاموس (مثلاً من جزء عُدّ في عملية أخرى أو نموذج محفوظ)"""
+        for key, count in counts.items():
+            self.add(key, count)
+
+    def _prune(self):
+        """الإبقاء على أكثر capacity مفتاحاً تكراراً (بتقديرات محدثة)"""
+        estimate = self.sketch.estimate
+        top = heapq.nlargest(self.capacity, ((key, estimate(key)) for key in self.heavy),
+                             key=itemgetter(1))
+        self.heavy = dict(top)
+        self.threshold = top[-1][1] if len(top) == self.capacity else 0
+
+    def items(self):
+        """المفاتيح المحفوظة وتقديراتها (بنفس واجهة القاموس لـ TransitionTable.from_counts)"""
+        self._prune()
+        return self.heavy.items()
+
+    def __len__(self):
+        return len(self.heavy)
+
+    def nbytes(self):
+        return self.sketch.nbytes() + 2 * self.capacity * _ENTRY_BYTES
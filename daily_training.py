@@ -1,12 +1,18 @@
 # daily_training.py - تدريب نانو اليومي على الهجة الرياضية
-import json
+import os
 import random
+import shutil
+from contextlib import suppress
 from datetime import datetime
 from riyadh_dialect_generative_module import RiyadhDialectGenerative
+from model_evaluation import HELDOUT_PERCENT, evaluate, passes_gate, record
+from corpus_store import open_corpus
 
 class DailyTrainer:
-    def __init__(self, corpus_path="corpus.json"):
+    def __init__(self, corpus_path="corpus.json", model_path="riyadh_model.json"):
         self.corpus_path = corpus_path
+        self.model_path = model_path
+        self.corpus = open_corpus(corpus_path)
         
     def get_todays_phrases(self):
         """جمل جديدة للتدريب اليومي بالهجة الرياضية"""
@@ -161,26 +167,11 @@ class DailyTrainer:
     def add_phrases_to_corpus(self, new_phrases):
         """إضافة جمل جديدة لقاعدة البيانات"""
         try:
-            with open(self.corpus_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            current_sentences = data.get("sentences", [])
-            print(f"عدد الجمل الحالية: {len(current_sentences)}")
-            
-            # إضافة الجمل الجديدة (تجنب التكرار)
-            added_count = 0
-            for phrase in new_phrases:
-                if phrase not in current_sentences:
-                    current_sentences.append(phrase)
-                    added_count += 1
-            
-            data["sentences"] = current_sentences
-            
-            with open(self.corpus_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
+            # الجمل الجديدة فقط (تجنب التكرار) تُلحق كجزء في قاعدة الجمل
+            added_count, total = self.corpus.add_new(new_phrases, source="daily_training")
+            print(f"عدد الجمل السابقة: {total - added_count}")
             print(f"تم إضافة {added_count} جملة جديدة")
-            print(f"إجمالي الجمل الآن: {len(current_sentences)}")
+            print(f"إجمالي الجمل الآن: {total}")
             
         except Exception as e:
             print(f"خطأ في إضافة الجمل: {e}")
@@ -191,17 +182,47 @@ class DailyTrainer:
         print("بدء التدريب اليومي لنانو...")
         print("=" * 50)
         
-        nano = RiyadhDialectGenerative()
-        nano.train(force_retrain=True)
+        current = RiyadhDialectGenerative(self.model_path)
+        nano = RiyadhDialectGenerative(
+            os.path.splitext(self.model_path)[0] + ".candidate.json",
+            heldout_percent=HELDOUT_PERCENT)
+        
+        # النموذج المرشح: نسخة من النموذج الحالي يُضاف لها تدريب تراكمي على
+        # جمل اليوم فقط، والجمل المحجوزة لا يُتدرب عليها (إعادة تدريب كاملة
+        # مرة واحدة إذا كان النموذج الحالي تدرب عليها)
+        for source, target in ((current.binary_path, nano.binary_path),
+                               (current.seen_path, nano.seen_path)):
+            if os.path.exists(source):
+                shutil.copyfile(source, target)
+        nano.train(self.corpus_path, incremental=True)
+        if not nano.is_trained():
+            print("خطأ: لم يُدرَّب النموذج المرشح. النموذج الحالي لن يُحدَّث.")
+            return
+        
+        # بوابة الترقية: حيرة المرشح نفسه على الجمل المحجوزة (قراءة متدفقة بأوزانها)
+        result = evaluate(self.corpus_path, model=nano)
+        print(f"الحيرة على الجمل المحجوزة: {result['perplexity']:.3f}")
+        promoted = passes_gate(result)
+        record(result, promoted=promoted, source="daily_training")
+        if not promoted:
+            for path in (nano.binary_path, nano.seen_path):
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+            print("تحذير: الحيرة ارتفعت عن آخر نموذج مُرقّى. النموذج الحالي لن يُحدَّث.")
+            return
+        
+        # الترقية: استبدال ذري لملفات النموذج (الخوادم تعيد التحميل عند تغيّر الملف)
+        os.replace(nano.binary_path, current.binary_path)
+        os.replace(nano.seen_path, current.seen_path)
         
         print("تم الانتهاء من التدريب!")
         
         # اختبار سريع
         print("\n--- اختبار سريع للنموذج المحدث ---")
         test_phrases = ["صباح", "كيف", "وش", "الله", "مبروك"]
+        responses = nano.generate_batch(len(test_phrases), start_words=test_phrases)
         
-        for phrase in test_phrases:
-            response = nano.generate_sentence(start_word=phrase)
+        for phrase, response in zip(test_phrases, responses):
             print(f"'{phrase}' -> {response}")
     
     def run_daily_training(self):
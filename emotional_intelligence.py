@@ -8,6 +8,8 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 import re
 
+from arabic_tokenizer import Tokens, tokenize, keyword_set
+
 @dataclass
 class EmotionalState:
     """الحالة العاطفية المتقدمة"""
@@ -32,6 +34,11 @@ class ResponseTemplate:
 class AdvancedEmotionalIntelligence:
     """نظام الذكاء العاطفي المتقدم لنانو"""
     
+    # علامات السياق الثقافي (موحّدة مرة واحدة)
+    _RELIGIOUS_MARKERS = keyword_set(["الله", "الحمدلله", "ان شاء الله", "ما شاء الله"])
+    _FAMILY_MARKERS = keyword_set(["أهل", "عائلة", "والدين", "أمي", "أبوي"])
+    _FORMAL_MARKERS = keyword_set(["أستاذ", "دكتور", "مدير", "عمل", "وظيفة"])
+    
     def __init__(self):
         self.emotion_models = self.initialize_emotion_models()
         self.response_templates = self.initialize_response_templates()
@@ -243,20 +250,21 @@ class AdvancedEmotionalIntelligence:
         """Pre-compile keyword sets for faster emotion detection"""
         self._emotion_keyword_sets = {}
         for emotion, model in self.emotion_models.items():
-            # Convert all keywords to lowercase sets
-            keywords_set = set(kw.lower() for kw in model["keywords"])
+            # Normalized keyword sets (phrases match Tokens.terms too)
+            keywords_set = keyword_set(model["keywords"])
             intensity_set = set()
             for level_indicators in model["intensity_indicators"].values():
-                intensity_set.update(ind.lower() for ind in level_indicators)
+                intensity_set.update(keyword_set(level_indicators))
             self._emotion_keyword_sets[emotion] = (keywords_set, intensity_set)
     
-    def analyze_emotional_state(self, text: str, context_history: List = None) -> EmotionalState:
+    def analyze_emotional_state(self, text: str, context_history: List = None,
+                                tokens: Optional[Tokens] = None) -> EmotionalState:
         """تحليل الحالة العاطفية المتقدم (محسّن الأداء)"""
-        text_lower = text.lower()
         detected_emotions = {}
         
-        # Split text once for set intersection
-        text_words = set(text_lower.split())
+        # Tokenize once (cached) for set intersection
+        tokens = tokens or tokenize(text)
+        text_words = tokens.terms
         
         # تحليل المشاعر الأساسية باستخدام pre-compiled sets
         for emotion, (keywords_set, intensity_set) in self._emotion_keyword_sets.items():
@@ -293,7 +301,7 @@ class AdvancedEmotionalIntelligence:
             secondary_emotions = {}
         
         # تحليل السياق الثقافي
-        cultural_context = self.analyze_cultural_context(text)
+        cultural_context = self.analyze_cultural_context(text, tokens)
         
         # حساب الاستقرار العاطفي من التاريخ
         stability = self.calculate_emotional_stability(context_history)
@@ -311,23 +319,20 @@ class AdvancedEmotionalIntelligence:
             cultural_context=cultural_context
         )
     
-    def analyze_cultural_context(self, text: str) -> str:
+    def analyze_cultural_context(self, text: str, tokens: Optional[Tokens] = None) -> str:
         """تحليل السياق الثقافي"""
-        text_lower = text.lower()
+        terms = (tokens or tokenize(text)).terms
         
         # فحص العلامات الدينية
-        religious_markers = ["الله", "الحمدلله", "ان شاء الله", "ما شاء الله"]
-        if any(marker in text_lower for marker in religious_markers):
+        if terms & self._RELIGIOUS_MARKERS:
             return "religious"
         
         # فحص السياق العائلي
-        family_markers = ["أهل", "عائلة", "والدين", "أمي", "أبوي"]
-        if any(marker in text_lower for marker in family_markers):
+        if terms & self._FAMILY_MARKERS:
             return "family"
         
         # فحص السياق الرسمي
-        formal_markers = ["أستاذ", "دكتور", "مدير", "عمل", "وظيفة"]
-        if any(marker in text_lower for marker in formal_markers):
+        if terms & self._FORMAL_MARKERS:
             return "formal"
         
         return "casual"
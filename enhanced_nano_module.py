@@ -3,6 +3,7 @@ import json
 import random
 import re
 from riyadh_dialect_generative_module import RiyadhDialectGenerative
+from reply_pool import ReplyPool
 
 class EnhancedNano(RiyadhDialectGenerative):
     """
@@ -10,6 +11,7 @@ class EnhancedNano(RiyadhDialectGenerative):
     """
     def __init__(self, model_path="riyadh_model.json"):
         super().__init__(model_path)
+        self.reply_pool = None
         self.context_patterns = {
             # أنماط الأسئلة والردود المناسبة
             "greetings": {
@@ -60,6 +62,35 @@ class EnhancedNano(RiyadhDialectGenerative):
             }
         }
     
+    def enable_reply_pool(self, pool_size=8, max_keys=256, refill_interval=0.5, start_words=None):
+        """
+        تشغيل مخزون ردود جاهزة لكل كلمة مرساة يُعبأ في الخلفية، فلا يمشي طلب
+        الرد سلسلة ماركوف بنفسه إلا عند فراغ المخزن.
+        """
+        if self.reply_pool is not None:
+            self.reply_pool.stop()
+        self.reply_pool = ReplyPool(
+            self,
+            validate=self.is_response_logical,
+            pool_size=pool_size,
+            max_keys=max_keys,
+            refill_interval=refill_interval,
+            start_words=start_words,
+            anchored=True,
+        ).start()
+        return self.reply_pool
+    
+    def reloaded(self):
+        """النسخة المعاد تحميلها تستلم مخزون الردود ويُفرَّغ ليُعبأ من النموذج الجديد"""
+        fresh = super().reloaded()
+        pool = self.reply_pool
+        if pool is not None:
+            fresh.reply_pool = pool
+            pool.model = fresh
+            pool.validate = fresh.is_response_logical
+            pool.refresh()
+        return fresh
+    
     def get_context_response(self, user_input):
         """
         إيجاد رد مناسب حسب السياق
@@ -82,9 +113,15 @@ class EnhancedNano(RiyadhDialectGenerative):
         if context_response:
             return context_response
         
-        # إذا لم نجد، نستخدم الطريقة التقليدية
-        start_word = user_input.strip().split()[0] if user_input.strip() else None
-        response = self.generate_sentence(start_word=start_word)
+        # إذا لم نجد، نولّد حول أندر كلمة معروفة في الرسالة (وليس أول كلمة فقط)
+        anchor = self.find_anchor(user_input)
+        # المخزن يفحص الرد مقابل رسالة المستخدم نفسها قبل سحبه
+        response = self.reply_pool.get(anchor, user_input) if self.reply_pool else None
+        if response is None:
+            if anchor is None:
+                response = self.generate_sentence()
+            else:
+                response = self.generate_around(anchor)
         
         # تحسين الرد إذا كان غير منطقي
         if self.is_response_logical(response, user_input):
@@ -0,0 +1,78 @@
+# expansion_pipeline.py - خط توسيع متدفق: توليد -> حذف المكرر -> تصفية -> كتابة بدفعات
+import time
+from itertools import compress, islice
+from typing import Callable, Iterable, Iterator, List
+
+from corpus_store import sentence_hash, split_entry, DEFAULT_WEIGHT
+
+BATCH_SIZE = 1000
+
+
+def weighted(sentences: Iterable[str], weight: int) -> Iterator[tuple]:
+    """أزواج (جملة، وزن) لتعزيز فئة كاملة: الجملة تُحفظ مرة واحدة وتُحتسب weight مرة في التدريب"""
+    for sentence in sentences:
+        yield sentence, weight
+
+
+def unique(sentences: Iterable, known=None) -> Iterator[tuple]:
+    """
+    أزواج (جملة، وزن) بعد حذف المسافات من طرفي الجملة، بدون الفارغة والمكررة
+    (العناصر نصوص أو أزواج (نص، وزن)، وأول ظهور للجملة يحدد وزنها).
+    التكرار يُفحص ببصمة الجملة (رقم بدل النص)، وknown (مثل فهرس CorpusStore)
+    يستبعد الجمل الموجودة في قاعدة الجمل قبل فحص جودتها.
+    """
+    seen = set()
+    for entry in sentences:
+        if isinstance(entry, str):
+            sentence, weight = entry, DEFAULT_WEIGHT
+        elif isinstance(entry, (tuple, list, dict)):
+            sentence, weight = split_entry(entry)
+        else:
+            continue
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        h = sentence_hash(sentence)
+        if h in seen or (known is not None and h in known):
+            continue
+        seen.add(h)
+        yield sentence, weight
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """دفعات من size عنصر تُسحب من items عند الحاجة"""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_into_corpus(corpus, sentences: Iterable, mask: Callable[[List[str]], list],
+                       batch_size: int = BATCH_SIZE, source=None, known=None) -> dict:
+    """
+    يسحب الجمل (نصوص أو أزواج (نص، وزن)) من sentences دفعة دفعة: حذف المكرر
+    أولاً (فلا تُفحص الجملة الواحدة مرتين)، ثم mask لنصوص الدفعة، ثم
+    corpus.add_new للمقبول منها مع أوزانه.
+    في الذاكرة دفعة واحدة فقط مع بصمات الجمل التي مرت، وأول دفعة تُكتب
+    قبل توليد الباقي.
+    """
+    stats = {"unique": 0, "kept": 0, "added": 0, "batches": 0,
+             "first_commit_seconds": None, "seconds": 0.0}
+    start = time.perf_counter()
+    total = None
+    for batch in batched(unique(sentences, known), batch_size):
+        kept = list(compress(batch, mask([sentence for sentence, _ in batch])))
+        stats["unique"] += len(batch)
+        stats["kept"] += len(kept)
+        if not kept:
+            continue
+        added, total = corpus.add_new(kept, source=source)
+        stats["added"] += added
+        stats["batches"] += 1
+        if stats["first_commit_seconds"] is None:
+            stats["first_commit_seconds"] = time.perf_counter() - start
+    stats["seconds"] = time.perf_counter() - start
+    stats["total"] = total if total is not None else corpus.count()
+    return stats
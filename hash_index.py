@@ -0,0 +1,127 @@
+# hash_index.py - فهرس دائم لبصمات الجمل (مصفوفة مرتبة + Bloom filter) لفحص التكرار
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+INDEX_MAGIC = b"NANOIDX\0"
+INDEX_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIIQ")  # magic, version, bloom_hashes, bloom_bytes, count
+
+_MASK32 = 0xFFFFFFFF
+
+
+class BloomFilter:
+    """
+    مصفوفة بتات بـ k مواضع لكل بصمة (double hashing من نصفي البصمة 64-بت).
+    "غير موجود" مؤكد دائماً، و"ربما موجود" خاطئ بنسبة ~1% عند 10 بتات لكل عنصر.
+    """
+
+    def __init__(self, capacity, bits_per_item=10, hashes=7, bits=None):
+        if bits is None:
+            size = max(1 << 16, capacity * bits_per_item)
+            bits = bytearray((size + 7) // 8)
+        self.bits = bits
+        self.size = len(bits) * 8
+        self.hashes = hashes
+
+    def _positions(self, h):
+        h1, h2 = h & _MASK32, (h >> 32) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, h):
+        bits = self.bits
+        for pos in self._positions(h):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, h):
+        bits = self.bits
+        for pos in self._positions(h):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class HashIndex:
+    """
+    مجموعة بصمات 64-بت على القرص: مصفوفة مرتبة (بحث ثنائي) أمامها Bloom filter،
+    والبصمات المضافة بعد آخر بناء في مجموعة صغيرة (pending) حتى الدمج التالي.
+    الفحص: Bloom أولاً (معظم الجمل الجديدة تُرفض هنا بدون بحث)، ثم pending
+    ثم المصفوفة.
+    """
+
+    def __init__(self, hashes=None, bloom=None):
+        self.hashes = hashes if hashes is not None else array('Q')
+        if bloom is None:
+            # ضعف العدد الحالي: مساحة للبصمات المضافة قبل إعادة البناء التالية
+            bloom = BloomFilter(2 * len(self.hashes))
+            for h in self.hashes:
+                bloom.add(h)
+        self.bloom = bloom
+        self.pending = set()
+
+    @classmethod
+    def build(cls, hashes):
+        """بناء فهرس من بصمات بأي ترتيب (مع حذف المكرر)"""
+        return cls(array('Q', sorted(set(hashes))))
+
+    def __contains__(self, h):
+        if h not in self.bloom:
+            return False
+        if h in self.pending:
+            return True
+        hashes = self.hashes
+        i = bisect_left(hashes, h)
+        return i < len(hashes) and hashes[i] == h
+
+    def add(self, h):
+        if h not in self:
+            self.pending.add(h)
+            self.bloom.add(h)
+
+    def __len__(self):
+        return len(self.hashes) + len(self.pending)
+
+    def save(self, path):
+        """كتابة الفهرس (المصفوفة المرتبة فقط، بدون pending) بشكل ذري"""
+        bloom = self.bloom
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, INDEX_FORMAT_VERSION, bloom.hashes,
+                                 len(bloom.bits), len(self.hashes)))
+            f.write(bloom.bits)
+            f.write(bytes(-len(bloom.bits) % 8))
+            self.hashes.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            magic, version, bloom_hashes, bloom_bytes, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != INDEX_MAGIC or version != INDEX_FORMAT_VERSION:
+                raise ValueError(f"ملف فهرس غير معروف: {path}")
+            bits = bytearray(f.read(bloom_bytes))
+            f.read(-bloom_bytes % 8)
+            hashes = array('Q')
+            hashes.fromfile(f, count)
+        return cls(hashes, BloomFilter(count, hashes=bloom_hashes, bits=bits))
+
+
+def write_hashes(path, hashes):
+    """بصمات جزء من قاعدة الجمل (بدون ترتيب) في ملف ثنائي صغير"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        array('Q', hashes).tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_hashes(path):
+    hashes = array('Q')
+    with open(path, 'rb') as f:
+        hashes.frombytes(f.read())
+    return hashes
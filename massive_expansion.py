@@ -1,9 +1,13 @@
 # massive_expansion.py - نظام التوسيع الضخم لنانو
 import json
-import random
 import itertools
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Iterator
 from continuous_learning import ContinuousLearningSystem
+from template_engine import variation_templates
+from expansion_pipeline import weighted
+
+# أعلى وزن لجمل فئة إضافية: الفئات قليلة الجمل، ووزن أكبر يجعل التوليد يدور حولها
+MAX_CATEGORY_WEIGHT = 4
 
 class MassiveCorpusExpansion(ContinuousLearningSystem):
     """نظام التوسيع الضخم للوصول إلى 15000+ جملة"""
@@ -33,44 +37,26 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "religious_spiritual": 1000, # الديني والروحاني
         }
     
-    def generate_dynamic_variations(self, base_sentences: List[str], target_count: int) -> List[str]:
-        """توليد تنويعات ديناميكية من الجمل الأساسية"""
-        variations = []
-        
+    def generate_dynamic_variations(self, base_sentences: List[str], target_count: int,
+                                    seed=None) -> Iterator[str]:
+        """توليد تنويعات ديناميكية مختلفة من الجمل الأساسية (نفس seed = نفس التنويعات)"""
         # قوائم الكلمات للاستبدال
         time_words = ["اليوم", "امبارح", "بكرة", "الصبح", "المسا", "الليل", "الفجر", "العصر"]
         emotion_words = ["مبسوط", "فرحان", "سعيد", "مرتاح", "هادي", "مطمئن", "راضي", "منشرح"]
-        family_words = ["أمي", "أبوي", "أختي", "أخوي", "جدي", "جدتي", "العائلة", "الأهل"]
-        activity_words = ["قريت", "كتبت", "شاهدت", "استمعت", "تعلمت", "مارست", "زرت", "اتصلت"]
         
-        # توليد تنويعات
-        for base in base_sentences:
-            for i in range(target_count // len(base_sentences) + 1):
-                varied = base
-                
-                # استبدال عشوائي للكلمات
-                if "اليوم" in varied:
-                    varied = varied.replace("اليوم", random.choice(time_words))
-                if "فرحان" in varied or "مبسوط" in varied:
-                    varied = varied.replace("فرحان", random.choice(emotion_words))
-                    varied = varied.replace("مبسوط", random.choice(emotion_words))
-                
-                # إضافة تنويعات في البداية والنهاية
-                prefixes = ["", "الحمدلله ", "والله ", "أحمد الله ", "بصراحة ", "صدقني "]
-                suffixes = ["", " والحمدلله", " إن شاء الله", " بإذن الله", " ربي يكرمك", " الله يعطيك العافية"]
-                
-                varied = random.choice(prefixes) + varied + random.choice(suffixes)
-                variations.append(varied)
-                
-                if len(variations) >= target_count:
-                    break
-            
-            if len(variations) >= target_count:
-                break
-        
-        return list(set(variations))[:target_count]
+        # تنويعات في البداية والنهاية
+        prefixes = ["", "الحمدلله ", "والله ", "أحمد الله ", "بصراحة ", "صدقني "]
+        suffixes = ["", " والحمدلله", " إن شاء الله", " بإذن الله", " ربي يكرمك", " الله يعطيك العافية"]
+        
+        # كل جملة قالب (بادئة × كلمات الاستبدال × لاحقة) وتُسحب تركيبات مختلفة مباشرة
+        templates = variation_templates(base_sentences, [
+            ("اليوم", time_words),
+            ("فرحان", emotion_words),
+            ("مبسوط", emotion_words),
+        ], prefixes, suffixes)
+        return templates.sample(target_count, seed)
     
-    def generate_daily_life_expansion(self) -> List[str]:
+    def generate_daily_life_expansion(self) -> Iterator[str]:
         """توليد جمل الحياة اليومية المتنوعة"""
         base_sentences = [
             "قمت من النوم على صوت الأذان",
@@ -107,7 +93,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
         
         return self.generate_dynamic_variations(base_sentences, 450)
     
-    def generate_emotions_advanced_expansion(self) -> List[str]:
+    def generate_emotions_advanced_expansion(self) -> Iterator[str]:
         """توليد المشاعر المتقدمة والمعقدة"""
         base_emotions = [
             "فرحان وحزين في نفس الوقت",
@@ -143,7 +129,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
         ]
         return self.generate_dynamic_variations(base_emotions, 330)
     
-    def generate_social_interactions_expansion(self) -> List[str]:
+    def generate_social_interactions_expansion(self) -> Iterator[str]:
         """توليد التفاعلات الاجتماعية المتقدمة"""
         base_social = [
             "جلست مع صديقي نتكلم عن أحلامنا",
@@ -179,8 +165,8 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
         ]
         return self.generate_dynamic_variations(base_social, 500)
     
-    def generate_cultural_expressions_expansion(self) -> List[str]:
-        """توليد التعبيرات الثقافية السعودية الأصيلة"""
+    def generate_cultural_expressions_expansion(self) -> Iterator[tuple]:
+        """توليد التعبيرات الثقافية السعودية الأصيلة (أزواج جملة ووزن)"""
         base_cultural = [
             "بيتنا بيتك وكل اللي عندنا لك",
             "اهلاً وسهلاً بك يا أهل وفين",
@@ -248,16 +234,13 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "العقل زينة والأدب تاج على الرأس",
         ]
         
-        sentences.extend(hospitality_expressions * 15)
-        sentences.extend(religious_expressions * 12)
-        sentences.extend(proverbs_wisdom * 10)
-        
-        return sentences[:1500]
+        # الوزن يرفع تكرار الفئة في التدريب بدل تكرار جملها في قاعدة الجمل
+        yield from weighted(base_cultural, 15)
+        yield from weighted(religious_expressions, 12)
+        yield from weighted(proverbs_wisdom, 10)
     
-    def generate_work_education_expansion(self) -> List[str]:
-        """توليد جمل العمل والتعليم"""
-        sentences = []
-        
+    def generate_work_education_expansion(self) -> Iterator[tuple]:
+        """توليد جمل العمل والتعليم (أزواج جملة ووزن)"""
         # بيئة العمل
         work_environment = [
             "بديت يوم العمل بنشاط وحماس للإنجاز",
@@ -300,68 +283,40 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "وصلت لمنصب مسؤولية يحتاج ثقة كبيرة",
         ]
         
-        sentences.extend(work_environment * 12)
-        sentences.extend(education_learning * 10)
-        sentences.extend(success_achievement * 8)
-        
-        return sentences[:1200]
+        yield from weighted(work_environment, 12)
+        yield from weighted(education_learning, 10)
+        yield from weighted(success_achievement, 8)
     
     def run_massive_expansion(self) -> Dict[str, int]:
         """تشغيل التوسيع الضخم للنظام"""
         self._print("🚀 بدء التوسيع الضخم لنانو إلى 15000+ جملة")
         self._print("=" * 60)
         
-        # تحميل الحالة الحالية
-        try:
-            with open(self.corpus_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                current_sentences = set(data.get("sentences", []))
-        except:
-            current_sentences = set()
-        
-        initial_count = len(current_sentences)
-        self._print(f"📊 الجمل الحالية: {initial_count}")
-        
-        # توليد جمل جديدة بكميات ضخمة
-        all_new_sentences = []
-        
         categories_methods = {
             "daily_life": self.generate_daily_life_expansion,
             "emotions_advanced": self.generate_emotions_advanced_expansion,
             "social_interactions": self.generate_social_interactions_expansion,
             "cultural_expressions": self.generate_cultural_expressions_expansion,
             "work_education": self.generate_work_education_expansion,
+            "additional": self.generate_additional_categories,
         }
         
-        for category, method in categories_methods.items():
-            self._print(f"📝 توليد جمل {category}...")
-            category_sentences = method()
-            all_new_sentences.extend(category_sentences)
-            self._print(f"   ✅ تم توليد {len(category_sentences)} جملة")
-        
-        # إضافة المزيد من الفئات
-        additional_categories = self.generate_additional_categories()
-        all_new_sentences.extend(additional_categories)
-        
-        # تصفية وإضافة الجمل الجديدة
-        self._print("🔍 تصفية ومعالجة الجمل الجديدة...")
-        processed = self.process_and_filter_sentences(all_new_sentences)
-        
-        # إضافة الجمل الفريدة فقط
-        added_count = 0
-        for sentence in processed:
-            if sentence not in current_sentences:
-                current_sentences.add(sentence)
-                added_count += 1
-        
-        # حفظ النتائج
-        final_sentences = list(current_sentences)
-        updated_data = {"sentences": final_sentences}
+        # كل الفئات كمولّد واحد: الجمل تُولّد وتُصفّى وتُكتب دفعة دفعة
+        new_sentences = itertools.chain.from_iterable(
+            self.announce_category(category, method()) for category, method in categories_methods.items()
+        )
         
-        with open(self.corpus_path, 'w', encoding='utf-8') as f:
-            json.dump(updated_data, f, ensure_ascii=False, indent=2)
-        
-        final_count = len(final_sentences)
+        # حذف المكرر ثم التصفية ثم الإلحاق كأجزاء بعد الجمل الحالية
+        # (فيبقى التدريب التراكمي على المسار السريع)
+        self._print("🔍 تصفية ومعالجة الجمل الجديدة أثناء توليدها...")
+        try:
+            stats = self.stream_to_corpus(new_sentences, source="massive_expansion")
+        except json.JSONDecodeError:
+            self._print(f"❌ خطأ في قراءة '{self.corpus_path}'. لم يتم تعديل الملف.")
+            return {"initial_count": 0, "added_count": 0, "final_count": 0, "target_achieved": False}
+        added_count, final_count = stats["added"], stats["total"]
+        initial_count = final_count - added_count
+        self._print(f"📊 الجمل السابقة: {initial_count}")
         
         self._print("🎉 اكتمل التوسيع الضخم!")
         self._print(f"✨ الجمل المضافة: {added_count}")
@@ -375,26 +330,35 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "target_achieved": final_count >= self.target_sentences
         }
     
-    def generate_additional_categories(self) -> List[str]:
-        """توليد فئات إضافية للوصول للهدف"""
-        additional = []
-        
-        # فئات متنوعة إضافية
+    def category_weight(self, category: str) -> int:
+        """
+        وزن جمل فئة حسب نصيبها من أهداف التوسيع: الفئة ذات أكبر هدف تأخذ
+        MAX_CATEGORY_WEIGHT، والباقي بالتناسب (1 على الأقل).
+        """
+        largest = max(self.expansion_categories.values())
+        share = self.expansion_categories.get(category, 0) / largest
+        return max(1, round(MAX_CATEGORY_WEIGHT * share))
+    
+    def generate_additional_categories(self) -> Iterator[tuple]:
+        """
+        توليد فئات إضافية للوصول للهدف (أزواج جملة ووزن).
+        الجملة الموجودة مسبقاً في قاعدة الجمل تبقى بوزنها الأول (add_new لا
+        يعدّل الأوزان)، فالوزن يخص الجمل الجديدة فقط.
+        """
+        # فئات متنوعة إضافية (كل فئة تُستدعى عند الوصول إليها) مع اسم هدفها
         categories = [
-            self.generate_family_relationships(),
-            self.generate_food_cooking(),
-            self.generate_travel_places(), 
-            self.generate_health_fitness(),
-            self.generate_technology_modern(),
-            self.generate_entertainment_hobbies(),
-            self.generate_philosophical_deep(),
-            self.generate_religious_spiritual(),
+            (self.generate_family_relationships, "family_relationships"),
+            (self.generate_food_cooking, "food_cooking"),
+            (self.generate_travel_places, "travel_places"),
+            (self.generate_health_fitness, "health_fitness"),
+            (self.generate_technology_modern, "technology_modern"),
+            (self.generate_entertainment_hobbies, "entertainment_hobbies"),
+            (self.generate_philosophical_deep, "philosophy_wisdom"),
+            (self.generate_religious_spiritual, "religious_spiritual"),
         ]
         
-        for category in categories:
-            additional.extend(category)
-        
-        return additional
+        for category, name in categories:
+            yield from weighted(category(), self.category_weight(name))
     
     def generate_family_relationships(self) -> List[str]:
         """جمل العلاقات العائلية"""
@@ -405,7 +369,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "أخوي سندي في الدنيا ولا أقدر أعيش بدونه",
             "جدي مدرسة في الحكمة وكل كلامه موزون",
             "جدتي حنانها يداوي كل جروح القلب والروح",
-        ] * 250  # 1500 جملة
+        ]
     
     def generate_food_cooking(self) -> List[str]:
         """جمل الطعام والطبخ"""
@@ -414,7 +378,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "شربت الشاي مع التمر والحليب في العصر",
             "أكلت فطور سعودي تقليدي مع أهلي",
             "حضرت عزيمة وطبخت أكلات شعبية متنوعة",
-        ] * 200  # 800 جملة
+        ]
         
     def generate_travel_places(self) -> List[str]:
         """جمل السفر والأماكن"""
@@ -423,7 +387,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "زرت المدينة المنورة ومشيت في طرق الرسول",
             "رحت العقير وشفت جمال الساحل السعودي",
             "زرت الطائف واستمتعت بالورد والجو البارد",
-        ] * 175  # 700 جملة
+        ]
     
     def generate_health_fitness(self) -> List[str]:
         """جمل الصحة واللياقة"""
@@ -432,7 +396,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "اهتممت بصحتي وأكلت أكل صحي متوازن",
             "شربت موية كثير عشان صحة الجسم",
             "نمت بدري عشان أقوم نشيط ومرتاح",
-        ] * 200  # 800 جملة
+        ]
         
     def generate_technology_modern(self) -> List[str]:
         """جمل التقنية والعصر الحديث"""
@@ -441,7 +405,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "تعلمت مهارة تقنية جديدة بتفيدني",
             "شاركت صورة حلوة على الإنستقرام",
             "اتصلت بأهلي عبر الفيديو كول",
-        ] * 175  # 700 جملة
+        ]
     
     def generate_entertainment_hobbies(self) -> List[str]:
         """جمل الترفيه والهوايات"""
@@ -450,7 +414,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "شاهدت فيلم ممتع مع العائلة",
             "لعبت كرة قدم مع الأصدقاء في الحي",
             "رسمت لوحة جميلة عبرت فيها عن مشاعري",
-        ] * 200  # 800 جملة
+        ]
     
     def generate_philosophical_deep(self) -> List[str]:
         """جمل فلسفية وعميقة"""
@@ -459,7 +423,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "الصبر مفتاح الفرج والله ما يضيع أجر الصابرين",
             "النجاح مو بس وصول للهدف بل رحلة تعلم",
             "المحبة أساس كل علاقة ناجحة في الحياة",
-        ] * 150  # 600 جملة
+        ]
     
     def generate_religious_spiritual(self) -> List[str]:
         """جمل دينية وروحانية"""
@@ -469,7 +433,7 @@ class MassiveCorpusExpansion(ContinuousLearningSystem):
             "دعيت ربي من كل قلبي وأنا واثق بالإجابة",
             "تأملت في خلق الله وشفت عظمته في كل شي",
             "استغفرت الله كثير وحسيت بالراحة النفسية",
-        ] * 200  # 1000 جملة
+        ]
 
 if __name__ == "__main__":
     print("🚀 نظام التوسيع الضخم لنانو")
@@ -1,9 +1,9 @@
 # massive_expansion_improved.py - نظام التوسيع الضخم المحسن لنانو
 import json
-import random
 import itertools
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Iterator
 from continuous_learning import ContinuousLearningSystem
+from template_engine import variation_templates
 
 class ImprovedMassiveExpansion(ContinuousLearningSystem):
     """نظام التوسيع الضخم المحسن للوصول إلى 15000+ جملة فريدة"""
@@ -12,10 +12,9 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
         super().__init__(verbose=verbose)
         self.target_sentences = target_sentences
         
-    def generate_smart_variations(self, base_sentences: List[str], target_count: int) -> List[str]:
-        """توليد تنويعات ذكية ومتطورة من الجمل الأساسية"""
-        variations = set()  # استخدام set لضمان عدم التكرار
-        
+    def generate_smart_variations(self, base_sentences: List[str], target_count: int,
+                                  seed=None) -> Iterator[str]:
+        """توليد تنويعات ذكية مختلفة من الجمل الأساسية (نفس seed = نفس التنويعات)"""
         # مكونات التنويع الذكي
         time_variations = ["اليوم", "امبارح", "بكرة", "الصبح", "المسا", "العصر", "الفجر", "المغرب", "الضحى", "العشر", "الليل"]
         emotion_variations = ["مبسوط", "فرحان", "سعيد", "مرتاح", "هادي", "مطمئن", "راضي", "منشرح", "مبهور", "معجب", "متحمس"]
@@ -35,54 +34,20 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
             " تسلم إيدك", " بارك الله فيك", " كثر خيرك", " زادك الله نور"
         ]
         
-        # توليد التنويعات المتقدمة
-        for base in base_sentences:
-            # تنويعات مباشرة أولى
-            for _ in range(target_count // len(base_sentences) + 5):
-                varied = base
-                
-                # استبدالات ذكية متعددة المستويات
-                for old_word, replacements in [
-                    ("اليوم", time_variations),
-                    ("فرحان", emotion_variations), 
-                    ("مبسوط", emotion_variations),
-                    ("أمي", family_variations),
-                    ("البيت", place_variations)
-                ]:
-                    if old_word in varied:
-                        varied = varied.replace(old_word, random.choice(replacements))
-                
-                # إضافة تنويعات في المقدمة والخاتمة
-                prefix = random.choice(prefixes)
-                suffix = random.choice(suffixes)
-                final_variation = prefix + varied + suffix
-                
-                variations.add(final_variation.strip())
-                
-                # تنويعات إضافية بتغييرات هيكلية
-                if len(variations) < target_count:
-                    # تنويع في الصيغة
-                    if "قمت" in varied:
-                        structural_var = varied.replace("قمت", random.choice(["صحيت", "فقت", "قعدت من النوم"]))
-                        variations.add(prefix + structural_var + suffix)
-                    
-                    if "سويت" in varied:
-                        structural_var = varied.replace("سويت", random.choice(["عملت", "قمت بـ", "أنجزت"]))
-                        variations.add(prefix + structural_var + suffix)
-                    
-                    if "حسيت" in varied:
-                        structural_var = varied.replace("حسيت", random.choice(["شعرت", "أحسست", "لقيت نفسي"]))
-                        variations.add(prefix + structural_var + suffix)
-                
-                if len(variations) >= target_count:
-                    break
-            
-            if len(variations) >= target_count:
-                break
-        
-        return list(variations)[:target_count]
+        # استبدالات الكلمات وتنويعات الصيغة (الفعل الأصلي أحد البدائل)
+        templates = variation_templates(base_sentences, [
+            ("اليوم", time_variations),
+            ("فرحان", emotion_variations),
+            ("مبسوط", emotion_variations),
+            ("أمي", family_variations),
+            ("البيت", place_variations),
+            ("قمت", ["قمت", "صحيت", "فقت", "قعدت من النوم"]),
+            ("سويت", ["سويت", "عملت", "قمت بـ", "أنجزت"]),
+            ("حسيت", ["حسيت", "شعرت", "أحسست", "لقيت نفسي"]),
+        ], prefixes, suffixes)
+        return templates.sample(target_count, seed)
     
-    def generate_daily_life_massive(self) -> List[str]:
+    def generate_daily_life_massive(self) -> Iterator[str]:
         """توليد جمل الحياة اليومية الضخمة"""
         base_daily = [
             "قمت من النوم على صوت الأذان", "شربت قهوتي العربية وأنا أشوف الطيور",
@@ -101,7 +66,7 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
         ]
         return self.generate_smart_variations(base_daily, 2500)
     
-    def generate_emotions_massive(self) -> List[str]:
+    def generate_emotions_massive(self) -> Iterator[str]:
         """توليد المشاعر المتقدمة الضخمة"""
         base_emotions = [
             "فرحان وحزين في نفس الوقت", "خايف ومتحمس للتحدي الجديد", "مشتاق لأهلي وراضي عن قراري",
@@ -118,7 +83,7 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
         ]
         return self.generate_smart_variations(base_emotions, 2000)
     
-    def generate_social_massive(self) -> List[str]:
+    def generate_social_massive(self) -> Iterator[str]:
         """توليد التفاعلات الاجتماعية الضخمة"""
         base_social = [
             "جلست مع صديقي نتكلم عن أحلامنا", "ناقشت مع أبوي موضوع مهم", "تبادلت الآراء مع زملائي",
@@ -134,7 +99,7 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
         ]
         return self.generate_smart_variations(base_social, 2500)
     
-    def generate_cultural_massive(self) -> List[str]:
+    def generate_cultural_massive(self) -> Iterator[str]:
         """توليد التعبيرات الثقافية الضخمة"""
         base_cultural = [
             "بيتنا بيتك وكل اللي عندنا لك", "أهلاً وسهلاً بك يا أهل وفين", "على الرحب والسعة يا غالي",
@@ -151,7 +116,7 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
         ]
         return self.generate_smart_variations(base_cultural, 2000)
     
-    def generate_work_education_massive(self) -> List[str]:
+    def generate_work_education_massive(self) -> Iterator[str]:
         """توليد جمل العمل والتعليم الضخمة"""
         base_work = [
             "حضرت اجتماع مهم في الشركة", "أنجزت مشروعي في الجامعة", "تعلمت مهارة جديدة", "درست لامتحان مهم",
@@ -165,7 +130,7 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
         ]
         return self.generate_smart_variations(base_work, 1500)
     
-    def generate_family_massive(self) -> List[str]:
+    def generate_family_massive(self) -> Iterator[str]:
         """توليد جمل العلاقات العائلية الضخمة"""
         base_family = [
             "أمي أحن إنسانة في الدنيا", "أبوي قدوتي في الحياة", "أختي رفيقة دربي", "أخوي سندي في الدنيا",
@@ -179,7 +144,7 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
         ]
         return self.generate_smart_variations(base_family, 2000)
     
-    def generate_additional_categories(self) -> List[str]:
+    def generate_additional_categories(self) -> Iterator[str]:
         """توليد فئات إضافية متنوعة"""
         # الطعام والطبخ
         food_base = [
@@ -218,75 +183,44 @@ class ImprovedMassiveExpansion(ContinuousLearningSystem):
             "صليت قيام الليل وناجيت ربي", "قريت في كتب التفسير", "سمعت خطبة مؤثرة في الجمعة"
         ]
         
-        additional = []
-        additional.extend(self.generate_smart_variations(food_base, 800))
-        additional.extend(self.generate_smart_variations(travel_base, 700))
-        additional.extend(self.generate_smart_variations(health_base, 800))
-        additional.extend(self.generate_smart_variations(tech_base, 700))
-        additional.extend(self.generate_smart_variations(entertainment_base, 800))
-        additional.extend(self.generate_smart_variations(religious_base, 1200))
-        
-        return additional
+        yield from self.generate_smart_variations(food_base, 800)
+        yield from self.generate_smart_variations(travel_base, 700)
+        yield from self.generate_smart_variations(health_base, 800)
+        yield from self.generate_smart_variations(tech_base, 700)
+        yield from self.generate_smart_variations(entertainment_base, 800)
+        yield from self.generate_smart_variations(religious_base, 1200)
     
     def run_improved_massive_expansion(self) -> Dict[str, int]:
         """تشغيل التوسيع الضخم المحسن"""
         self._print("🚀 بدء التوسيع الضخم المحسن لنانو إلى 15000+ جملة فريدة")
         self._print("=" * 70)
         
-        # تحميل الحالة الحالية
-        try:
-            with open(self.corpus_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                current_sentences = set(data.get("sentences", []))
-        except:
-            current_sentences = set()
-        
-        initial_count = len(current_sentences)
-        self._print(f"📊 الجمل الحالية: {initial_count}")
-        
-        # توليد جمل جديدة متقدمة
-        all_new_sentences = []
-        
         categories = [
             ("الحياة اليومية", self.generate_daily_life_massive),
             ("المشاعر المتقدمة", self.generate_emotions_massive), 
             ("التفاعلات الاجتماعية", self.generate_social_massive),
             ("التعبيرات الثقافية", self.generate_cultural_massive),
             ("العمل والتعليم", self.generate_work_education_massive),
-            ("العلاقات العائلية", self.generate_family_massive)
+            ("العلاقات العائلية", self.generate_family_massive),
+            ("الفئات الإضافية", self.generate_additional_categories),
         ]
         
-        for category_name, method in categories:
-            self._print(f"📝 توليد جمل {category_name}...")
-            category_sentences = method()
-            all_new_sentences.extend(category_sentences)
-            self._print(f"   ✅ تم توليد {len(category_sentences)} جملة")
+        # كل الفئات كمولّد واحد: الجمل تُولّد وتُصفّى وتُكتب دفعة دفعة
+        new_sentences = itertools.chain.from_iterable(
+            self.announce_category(category_name, method()) for category_name, method in categories
+        )
         
-        # إضافة الفئات الإضافية
-        self._print("📝 توليد الفئات الإضافية...")
-        additional_sentences = self.generate_additional_categories()
-        all_new_sentences.extend(additional_sentences)
-        self._print(f"   ✅ تم توليد {len(additional_sentences)} جملة إضافية")
-        
-        # تصفية ومعالجة الجمل
-        self._print("🔍 تصفية ومعالجة الجمل الجديدة...")
-        processed = self.process_and_filter_sentences(all_new_sentences)
-        
-        # إضافة الجمل الفريدة فقط
-        added_count = 0
-        for sentence in processed:
-            if sentence not in current_sentences and len(sentence.strip()) > 5:
-                current_sentences.add(sentence.strip())
-                added_count += 1
-        
-        # حفظ النتائج
-        final_sentences = list(current_sentences)
-        updated_data = {"sentences": final_sentences}
-        
-        with open(self.corpus_path, 'w', encoding='utf-8') as f:
-            json.dump(updated_data, f, ensure_ascii=False, indent=2)
-        
-        final_count = len(final_sentences)
+        # حذف المكرر ثم التصفية ثم الإلحاق كأجزاء جديدة في قاعدة الجمل
+        self._print("🔍 تصفية ومعالجة الجمل الجديدة أثناء توليدها...")
+        try:
+            stats = self.stream_to_corpus(new_sentences, source="massive_expansion_improved")
+        except json.JSONDecodeError:
+            self._print(f"❌ خطأ في قراءة '{self.corpus_path}'. لم يتم تعديل الملف.")
+            return {"initial_count": 0, "added_count": 0, "final_count": 0, "target_achieved": False,
+                    "growth_percentage": 0.0}
+        added_count, final_count = stats["added"], stats["total"]
+        initial_count = final_count - added_count
+        self._print(f"📊 الجمل السابقة: {initial_count}")
         
         self._print("🎉 اكتمل التوسيع الضخم المحسن!")
         self._print(f"✨ الجمل المضافة الجديدة: {added_count}")
@@ -0,0 +1,262 @@
+# model_evaluation.py - قياس جودة نموذج اللهجة على جمل محجوزة (held-out)
+import json
+import math
+import os
+import time
+from datetime import datetime
+from itertools import islice, repeat
+
+from corpus_store import is_heldout, iter_weighted
+from riyadh_dialect_generative_module import (
+    RiyadhDialectGenerative, ID_BITS, UNKNOWN_ID,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HISTORY_PATH = "model_eval_history.jsonl"
+# درجة الكلمات غير المعروفة (حتى لا تصبح الحيرة لا نهائية)
+SCORE_FLOOR = 1e-6
+# نسبة الجمل المحجوزة للتقييم (is_heldout) في التدريب اليومي
+HELDOUT_PERCENT = 5
+# عدد الجمل المحجوزة التي تُرمَّز وتُقيَّم معاً
+EVAL_BATCH = 20000
+
+
+def encode_sentences(model, sentences):
+    """
+    ترميز الجمل كأرقام في مصفوفة واحدة: _START_ كلمات _END_ لكل جملة.
+    يرجع (الأرقام، موضع كل رقم داخل جملته).
+    """
+    # نص واحد تفصل جمله رموز البداية والنهاية، فيُقسَّم ويُرمَّز دفعة واحدة
+    # (split واحد، والبحث في القاموس عبر map بدل حلقة بايثون لكل كلمة)
+    start, end = model._start_token, model._end_token
+    words = f"{start} {f' {end} {start} '.join(sentences)} {end}".split()
+    ids = np.fromiter(map(model.word_ids.get, words, repeat(UNKNOWN_ID, len(words))),
+                      dtype=np.uint64, count=len(words))
+
+    starts = np.flatnonzero(ids == np.uint64(model._start_id))
+    lengths = np.diff(np.append(starts, len(ids)))
+    positions = np.arange(len(ids), dtype=np.int64) - np.repeat(starts, lengths)
+    return ids, positions
+
+
+def _prepare_tables(model):
+    """مصفوفات NumPy لكل جدول: مفاتيح الصفوف، حدودها، مفاتيح الانتقالات (صف + كلمة) ومجاميع تراكمية"""
+    prepared = []
+    for table in model._tables:
+        offsets = np.asarray(memoryview(table.offsets)).astype(np.int64)
+        successors = np.asarray(memoryview(table.successors)).astype(np.uint64)
+        counts = np.asarray(memoryview(table.counts)).astype(np.float64)
+        keys = None if table.keys is None else np.asarray(memoryview(table.keys))
+        rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.uint64), np.diff(offsets))
+        # الصفوف تصاعدية والكلمات التالية مرتبة داخل كل صف، فالمفاتيح مرتبة
+        edge_keys = (rows << np.uint64(ID_BITS)) | successors
+        cumulative = np.concatenate(([0.0], np.cumsum(counts)))
+        prepared.append((keys, offsets, edge_keys, counts, cumulative))
+    return prepared
+
+
+def _lookup(sorted_keys, queries):
+    """موضع كل استعلام في مصفوفة مرتبة، وهل وُجد"""
+    index = np.searchsorted(sorted_keys, queries)
+    found = index < len(sorted_keys)
+    found[found] = sorted_keys[index[found]] == queries[found]
+    return np.minimum(index, max(len(sorted_keys) - 1, 0)), found
+
+
+def score_tokens(model, ids, positions, tables=None):
+    """
+    درجات stupid backoff لكل كلمة بعد _START_ (نفس نتيجة model._score_ids)
+    محسوبة دفعة واحدة لكل طول سياق بدل حلقة على الكلمات.
+    tables: ناتج _prepare_tables محسوب مسبقاً (لتقييم عدة دفعات بنفس النموذج).
+    """
+    if tables is None:
+        tables = _prepare_tables(model)
+    targets = np.nonzero(positions > 0)[0]
+    next_ids = ids[targets]
+    target_pos = positions[targets]
+
+    scores = np.zeros(len(targets))
+    penalty = np.ones(len(targets))
+    done = next_ids == np.uint64(UNKNOWN_ID)
+    shift = np.uint64(ID_BITS)
+
+    for n in range(len(tables), 0, -1):
+        eligible = ~done & (target_pos >= n)
+        if not eligible.any():
+            continue
+        idx = targets[eligible]
+        context = np.zeros(len(idx), dtype=np.uint64)
+        for j in range(1, n + 1):
+            context |= ids[idx - j] << np.uint64(ID_BITS * (j - 1))
+
+        keys, offsets, edge_keys, counts, cumulative = tables[n - 1]
+        if keys is None:
+            valid = context < np.uint64(len(offsets) - 1)
+            rows = np.where(valid, context, np.uint64(0)).astype(np.int64)
+        else:
+            rows, valid = _lookup(keys, context)
+        starts, ends = offsets[rows], offsets[rows + 1]
+        valid &= starts < ends
+
+        edge, found = _lookup(edge_keys, (rows.astype(np.uint64) << shift) | next_ids[eligible])
+        hit = valid & found
+        totals = cumulative[ends] - cumulative[starts]
+
+        positions_hit = np.nonzero(eligible)[0][hit]
+        scores[positions_hit] = penalty[positions_hit] * counts[edge[hit]] / totals[hit]
+        done[positions_hit] = True
+        penalty[np.nonzero(eligible)[0][~hit]] *= model.backoff_alpha
+
+    # آخر تراجع: تكرار الكلمة في كامل النموذج
+    remaining = ~done
+    if remaining.any():
+        unigrams = np.asarray(model._unigrams(), dtype=np.float64)
+        total = unigrams.sum()
+        if total:
+            scores[remaining] = penalty[remaining] * unigrams[next_ids[remaining].astype(np.int64)] / total
+    return scores
+
+
+def log_likelihood(model, sentences, weights=None, tables=None):
+    """
+    (مجموع log للدرجات، عدد الكلمات) على الجمل، مع _END_ لكل جملة.
+    weights: وزن كل جملة؛ الجملة بوزن n تُحتسب n مرة كما في التدريب.
+    """
+    if not sentences:
+        return 0.0, 0
+    if weights is None:
+        weights = [1] * len(sentences)
+    if np is None:
+        # بدون NumPy: نفس الحساب كلمة كلمة
+        total_log, tokens = 0.0, 0
+        for line, weight in zip(sentences, weights):
+            count = len(line.split()) + 1
+            total_log -= math.log(model.perplexity([line], floor=SCORE_FLOOR)) * count * weight
+            tokens += count * weight
+        return total_log, tokens
+
+    ids, positions = encode_sentences(model, sentences)
+    scores = score_tokens(model, ids, positions, tables)
+    # وزن كل كلمة هو وزن جملتها (رقم الجملة = عدد رموز _START_ قبلها)
+    sentence_index = np.cumsum(positions == 0)[positions > 0] - 1
+    token_weights = np.asarray(weights, dtype=np.float64)[sentence_index]
+    total_log = np.log(np.maximum(scores, SCORE_FLOOR)) @ token_weights
+    return float(total_log), int(token_weights.sum())
+
+
+def evaluate(corpus_path="corpus.json", order=3, heldout_percent=HELDOUT_PERCENT, model=None,
+             batch_size=EVAL_BATCH):
+    """
+    قياس الحيرة على الجمل المحجوزة (is_heldout) بقراءة متدفقة للملف، دفعة
+    دفعة، مع أوزان الجمل.
+
+    model: النموذج المرشح للترقية، مدرَّب بدون الجمل المحجوزة (نسبته
+    heldout_percent المحفوظة معه تحدد الجمل المحجوزة). بدونه يُدرَّب نموذج
+    جديد على بقية الجمل، وتكلفته بحجم الملف (للتقييم اليدوي).
+    """
+    if model is None:
+        model = RiyadhDialectGenerative(order=order, heldout_percent=heldout_percent)
+        model.fit(entry for entry in iter_weighted(corpus_path)
+                  if not is_heldout(entry[0], heldout_percent))
+    elif model.heldout_percent:
+        heldout_percent = model.heldout_percent
+    else:
+        print("WARNING: النموذج تدرب على كل الجمل، فالحيرة على الجمل المحجوزة أقل من الحقيقية.")
+
+    counts = {"train": 0, "heldout": 0}
+    def heldout_entries():
+        for text, weight in iter_weighted(corpus_path):
+            if is_heldout(text, heldout_percent):
+                counts["heldout"] += 1
+                yield text, weight
+            else:
+                counts["train"] += 1
+
+    tables = None if np is None else _prepare_tables(model)
+    total_log, tokens, elapsed = 0.0, 0, 0.0
+    entries = heldout_entries()
+    for batch in iter(lambda: list(islice(entries, batch_size)), []):
+        sentences, weights = zip(*batch)
+        start = time.perf_counter()
+        batch_log, batch_tokens = log_likelihood(model, sentences, weights, tables)
+        elapsed += time.perf_counter() - start
+        total_log += batch_log
+        tokens += batch_tokens
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "corpus": corpus_path,
+        "order": model.order,
+        "heldout_percent": heldout_percent,
+        "train_sentences": counts["train"],
+        "heldout_sentences": counts["heldout"],
+        "tokens": tokens,
+        "log_likelihood": total_log,
+        "perplexity": math.exp(-total_log / tokens) if tokens else float("inf"),
+        "sentences_per_sec": counts["heldout"] / elapsed if elapsed else 0.0,
+    }
+
+
+def record(result, history_path=HISTORY_PATH, **extra):
+    """إلحاق نتيجة بسجل التقييم (سطر JSON لكل تشغيل)"""
+    entry = dict(result, **extra)
+    with open(history_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+
+def last_result(history_path=HISTORY_PATH, promoted_only=True):
+    """آخر نتيجة في السجل (آخر نموذج تمت ترقيته افتراضياً)، أو None"""
+    if not os.path.exists(history_path):
+        return None
+    last = None
+    with open(history_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not promoted_only or entry.get("promoted", True):
+                last = entry
+    return last
+
+
+def passes_gate(result, history_path=HISTORY_PATH, max_regression=0.02):
+    """
+    هل يُسمح بترقية النموذج؟ نعم إذا لم ترتفع الحيرة أكثر من max_regression
+    (نسبة) عن آخر نموذج مُرقّى بنفس الرتبة، أو إذا لم يوجد سجل سابق.
+    """
+    previous = last_result(history_path)
+    if previous is None or previous.get("order") != result["order"]:
+        return True
+    return result["perplexity"] <= previous["perplexity"] * (1 + max_regression)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="قياس حيرة نموذج اللهجة على جمل محجوزة")
+    parser.add_argument("--corpus", default="corpus.json")
+    parser.add_argument("--order", type=int, default=3)
+    parser.add_argument("--heldout-percent", type=int, default=HELDOUT_PERCENT)
+    parser.add_argument("--model", default=None,
+                        help="تقييم نموذج محفوظ (بنسبة الجمل المحجوزة المحفوظة معه) "
+                             "بدل تدريب نموذج على قسم التدريب")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--record", action="store_true", help="إلحاق النتيجة بسجل التقييم")
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        model = RiyadhDialectGenerative(args.model)
+        model.load_model()
+    result = evaluate(args.corpus, args.order, args.heldout_percent, model)
+    print(f"الجمل: تدريب {result['train_sentences']} / محجوزة {result['heldout_sentences']}")
+    print(f"log-likelihood: {result['log_likelihood']:.1f} على {result['tokens']} كلمة")
+    print(f"الحيرة: {result['perplexity']:.3f}")
+    print(f"السرعة: {result['sentences_per_sec']:,.0f} جملة/ثانية")
+    print("مقبول للترقية" if passes_gate(result, args.history) else "تراجع عن آخر نموذج مُرقّى")
+    if args.record:
+        record(result, args.history, promoted=False)
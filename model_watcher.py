@@ -0,0 +1,61 @@
+# model_watcher.py - إعادة تحميل النموذج في الخادم بدون إيقاف
+import threading
+
+
+class ModelWatcher:
+    """
+    يراقب ملف النموذج (بصمة الوقت والحجم) ويحمّل النسخة الجديدة في الخلفية
+    عند تغيّره، ثم يبدّل المرجع `model` دفعة واحدة.
+
+    كل طلب يقرأ `watcher.model` مرة واحدة ويكمل عليه، فالطلبات الجارية تنتهي
+    على النموذج القديم والجديدة تبدأ على النموذج الجديد بدون توقف.
+    """
+
+    def __init__(self, model, interval=5.0, on_reload=None):
+        self.model = model
+        self.interval = interval
+        self.on_reload = on_reload
+        self.reloads = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """فحص الملف مرة واحدة، ويرجع True إذا حُمّلت نسخة جديدة"""
+        current = self.model
+        if not current.is_stale():
+            return False
+        try:
+            fresh = current.reloaded()
+        except (OSError, ValueError) as e:
+            # ملف في منتصف الكتابة أو تالف: نبقى على النموذج الحالي ونحاول لاحقاً
+            print(f"WARNING: تعذر إعادة تحميل النموذج ({e}). الاستمرار على النسخة الحالية.")
+            return False
+
+        self.model = fresh
+        self.reloads += 1
+        print(f"INFO: تم تحميل نسخة جديدة من النموذج ({len(fresh.vocab)} كلمة).")
+        if self.on_reload is not None:
+            self.on_reload(fresh, current)
+        return True
+
+    def start(self):
+        """تشغيل المراقبة في خيط خلفي"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"WARNING: فشل فحص ملف النموذج: {e}")
@@ -14,6 +14,7 @@ try:
     from continuous_learning import ContinuousLearningSystem
     from context_memory import AdvancedContextMemory
     from emotional_intelligence import AdvancedEmotionalIntelligence
+    from arabic_tokenizer import Tokens, tokenize
 except ImportError as e:
     print(f"⚠️ خطأ في الاستيراد: {e}")
     print("تأكد من وجود جميع الملفات في نفس المجلد")
@@ -62,13 +63,16 @@ class NanoAdvancedSystem:
         if self.verbose:
             print(f"\n🔄 معالجة الرسالة: {user_message[:50]}...")
         
+        # تقسيم الرسالة مرة واحدة تشترك فيها كل الأنظمة
+        tokens = tokenize(user_message)
+        
         # 1. تحليل الحالة العاطفية
-        emotional_state = self.emotional_system.analyze_emotional_state(user_message)
+        emotional_state = self.emotional_system.analyze_emotional_state(user_message, tokens=tokens)
         if self.verbose:
             print(f"💭 المشاعر المكتشفة: {emotional_state.primary_emotion} (شدة: {emotional_state.intensity:.2f})")
         
         # 2. استرجاع السياق من الذاكرة
-        memory_hints = self.memory_system.generate_contextual_response_hints(user_message)
+        memory_hints = self.memory_system.generate_contextual_response_hints(user_message, tokens)
         if self.verbose:
             print(f"🧠 تم استرجاع السياق من الذاكرة")
         
@@ -79,11 +83,13 @@ class NanoAdvancedSystem:
         
         # 4. دمج الاستجابة مع السياق
         enhanced_response = self.enhance_response_with_context(
-            emotional_response, memory_hints, user_message
+            emotional_response, memory_hints, user_message, tokens
         )
         
         # 5. حفظ التفاعل في الذاكرة
-        context = self.memory_system.add_conversation_context(user_message, enhanced_response["final_response"])
+        context = self.memory_system.add_conversation_context(
+            user_message, enhanced_response["final_response"], tokens
+        )
         if self.verbose:
             print(f"💾 تم حفظ التفاعل في الذاكرة")
         
@@ -115,7 +121,8 @@ class NanoAdvancedSystem:
             }
         }
     
-    def enhance_response_with_context(self, emotional_response: Dict, memory_hints: Dict, user_message: str) -> Dict[str, Any]:
+    def enhance_response_with_context(self, emotional_response: Dict, memory_hints: Dict, user_message: str,
+                                      tokens: Optional["Tokens"] = None) -> Dict[str, Any]:
         """تحسين الاستجابة باستخدام السياق والذاكرة"""
         start_time = time.time()
         
@@ -137,7 +144,7 @@ class NanoAdvancedSystem:
         relevant_history = memory_hints.get("relevant_history", [])
         if relevant_history and len(relevant_history) > 0:
             recent_topic = relevant_history[0].get("topic", "")
-            if recent_topic and recent_topic in user_message.lower():
+            if recent_topic and recent_topic in (tokens or tokenize(user_message)).terms:
                 context_additions.append("زي ما اتكلمنا قبل كذا،")
         
         # بناء الاستجابة المحسنة
@@ -1,11 +1,12 @@
 # nano_core.py - النواة المركزية لنانو مع نظام الوحدات والمشاعر
-import json
 import random
 import time
 from datetime import datetime
 from typing import Dict, List, Any
 from dataclasses import dataclass
 from enum import Enum
+from riyadh_dialect_generative_module import RiyadhDialectGenerative
+from arabic_tokenizer import surface_words
 
 # ============= نظام المشاعر =============
 class EmotionType(Enum):
@@ -150,36 +151,16 @@ class NanoModule:
 class ArabicLanguageModule(NanoModule):
     """وحدة اللغة العربية"""
     
-    def __init__(self):
+    def __init__(self, model_path: str = "riyadh_model.json"):
         super().__init__(ModuleType.ARABIC_LANGUAGE, "وحدة اللغة العربية")
-        self.load_corpus()
-        self.model = {}
-        self._start_token = "_START_"
-        self._end_token = "_END_"
+        self.model_path = model_path
     
-    def load_corpus(self):
-        """تحميل قاعدة البيانات العربية"""
-        try:
-            with open("corpus.json", 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.sentences = data.get("sentences", [])
-        except FileNotFoundError:
-            self.sentences = ["مرحباً", "أهلاً وسهلاً", "كيف حالك"]
-    
-    def train_model(self):
-        """تدريب نموذج اللغة العربية"""
-        for sentence in self.sentences:
-            words = [self._start_token] + sentence.strip().split() + [self._end_token]
-            for i in range(len(words) - 1):
-                current_word = words[i]
-                next_word = words[i+1]
-                
-                if current_word not in self.model:
-                    self.model[current_word] = {}
-                if next_word not in self.model[current_word]:
-                    self.model[current_word][next_word] = 0
-                
-                self.model[current_word][next_word] += 1
+    def load_model(self) -> RiyadhDialectGenerative:
+        """
+        النموذج المشترك للعملية (يُحمّل عند أول طلب من الملف المحفوظ بدون إعادة تدريب).
+        يُقرأ من السجل في كل طلب فيلتقط النسخة المعاد تحميلها بعد التدريب اليومي.
+        """
+        return RiyadhDialectGenerative.shared(self.model_path)
     
     def can_handle(self, input_text: str) -> bool:
         """فحص النص العربي"""
@@ -188,9 +169,6 @@ class ArabicLanguageModule(NanoModule):
     
     def process(self, input_text: str, emotion_state: EmotionType) -> str:
         """معالجة النص العربي"""
-        if not self.model:
-            self.train_model()
-        
         # تحديد نوع الرد حسب المشاعر
         emotional_responses = self.get_emotional_responses(emotion_state)
         
@@ -198,7 +176,9 @@ class ArabicLanguageModule(NanoModule):
             return random.choice(emotional_responses)
         
         # توليد رد عادي
-        start_word = input_text.strip().split()[0] if input_text.strip() else self._start_token
+        # أول كلمة بدون علامات الترقيم ("هلا!" -> "هلا") حتى تطابق قاموس النموذج
+        words = surface_words(input_text)
+        start_word = words[0] if words else None
         return self.generate_sentence(start_word)
     
     def get_emotional_responses(self, emotion: EmotionType) -> List[str]:
@@ -237,36 +217,13 @@ class ArabicLanguageModule(NanoModule):
         }
         return responses.get(emotion, ["الله أعلم", "إن شاء الله خير"])
     
-    def generate_sentence(self, start_word: str) -> str:
-        """توليد جملة"""
-        if start_word not in self.model:
-            start_word = self._start_token
-        
-        sentence = []
-        current_word = start_word
-        
-        if current_word != self._start_token:
-            sentence.append(current_word)
-        
-        for _ in range(15):
-            if current_word not in self.model:
-                break
-            
-            next_words = self.model[current_word]
-            if not next_words:
-                break
-            
-            words = list(next_words.keys())
-            weights = list(next_words.values())
-            next_word = random.choices(words, weights=weights, k=1)[0]
-            
-            if next_word == self._end_token:
-                break
-            
-            sentence.append(next_word)
-            current_word = next_word
-        
-        return " ".join(sentence) if sentence else "الله أعلم"
+    def generate_sentence(self, start_word: str = None) -> str:
+        """توليد جملة (الكلمة غير المعروفة يُبدأ بدلها من بداية جملة)"""
+        model = self.load_model()
+        if not model.is_trained():
+            return "الله أعلم"
+        sentence = model.generate_sentence(start_word=start_word)
+        return sentence if sentence else "الله أعلم"
 
 class EnglishLanguageModule(NanoModule):
     """وحدة اللغة الإنجليزية"""
@@ -0,0 +1,210 @@
+# quality_filter.py - تصفية دفعات الجمل بالتوازي (عمليات منفصلة بدل خيوط مقيدة بالـ GIL)
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, compress, repeat
+
+from arabic_tokenizer import batch_words, strip_clitics
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# أقل من هذا العدد تُفحص الجمل في نفس العملية (تشغيل العمليات أغلى من الفحص)
+MIN_PARALLEL = 4000
+CHUNK_SIZE = 2000
+
+# نطاق الحروف العربية الأساسي (U+0600 - U+06FF)
+_ARABIC = re.compile("[\u0600-\u06FF]+")
+# حد لذاكرة مطابقات الكلمات في BatchValidator (تُفرّغ عند امتلائها)
+_WORD_CACHE_SIZE = 200000
+
+
+def lengths_and_arabic(sentences):
+    """
+    (طول كل جملة، عدد حروفها العربية) لدفعة كاملة.
+    مع NumPy: كل الجمل في مخزن UTF-32 واحد (حرف = عدد 32-بت) ومجموع تراكمي
+    للحروف العربية، فعدد كل جملة = فرق المجموع عند حدّيها.
+    """
+    if np is None:
+        return (list(map(len, sentences)),
+                [sum(map(len, _ARABIC.findall(sentence))) for sentence in sentences])
+    lengths = np.fromiter(map(len, sentences), dtype=np.int64, count=len(sentences))
+    codes = np.frombuffer("".join(sentences).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    cumulative = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum((codes >= 0x0600) & (codes <= 0x06FF), out=cumulative[1:])
+    ends = np.cumsum(lengths)
+    return lengths, cumulative[ends] - cumulative[ends - lengths]
+
+
+class BatchValidator:
+    """
+    فحص جودة لدفعة جمل كاملة يرجع قناع True/False بنفس ترتيبها:
+    حدود الطول وعدد الكلمات ونسبة الحروف العربية (محسوبة دفعة واحدة)، ثم
+    الكلمات المهمة للجمل التي اجتازت الحدود فقط.
+
+    - words="split": الكلمات حسب المسافات، "tokens": كلمات arabic_tokenizer
+    - keywords: كلمات موحّدة (keyword_set) تُطابق الكلمة أو جذعها بدون
+      السوابق، والمطلوب min_keywords كلمة مختلفة على الأقل
+    - phrases: نصوص يكفي وجود أي منها داخل الجملة (بحروف صغيرة)
+    - strip: الفحص على الجملة بعد حذف المسافات من طرفيها
+    """
+
+    def __init__(self, min_length=0, max_length=None, min_words=0, max_words=None,
+                 min_arabic_ratio=0.0, words="split", keywords=None, min_keywords=1,
+                 phrases=None, strip=False):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.min_words = min_words
+        self.max_words = max_words
+        self.min_arabic_ratio = min_arabic_ratio
+        self.words = words
+        self.keywords = frozenset(keywords) if keywords is not None else None
+        self.min_keywords = min_keywords
+        # تعبير واحد مُجمّع بدل البحث عن كل نص على حدة
+        self.phrases = re.compile("|".join(map(re.escape, phrases))) if phrases else None
+        self.strip = strip
+        self._word_hits = {}
+
+    def _keyword_counts(self, word_lists):
+        """عدد الكلمات المهمة المختلفة في كل جملة (كل كلمة جديدة تُحلَّل مرة واحدة)"""
+        cache = self._word_hits
+        new_words = set(chain.from_iterable(word_lists)).difference(cache)
+        if len(cache) + len(new_words) > _WORD_CACHE_SIZE:
+            cache.clear()
+            new_words = set(chain.from_iterable(word_lists))
+        keywords = self.keywords
+        for word in new_words:
+            cache[word] = keywords.intersection((word, *strip_clitics(word)))
+        lookup = cache.__getitem__
+        return [len(frozenset().union(*map(lookup, words))) for words in word_lists]
+
+    def mask(self, sentences):
+        if self.strip:
+            sentences = [sentence.strip() for sentence in sentences]
+        elif not isinstance(sentences, list):
+            sentences = list(sentences)
+
+        lengths, arabic = lengths_and_arabic(sentences)
+        tokens = batch_words(sentences) if self.words == "tokens" else None
+        word_counts = list(map(len, tokens if tokens is not None else map(str.split, sentences)))
+
+        if np is not None:
+            word_counts = np.asarray(word_counts, dtype=np.int64)
+            ok = (lengths >= self.min_length) & (word_counts >= self.min_words)
+            ok &= arabic >= lengths * self.min_arabic_ratio
+            if self.max_length is not None:
+                ok &= lengths <= self.max_length
+            if self.max_words is not None:
+                ok &= word_counts <= self.max_words
+            ok = ok.tolist()
+        else:
+            max_length = self.max_length if self.max_length is not None else float("inf")
+            max_words = self.max_words if self.max_words is not None else float("inf")
+            ok = [self.min_length <= length <= max_length
+                  and self.min_words <= count <= max_words
+                  and letters >= length * self.min_arabic_ratio
+                  for length, count, letters in zip(lengths, word_counts, arabic)]
+
+        # الفحوصات الأغلى على الجمل المتبقية فقط
+        if self.keywords is not None:
+            remaining = list(compress(range(len(sentences)), ok))
+            word_lists = ([tokens[i] for i in remaining] if tokens is not None
+                          else batch_words([sentences[i] for i in remaining]))
+            for i, count in zip(remaining, self._keyword_counts(word_lists)):
+                if count < self.min_keywords:
+                    ok[i] = False
+        if self.phrases is not None:
+            search = self.phrases.search
+            for i in compress(range(len(sentences)), ok):
+                if not search(sentences[i].lower()):
+                    ok[i] = False
+        return ok
+
+    def __call__(self, sentence):
+        """فحص جملة واحدة"""
+        return self.mask([sentence])[0]
+
+    def __getstate__(self):
+        # ذاكرة مطابقات الكلمات لا تُرسل إلى العمليات الفرعية (كل عملية تبني ذاكرتها)
+        state = self.__dict__.copy()
+        state["_word_hits"] = {}
+        return state
+
+
+def _check_chunk(predicate, chunk, batch=False):
+    """قناع True/False لجزء كامل (طلب واحد لكل جزء)"""
+    if batch:
+        return list(predicate(chunk))
+    return [bool(predicate(sentence)) for sentence in chunk]
+
+
+# دالة الفحص داخل العملية الفرعية: تصل مرة واحدة عبر initializer بدل إرسالها مع كل جزء
+_worker_predicate = None
+_worker_batch = False
+
+
+def _init_worker(predicate, batch):
+    global _worker_predicate, _worker_batch
+    _worker_predicate, _worker_batch = predicate, batch
+
+
+def _check_worker_chunk(chunk):
+    return _check_chunk(_worker_predicate, chunk, _worker_batch)
+
+
+def _gil_disabled():
+    """بايثون free-threaded (3.13t+) بدون GIL: الخيوط تعمل بالتوازي فعلاً"""
+    check = getattr(sys, "_is_gil_enabled", None)
+    return check is not None and not check()
+
+
+def quality_mask(sentences, predicate, workers=None, chunk_size=CHUNK_SIZE, batch=False):
+    """
+    قناع (قائمة True/False بنفس ترتيب sentences) لنتيجة predicate على كل جملة.
+    مع batch=True تأخذ predicate قائمة جمل وترجع قناعها (مثل BatchValidator.mask).
+
+    الجمل تُرسل على أجزاء (chunk_size جملة لكل طلب) إلى ProcessPoolExecutor،
+    أو ThreadPoolExecutor إذا كان بايثون بدون GIL، والنتائج تُجمع بنفس الترتيب
+    (executor.map). predicate يجب أن تكون دالة على مستوى الملف أو كائناً قابلاً
+    للـ pickle (تُرسل مرة واحدة لكل عملية فرعية). الدفعات الصغيرة تُفحص مباشرة.
+    """
+    sentences = sentences if isinstance(sentences, list) else list(sentences)
+    if workers is None:
+        workers = min(8, os.cpu_count() or 1)
+    if workers <= 1 or len(sentences) < MIN_PARALLEL:
+        return _check_chunk(predicate, sentences, batch)
+
+    chunks = [sentences[i:i + chunk_size] for i in range(0, len(sentences), chunk_size)]
+    mask = []
+    if _gil_disabled():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for part in executor.map(_check_chunk, repeat(predicate), chunks, repeat(batch)):
+                mask.extend(part)
+    else:
+        # predicate تُرسل لكل عملية مرة واحدة عند بدئها، والطلبات تحمل الجمل فقط
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(predicate, batch)) as executor:
+            for part in executor.map(_check_worker_chunk, chunks):
+                mask.extend(part)
+    return mask
+
+
+def filter_sentences(sentences, predicate, workers=None, chunk_size=CHUNK_SIZE, batch=False):
+    """
+    الجمل التي تجتاز predicate (بنفس ترتيبها) مع إحصاءات السرعة:
+    يرجع (الجمل المقبولة، {"checked", "kept", "seconds", "sentences_per_sec"}).
+    """
+    sentences = sentences if isinstance(sentences, list) else list(sentences)
+    start = time.perf_counter()
+    kept = list(compress(sentences, quality_mask(sentences, predicate, workers, chunk_size, batch)))
+    elapsed = time.perf_counter() - start
+    return kept, {
+        "checked": len(sentences),
+        "kept": len(kept),
+        "seconds": elapsed,
+        "sentences_per_sec": len(sentences) / elapsed if elapsed else 0.0,
+    }
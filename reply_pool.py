@@ -0,0 +1,184 @@
+# reply_pool.py - مخزون ردود جاهزة مسبقاً مع تعبئة في الخلفية
+import threading
+from collections import OrderedDict, deque
+
+
+class ReplyPool:
+    """
+    مخزن دائري (ring buffer) لكل كلمة بداية يحوي جملاً مولّدة ومفحوصة مسبقاً.
+
+    - طلب الرد يسحب جملة جاهزة بزمن ثابت O(1) بدل مشي سلسلة ماركوف.
+    - خيط في الخلفية يولّد دفعات (generate_batch) لكل مخزن ناقص ويفحصها.
+    - كلمة بداية جديدة تُسجَّل عند أول طلب (miss)، وأقدم الكلمات استخداماً
+      تُحذف عند تجاوز max_keys.
+    - refresh() تفرغ المخازن بعد إعادة تحميل النموذج.
+    - anchored=True: المفتاح كلمة مرساة تقع في أي موضع من الرد
+      (generate_around) بدل كلمة البداية.
+    - validate(reply, user_input): عند التعبئة تُستدعى برسالة فارغة (الفحوصات
+      التي لا تعتمد على الرسالة)، وget(word, user_input) تفحص الرد برسالة
+      المستخدم الفعلية قبل سحبه.
+    """
+
+    def __init__(self, model, validate=None, pool_size=8, max_keys=256,
+                 batch_size=16, refill_interval=0.5, start_words=None, max_length=15,
+                 anchored=False):
+        self.model = model
+        self.validate = validate
+        self.anchored = anchored
+        self.pool_size = pool_size
+        self.max_keys = max_keys
+        self.batch_size = batch_size
+        self.refill_interval = refill_interval
+        self.max_length = max_length
+
+        self._pools = OrderedDict()  # كلمة البداية (أو None) -> deque(maxlen=pool_size)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._generation = 0
+        self._thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.rejected = 0
+
+        for word in [None] + list(start_words or []):
+            self._pool_for(word)
+
+    def _pool_for(self, start_word):
+        """مخزن كلمة البداية (يُنشأ إذا لم يوجد) مع تحديث ترتيب الاستخدام"""
+        with self._lock:
+            pool = self._pools.get(start_word)
+            if pool is None:
+                pool = deque(maxlen=self.pool_size)
+                self._pools[start_word] = pool
+                while len(self._pools) > self.max_keys:
+                    self._pools.popitem(last=False)
+            else:
+                self._pools.move_to_end(start_word)
+            return pool
+
+    def get(self, start_word=None, user_input=None):
+        """
+        سحب رد جاهز، أو None إذا لم يوجد (ويُطلب تعبئة المخزن).
+        مع user_input يُسحب أقدم رد يقبله validate لهذه الرسالة، والباقي يبقى
+        لطلبات أخرى. الردود تُسحب تحت القفل وتُفحص بعد تحريره، فلا تنتظر
+        الطلبات الأخرى فحص هذا الطلب.
+        """
+        pool = self._pool_for(start_word)
+        check = self.validate if user_input is not None else None
+        with self._lock:
+            generation = self._generation
+        reply = None
+        rejected = []
+        for _ in range(self.pool_size):
+            with self._lock:
+                if not pool:
+                    break
+                candidate = pool.popleft()
+            if check is None or check(candidate, user_input):
+                reply = candidate
+                break
+            rejected.append(candidate)
+
+        with self._lock:
+            # المرفوضة لهذه الرسالة ترجع لأول المخزن بترتيبها (إلا بعد إعادة تحميل النموذج)
+            if generation == self._generation:
+                for candidate in reversed(rejected):
+                    if len(pool) >= self.pool_size:
+                        break
+                    pool.appendleft(candidate)
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            low = len(pool) < self.pool_size // 2
+        if reply is None or low:
+            self._wakeup.set()
+        return reply
+
+    def refill(self):
+        """تعبئة كل المخازن الناقصة مرة واحدة (يستدعيها خيط الخلفية)"""
+        with self._lock:
+            generation = self._generation
+            pending = [(word, pool) for word, pool in self._pools.items()
+                       if len(pool) < self.pool_size]
+
+        for word, pool in pending:
+            if self._stopped.is_set():
+                return
+            needed = self.pool_size - len(pool)
+            if needed <= 0:
+                continue
+            batch = self._generate(word, max(needed, self.batch_size))
+            # فحص الرد بدون رسالة مستخدم: ما يعتمد على الرسالة يُفحص في get()
+            valid = [sentence for sentence in batch
+                     if self.validate is None or self.validate(sentence, "")]
+            with self._lock:
+                self.generated += len(batch)
+                self.rejected += len(batch) - len(valid)
+                # جمل نموذج قديم (أعيد تحميله أثناء التوليد) لا تدخل المخزن
+                if generation != self._generation:
+                    return
+                for sentence in valid:
+                    if len(pool) >= self.pool_size:
+                        break
+                    pool.append(sentence)
+
+    def _generate(self, word, count):
+        model = self.model
+        if self.anchored and word is not None:
+            return [model.generate_around(word, self.max_length) for _ in range(count)]
+        return model.generate_batch(count, start_words=[word] * count, max_length=self.max_length)
+
+    def refresh(self):
+        """تفريغ المخازن (بعد إعادة تحميل النموذج) لتُعبأ من النموذج الجديد"""
+        with self._lock:
+            self._generation += 1
+            for pool in self._pools.values():
+                pool.clear()
+        self._wakeup.set()
+
+    def start(self):
+        """تشغيل خيط التعبئة في الخلفية"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="reply-pool", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refill()
+            except Exception as e:
+                print(f"WARNING: فشل تعبئة مخزون الردود: {e}")
+            self._wakeup.wait(self.refill_interval)
+            self._wakeup.clear()
+
+    def stats(self):
+        """عدادات الإصابة والإخفاق وحالة المخازن"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            generated, rejected = self.generated, self.rejected
+            ready = sum(len(pool) for pool in self._pools.values())
+            keys = len(self._pools)
+        requests = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / requests if requests else 0.0,
+            "generated": generated,
+            "rejected": rejected,
+            "keys": keys,
+            "ready": ready,
+        }
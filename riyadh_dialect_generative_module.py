@@ -1,111 +1,1584 @@
-# riyadh_dialect_generative_module.py (v5.0 - JSON Reader)
+# riyadh_dialect_generative_module.py (v7.0 - N-gram Model)
 import random
 import json
 import os
+import sys
+import math
+import mmap
+import struct
+import time
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+from arabic_tokenizer import normalize, surface_words
+from corpus_store import (
+    iter_sentences, iter_weighted, sentence_hash, split_entry, entry_text, is_heldout,
+)
+from count_sketch import ApproximateCounts
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# صيغة ملف النموذج الثنائي (الإصدار 5):
+# ترويسة ثابتة، ثم المفردات (UTF-8 مفصولة بسطر جديد)، ثم جدول لكل طول سياق
+# (1 .. order-1). كل جدول: ترويسة صغيرة ثم أقسامه، وكل قسم مبطّن لحد 8 بايت:
+#   [keys (للسياقات الأطول من كلمة فقط)] | offsets | successors | counts | alias_prob | alias_idx
+# counts بعرض count_bits (32، أو 16/8 بعد التكميم). جدول Alias بعرض alias_bits من
+# ترويسة الجدول: 32 (float32 + uint32) أو 16 بعد التكميم (احتمال بفاصلة ثابتة
+# uint16 + فهرس نسبي uint16). heldout_percent في الترويسة: نسبة الجمل المحجوزة
+# التي استُبعدت من التدريب (0 = تدرب على كل الجمل).
+# الإصدارات 4 (بدون heldout_percent) و3 (وAlias بـ 32 بت) و2 (وبدون count_bits) تُقرأ أيضاً.
+MODEL_MAGIC = b"NANOMDL\0"
+MODEL_FORMAT_VERSION = 5
+# magic, version, order, vocab_size, vocab_bytes, count_bits, heldout_percent
+_HEADER = struct.Struct("<8sIIIIII")
+_HEADER_V4 = struct.Struct("<8sIIIII")
+_HEADER_V2 = struct.Struct("<8sIIII")
+_COUNT_TYPECODES = {8: 'B', 16: 'H', 32: 'I'}
+_TABLE_HEADER = struct.Struct("<III")  # num_contexts, num_edges, alias_bits
+_TABLE_HEADER_V3 = struct.Struct("<II")  # num_contexts, num_edges
+# (احتمال البقاء، الفهرس البديل) لكل عرض Alias
+_ALIAS_TYPECODES = {16: ('H', 'H'), 32: ('f', 'I')}
+# الاحتمال المكمم: عدد صحيح من 65536 (الاحتمال 1 يصبح 65535)
+_ALIAS_ONE = 1 << 16
+
+# السياق (عدة كلمات) يُضغط في عدد صحيح واحد: 21 بت لكل كلمة،
+# فيتسع مفتاح سياق 3 كلمات (نموذج 4-gram) في 63 بت.
+ID_BITS = 21
+ID_MASK = (1 << ID_BITS) - 1
+MAX_ORDER = 4
+# رقم لا يُعطى لأي كلمة، يُستخدم مكان الكلمات غير المعروفة في السياق
+UNKNOWN_ID = ID_MASK
+
+# أقل ميزانية للعدّ التقريبي: تحتها تسقط أغلب الانتقالات وترتفع الحيرة بشدة
+# (حيرة corpus.json مقارنة بالعدّ الدقيق: 8MB أسوأ بـ 3%، 4MB بـ 13%، 0.5MB بـ 7 أضعاف)
+MIN_MEMORY_BUDGET_MB = 8
+# تقدير حجم كلمة في المفردات (النص + خانة القاموس word_ids + خانة القائمة vocab)
+_VOCAB_ENTRY_BYTES = 200
+
+# سجل النماذج المشتركة في العملية: مسار النموذج -> نسخة محمّلة (انظر shared())
+_shared_models = {}
+_shared_lock = threading.Lock()
+
+
+def _padding(size, align=8):
+    return (-size) % align
+
+
+def pack_ids(ids):
+    """ضغط سلسلة أرقام كلمات في مفتاح صحيح واحد (الأحدث في البتات الدنيا)"""
+    key = 0
+    for word_id in ids:
+        key = (key << ID_BITS) | word_id
+    return key
+
+
+def build_alias_table(weights):
+    """
+    بناء جدول Alias (طريقة Vose) لسحب عينة موزونة في زمن ثابت.
+    يرجع قائمتين: احتمال البقاء في الخانة، ورقم الخانة البديلة.
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = (scaled[l] + scaled[s]) - 1.0
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+
+    return prob, alias
+
+
+def _typecode(section):
+    """نوع عناصر مصفوفة array أو memoryview (الجداول المحمّلة عبر mmap)"""
+    return getattr(section, "typecode", None) or section.format
+
+
+def _shifted(offsets, start, end, shift):
+    """offsets[start:end] + shift كمصفوفة 'I' جديدة (عملية واحدة مع NumPy)"""
+    if np is not None:
+        part = np.frombuffer(offsets, dtype=np.uint32)[start:end].astype(np.int64) + shift
+        return array('I', part.astype(np.uint32).tobytes())
+    return array('I', [offset + shift for offset in offsets[start:end]])
+
+
+def sample_alias(words, prob, alias):
+    """سحب كلمة واحدة من جدول Alias بدون أي تخصيص ذاكرة"""
+    i = int(random.random() * len(words))
+    return words[i] if random.random() < prob[i] else words[alias[i]]
+
+
+class TransitionTable:
+    """
+    جدول انتقالات بصيغة CSR لسياقات بطول ثابت.
+
+    - السياق بطول كلمة واحدة جدول "كثيف": الصف رقم i هو الكلمة رقم i (keys = None).
+    - السياقات الأطول مفاتيحها مضغوطة في `keys` (مرتبة تصاعدياً) ويُبحث عنها بـ bisect.
+    الانتقالات داخل كل صف مرتبة حسب رقم الكلمة التالية، وبجانبها جدول Alias مسطح
+    (الفهرس البديل نسبي داخل الصف). احتمالات Alias أعداد float32، أو بعد
+    التكميم أعداد صحيحة من _ALIAS_ONE (alias_one هو قيمة الاحتمال 1).
+    """
+    __slots__ = ("keys", "offsets", "successors", "counts", "alias_prob", "alias_idx", "alias_one")
+
+    def __init__(self, keys=None, offsets=None, successors=None, counts=None,
+                 alias_prob=None, alias_idx=None):
+        self.keys = keys
+        self.offsets = offsets if offsets is not None else array('I', [0])
+        self.successors = successors if successors is not None else array('I')
+        self.counts = counts if counts is not None else array('I')
+        self.alias_prob = alias_prob if alias_prob is not None else array('f')
+        self.alias_idx = alias_idx if alias_idx is not None else array('I')
+        self.alias_one = float(_ALIAS_ONE) if _typecode(self.alias_prob) == 'H' else 1.0
+
+    @classmethod
+    def from_counts(cls, ngram_counts, dense_size=None):
+        """
+        بناء الجدول من عدادات {مفتاح (سياق + كلمة تالية): عدد}.
+        dense_size: عدد الكلمات للجدول الكثيف (سياق بطول كلمة).
+        """
+        keys = None if dense_size is not None else array('Q')
+        offsets = array('I', [0])
+        successors = array('I')
+        counts = array('I')
+        alias_prob = array('f')
+        alias_idx = array('I')
+
+        row_context = None
+        row_counts = []
+
+        def close_row():
+            prob, alias = build_alias_table(row_counts)
+            alias_prob.extend(prob)
+            alias_idx.extend(alias)
+            row_counts.clear()
+            offsets.append(len(successors))
+
+        for key, count in sorted(ngram_counts.items()):
+            if count <= 0:
+                continue
+            context = key >> ID_BITS
+            if context != row_context:
+                if row_context is not None:
+                    close_row()
+                if keys is None:
+                    # صفوف فارغة للكلمات التي ليس لها انتقالات
+                    while len(offsets) <= context:
+                        offsets.append(len(successors))
+                else:
+                    keys.append(context)
+                row_context = context
+            successors.append(key & ID_MASK)
+            counts.append(count)
+            row_counts.append(count)
+
+        if row_context is not None:
+            close_row()
+        if keys is None:
+            while len(offsets) <= dense_size:
+                offsets.append(len(successors))
+
+        return cls(keys, offsets, successors, counts, alias_prob, alias_idx)
+
+    def updated(self, deltas, dense_size=None):
+        """
+        نسخة بعد إضافة عدادات deltas ({مفتاح (سياق + كلمة تالية): عدد إضافي}).
+        الصفوف التي لا تظهر سياقاتها في deltas تُنسخ كقطع متصلة من المصفوفات
+        مع جداول Alias كما هي، فلا يُعاد بناء إلا صفوف السياقات المتغيرة.
+        dense_size: عدد الكلمات للجدول الكثيف (بعد إضافة الكلمات الجديدة).
+        """
+        rows = {}
+        for key, count in deltas.items():
+            rows.setdefault(key >> ID_BITS, {})[key & ID_MASK] = count
+
+        dense = self.keys is None
+        keys = None if dense else array('Q')
+        offsets = array('I', [0])
+        successors = array('I')
+        counts = array('I')
+        alias_prob = array('f')
+        alias_idx = array('I')
+        old_offsets = self.offsets
+        num_rows = len(old_offsets) - 1
+        sections = ((successors, self.successors), (counts, self.counts),
+                    (alias_prob, self.alias_prob), (alias_idx, self.alias_idx))
+
+        def copy_rows(first, last):
+            """نسخ الصفوف first .. last-1 بدون تغيير"""
+            if first >= last:
+                return
+            start, end = old_offsets[first], old_offsets[last]
+            offsets.extend(_shifted(old_offsets, first + 1, last + 1, len(successors) - start))
+            for target, source in sections:
+                target.frombytes(memoryview(source)[start:end].cast('B'))
+            if not dense:
+                keys.frombytes(memoryview(self.keys)[first:last].cast('B'))
+
+        copied = 0
+        for context in sorted(rows):
+            if dense:
+                row = context
+                exists = row < num_rows
+            else:
+                row = bisect_left(self.keys, context)
+                exists = row < num_rows and self.keys[row] == context
+            copy_rows(copied, min(row, num_rows))
+            copied = max(copied, min(row, num_rows))
+            # صفوف فارغة للكلمات الجديدة التي ليس لها انتقالات
+            while dense and len(offsets) <= context:
+                offsets.append(len(successors))
+
+            row_counts = {}
+            if exists:
+                start, end = old_offsets[row], old_offsets[row + 1]
+                row_counts = dict(zip(self.successors[start:end], self.counts[start:end]))
+                copied = row + 1
+            for next_id, count in rows[context].items():
+                row_counts[next_id] = row_counts.get(next_id, 0) + count
+            edges = sorted((next_id, count) for next_id, count in row_counts.items() if count > 0)
+            if edges:
+                prob, alias = build_alias_table([count for _, count in edges])
+                successors.extend(next_id for next_id, _ in edges)
+                counts.extend(count for _, count in edges)
+                alias_prob.extend(prob)
+                alias_idx.extend(alias)
+            elif not dense:
+                continue
+            if not dense:
+                keys.append(context)
+            offsets.append(len(successors))
+
+        copy_rows(copied, num_rows)
+        while dense and len(offsets) <= dense_size:
+            offsets.append(len(successors))
+        return TransitionTable(keys, offsets, successors, counts, alias_prob, alias_idx)
+
+    def to_counts(self):
+        """العكس: إرجاع عدادات قابلة للتعديل {مفتاح: عدد}"""
+        ngram_counts = {}
+        offsets, successors, counts = self.offsets, self.successors, self.counts
+        for row in range(len(offsets) - 1):
+            start, end = offsets[row], offsets[row + 1]
+            if start == end:
+                continue
+            context = row if self.keys is None else self.keys[row]
+            base = context << ID_BITS
+            for i in range(start, end):
+                ngram_counts[base | successors[i]] = counts[i]
+        return ngram_counts
+
+    def num_edges(self):
+        return len(self.successors)
+
+    def row_bounds(self, context):
+        """حدود صف السياق في المصفوفات، أو (0, 0) إذا لم يظهر السياق"""
+        if self.keys is None:
+            if context + 1 >= len(self.offsets):
+                return 0, 0
+            return self.offsets[context], self.offsets[context + 1]
+        row = bisect_left(self.keys, context)
+        if row < len(self.keys) and self.keys[row] == context:
+            return self.offsets[row], self.offsets[row + 1]
+        return 0, 0
+
+    def sample(self, start, end, rand=random.random):
+        """سحب كلمة تالية من صف بزمن ثابت"""
+        i = int(rand() * (end - start))
+        if rand() * self.alias_one >= self.alias_prob[start + i]:
+            i = self.alias_idx[start + i]
+        return self.successors[start + i]
+
+    def count_of(self, start, end, next_id):
+        """عدد مرات ظهور الكلمة التالية داخل الصف (الصف مرتب حسب رقم الكلمة)"""
+        i = bisect_left(self.successors, next_id, start, end)
+        if i < end and self.successors[i] == next_id:
+            return self.counts[i]
+        return 0
+
+    def pruned(self, min_count=1, top_k=None):
+        """
+        عدادات الجدول بعد حذف الانتقالات الأقل من min_count، والإبقاء على
+        أكثر top_k انتقالاً في كل صف (إذا حُدد).
+        """
+        ngram_counts = {}
+        offsets, successors, counts = self.offsets, self.successors, self.counts
+        for row in range(len(offsets) - 1):
+            start, end = offsets[row], offsets[row + 1]
+            edges = [(counts[i], successors[i]) for i in range(start, end) if counts[i] >= min_count]
+            if top_k is not None and len(edges) > top_k:
+                edges = sorted(edges, reverse=True)[:top_k]
+            context = row if self.keys is None else self.keys[row]
+            base = context << ID_BITS
+            for count, next_id in edges:
+                ngram_counts[base | next_id] = count
+        return ngram_counts
+
+    def quantized(self, bits):
+        """
+        نسخة بأعداد مكممة لعرض bits: كل صف يُقسم على مقياسه الخاص (أكبر عدد
+        فيه يصبح أعلى قيمة) فتبقى النسب داخل الصف تقريباً كما هي، ولا يصبح
+        أي عدد صفراً.
+        جدول Alias يُكمم أيضاً إلى 16 بت (احتمال بفاصلة ثابتة، خطأ أقل من
+        1/65536 لكل خانة، وفهرس نسبي) إذا لم يتجاوز أي صف 65536 انتقالاً،
+        فيصبح حجم الانتقال الواحد 8-10 بايت بدل 16.
+        """
+        q_max = (1 << bits) - 1
+        quantized = array(_COUNT_TYPECODES[bits])
+        offsets, counts = self.offsets, self.counts
+        widest = 0
+        for row in range(len(offsets) - 1):
+            start, end = offsets[row], offsets[row + 1]
+            if start == end:
+                continue
+            widest = max(widest, end - start)
+            row_max = max(counts[start:end])
+            if row_max <= q_max:
+                quantized.extend(counts[start:end].tolist())
+            else:
+                scale = q_max / row_max
+                quantized.extend(max(1, round(counts[i] * scale)) for i in range(start, end))
+        alias_prob, alias_idx = self.alias_prob, self.alias_idx
+        if _typecode(alias_prob) == 'f' and widest <= _ALIAS_ONE:
+            alias_prob = array('H', [min(_ALIAS_ONE - 1, round(p * _ALIAS_ONE)) for p in alias_prob])
+            alias_idx = array('H', alias_idx)
+        return TransitionTable(self.keys, self.offsets, self.successors, quantized,
+                               alias_prob, alias_idx)
+
+    def alias_bits(self):
+        return 16 if _typecode(self.alias_prob) == 'H' else 32
+
+    def reversed(self):
+        """
+        الجدول العكسي لجدول كثيف: صف كل كلمة يحوي الكلمات التي سبقتها
+        (بنفس الأعداد)، للتوليد من كلمة إلى الخلف.
+        """
+        reverse_counts = {}
+        offsets, successors, counts = self.offsets, self.successors, self.counts
+        for row in range(len(offsets) - 1):
+            for i in range(offsets[row], offsets[row + 1]):
+                reverse_counts[(successors[i] << ID_BITS) | row] = counts[i]
+        return TransitionTable.from_counts(reverse_counts, dense_size=len(offsets) - 1)
+
+    def sections(self):
+        """أقسام الجدول بالترتيب المحفوظ في الملف الثنائي"""
+        sections = [] if self.keys is None else [('Q', self.keys)]
+        sections += [('I', self.offsets), ('I', self.successors), (_typecode(self.counts), self.counts),
+                     (_typecode(self.alias_prob), self.alias_prob),
+                     (_typecode(self.alias_idx), self.alias_idx)]
+        return sections
+
+
+def count_shard(lines, order):
+    """
+    عدّ n-grams جزء من الجمل (تُستدعى داخل عملية منفصلة).
+    ترجع مفردات الجزء وعداداته بأرقامه المحلية، وتُدمج لاحقاً بـ merge_counts.
+    """
+    counter = RiyadhDialectGenerative(order=order)
+    levels = [{} for _ in range(order - 1)]
+    counter._count_sentences(levels, lines)
+    return counter.vocab, levels
+
 
 class RiyadhDialectGenerative:
     """
     جزيء لغوي توليدي للهجة الرياض.
-    النسخة: 5.0 (قارئ JSON)
+    النسخة: 7.0 (نموذج N-gram)
 
     التحسينات:
     - تم فصل البيانات بشكل كامل، الآن يقرأ الجمل من ملف `corpus.json`.
-    - الكود أصبح أكثر نظافة واحترافية.
+    - كل كلمة تُحوَّل لرقم (vocab)، والانتقالات مخزنة بصيغة CSR
+      داخل مصفوفات `array` بدل القواميس المتداخلة.
+    - جدول Alias مسطح بجانب الانتقالات لسحب الكلمة التالية بزمن ثابت.
+    - النموذج يُحفظ بصيغة ثنائية (`.bin`) تُفتح عبر mmap بدون نسخ،
+      فتتشارك العمليات نسخة واحدة من ذاكرة النظام. تصدير JSON متاح للتصحيح.
+    - تدريب تراكمي: يُحفظ سجل ببصمات الجمل المدرَّب عليها (`.seen`) فلا
+      يُعاد إلا عدّ الجمل الجديدة وبناء صفوف سياقاتها، ويمكن طرح الجمل المحذوفة.
+    - رتبة قابلة للضبط (order=2..4) مع تراجع (stupid backoff): التوليد يستخدم
+      أطول سياق معروف ثم يتراجع لسياق أقصر. مفاتيح السياقات أعداد مضغوطة
+      في مصفوفات مرتبة وليست قواميس نصية.
+    - توليد دفعات (`generate_batch`) بسحب متجه عبر NumPy عند توفرها.
+    - تدريب متوازٍ (workers) بعدّ أجزاء الملف في عمليات منفصلة ثم دمج العدادات،
+      و`merge_models` لدمج نماذج عُدّت على أجهزة مختلفة.
+    - قراءة ملف البيانات بشكل متدفق (جملة جملة) فلا يُحمَّل الملف كاملاً في الذاكرة.
+    - نسخة مشتركة واحدة لكل ملف نموذج في العملية (`shared`) تُحمّل عند أول
+      طلب، وتستخدمها NanoCore وEnhancedNano بدل تدريب نماذج خاصة.
+    - تدريب تقريبي بذاكرة محدودة (memory_budget_mb): Count-Min Sketch مع قائمة
+      الانتقالات الأكثر تكراراً لكل جدول، والمفردات تُحتسب من نفس الميزانية.
+      الثمن جودة أقل (الانتقالات النادرة تسقط)، ولا يُحفظ سجل .seen فلا
+      تدريب تراكمي عليه. أقل ميزانية MIN_MEMORY_BUDGET_MB.
+    - جمل محجوزة للتقييم (heldout_percent): الجمل التي تقع بصمتها في هذه
+      النسبة (is_heldout) لا يُتدرب عليها أبداً، فتقيس model_evaluation
+      النموذج نفسه الذي سيُرقّى على جمل لم يرها. النسبة تُحفظ في الملف.
+    - توليد حول كلمة مفتاحية (`find_anchor` + `generate_around`): أندر كلمة
+      معروفة في رسالة المستخدم تُختار عبر الفهرس، ويُولَّد ما قبلها بجدول عكسي
+      وما بعدها للأمام، فتقع الكلمة في وسط الرد.
+    - إعادة تحميل بدون توقف: `is_stale` تكشف ملفاً أحدث و`reloaded` تبني نسخة
+      جديدة يُبدَّل إليها المرجع (انظر model_watcher.py).
     """
-    def __init__(self, model_path="riyadh_model.json"):
+    def __init__(self, model_path="riyadh_model.json", order=3, backoff_alpha=0.4,
+                 memory_budget_mb=None, heldout_percent=None):
+        if not 2 <= order <= MAX_ORDER:
+            raise ValueError(f"order يجب أن يكون بين 2 و {MAX_ORDER}")
+        if heldout_percent is not None and not 0 <= heldout_percent < 100:
+            raise ValueError("heldout_percent يجب أن يكون بين 0 و 99")
+        if memory_budget_mb and memory_budget_mb < MIN_MEMORY_BUDGET_MB:
+            raise ValueError(f"memory_budget_mb يجب ألا يقل عن {MIN_MEMORY_BUDGET_MB}")
         self.model_path = model_path
-        self.model = {}
+        self.binary_path = os.path.splitext(model_path)[0] + ".bin"
+        # بصمات الجمل التي تدرب عليها النموذج (للتدريب التراكمي)
+        self.seen_path = os.path.splitext(model_path)[0] + ".seen"
+        self.order = order
+        self.backoff_alpha = backoff_alpha
+        # ميزانية ذاكرة العدادات أثناء التدريب (None = عدّ دقيق بلا حد)
+        self.memory_budget_mb = memory_budget_mb
+        # نسبة الجمل المحجوزة للتقييم التي تُستبعد من التدريب (حسب بصمة الجملة)؛
+        # None = نفس نسبة النموذج المحفوظ في التدريب التراكمي، و0 في التدريب الكامل
+        self.heldout_percent = heldout_percent
         self._start_token = "_START_"
         self._end_token = "_END_"
+        # بصمة ملف النموذج المحمّل (لاكتشاف نسخة أحدث على القرص)
+        self._stamp = None
+        self._reset_tables()
+
+    def _reset_tables(self):
+        """تفريغ جداول النموذج"""
+        self.vocab = []       # رقم -> كلمة
+        self.word_ids = {}    # كلمة -> رقم
+        # جدول لكل طول سياق: _tables[n-1] لسياق من n كلمات
+        self._tables = [TransitionTable() for _ in range(self.order - 1)]
+        self._unigram_counts = None
+        self._reverse_table = None
+        self._normalized_ids = None
+        self._np_tables = None
+        self._mmap = None
+        # عرض الأعداد المحفوظة (أقل من 32 بعد التكميم بـ prune)
+        self.count_bits = 32
+        self._start_id = self._intern(self._start_token)
+        self._end_id = self._intern(self._end_token)
 
-    def train(self, corpus_path="corpus.json", force_retrain=False):
+    def _intern(self, word):
+        """إرجاع رقم الكلمة مع إضافتها للمفردات إذا كانت جديدة"""
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = len(self.vocab)
+            if word_id >= UNKNOWN_ID:
+                raise ValueError(f"المفردات تجاوزت الحد الأقصى ({UNKNOWN_ID} كلمة)")
+            self.word_ids[word] = word_id
+            self.vocab.append(word)
+        return word_id
+
+    def train(self, corpus_path="corpus.json", force_retrain=False, incremental=False, workers=1):
         """
-        تدريب النموذج على ملف البيانات JSON.
+        تدريب النموذج على ملف البيانات (JSON أو JSONL)، بقراءة متدفقة.
+        الجملة الموزونة ({"text": ..., "weight": n}) تُحتسب n مرة.
+
+        incremental=True: يحمّل النموذج الحالي ويضيف فقط الجمل التي لم يتدرب
+        عليها من قبل (حسب بصمات الجمل المحفوظة)، فتكون التكلفة بحجم الإضافات
+        (انظر _train_incremental). إذا حُددت heldout_percent مختلفة عن النموذج
+        المحفوظ يُعاد التدريب كاملاً.
+        الجمل المحجوزة (heldout_percent) تُتخطى في الحالتين.
+        workers > 1: تقسيم الجمل لأجزاء تُعدّ في عمليات متوازية ثم تُدمج.
         """
         print("INFO: بدء عملية التدريب...")
 
-        if not force_retrain and os.path.exists(self.model_path):
-            print(f"INFO: تم العثور على نموذج مدرب. جاري التحميل من '{self.model_path}'...")
+        if not force_retrain and not incremental and self.model_exists():
+            found_path = self.binary_path if os.path.exists(self.binary_path) else self.model_path
+            print(f"INFO: تم العثور على نموذج مدرب. جاري التحميل من '{found_path}'...")
             self.load_model()
             return
 
-        print(f"INFO: جاري قراءة البيانات من '{corpus_path}'...")
-        try:
-            with open(corpus_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                lines = data.get("sentences", [])
-        except FileNotFoundError:
+        if not os.path.exists(corpus_path):
             print(f"ERROR: ملف البيانات '{corpus_path}' غير موجود. لا يمكن التدريب.")
             return
+        print(f"INFO: جاري قراءة البيانات من '{corpus_path}'...")
+
+        order, heldout_percent = self.order, self.heldout_percent
+        can_resume = os.path.exists(self.binary_path) and os.path.exists(self.seen_path)
+        if incremental and self.memory_budget_mb:
+            print("INFO: العدّ التقريبي لا يدعم التدريب التراكمي. جاري التدريب الكامل...")
+        elif incremental and can_resume:
+            self.load_model()
+            # النموذج المكمم (prune) لا يُكمل عليه التدريب
+            if (self.order == order and self.count_bits == 32
+                    and heldout_percent in (None, self.heldout_percent)):
+                self._train_incremental(corpus_path, workers)
+                return
+        heldout_percent = heldout_percent or 0
+        self.order, self.heldout_percent = order, heldout_percent
+        self._reset_tables()
+        seen = array('Q')
+        levels = self._new_levels()
+
+        total = 0
+        def corpus_lines():
+            nonlocal total
+            for line in iter_weighted(corpus_path):
+                total += 1
+                yield line
+
+        # الجمل تُقرأ وتُعدّ واحدة واحدة؛ بصماتها تُضاف إلى seen (إلا في العدّ
+        # التقريبي: السجل ينمو مع النصوص ولا يُستخدم لتدريب تراكمي)
+        lines = corpus_lines()
+        if not self.memory_budget_mb:
+            lines = self._unseen_sentences(lines, seen, heldout_percent)
+        elif heldout_percent:
+            lines = (line for line in lines if not is_heldout(entry_text(line), heldout_percent))
+        try:
+            self._count_lines(levels, lines, workers)
         except json.JSONDecodeError:
             print(f"ERROR: خطأ في قراءة ملف '{corpus_path}'. تأكد من أنه بصيغة JSON صحيحة.")
             return
 
-        if not lines:
+        if total == 0:
             print("WARNING: ملف البيانات فارغ أو لا يحتوي على مفتاح 'sentences'.")
             return
+        print(f"INFO: تم عدّ {total} جملة. جاري بناء النموذج الإحصائي...")
 
-        print(f"INFO: تم العثور على {len(lines)} جملة. جاري بناء النموذج الإحصائي...")
-        for line in lines:
-            words = [self._start_token] + line.strip().split() + [self._end_token]
-            for i in range(len(words) - 1):
-                current_word = words[i]
-                next_word = words[i+1]
+        self._compile(levels)
+        print("INFO: اكتمل بناء النموذج. جاري حفظه...")
+        self.save_model()
+        if self.memory_budget_mb:
+            # سجل قديم لا يطابق النموذج الجديد
+            with suppress(FileNotFoundError):
+                os.remove(self.seen_path)
+        else:
+            self._save_seen(seen)
 
-                if current_word not in self.model:
-                    self.model[current_word] = {}
+    def _train_incremental(self, corpus_path, workers=1):
+        """
+        تدريب تراكمي على النموذج المحمّل: البصمات تُفحص أولاً (بدون لمس
+        الجداول) ويُرجع مباشرة إذا لم توجد جمل جديدة. عدادات الجمل الجديدة
+        وحدها تُعدّ في قواميس صغيرة، ثم يُعاد بناء صفوف سياقاتها فقط
+        (TransitionTable.updated) وتُلحق بصماتها بملف .seen.
+        """
+        seen = self._load_seen()
+        known = len(seen)
+        total = 0
+        def corpus_lines():
+            nonlocal total
+            for line in iter_weighted(corpus_path):
+                total += 1
+                yield line
 
-                if next_word not in self.model[current_word]:
-                    self.model[current_word][next_word] = 0
+        try:
+            new_lines = self._unseen_sentences(corpus_lines(), seen, self.heldout_percent)
+            first = next(new_lines, None)
+            if first is None:
+                if total == 0:
+                    print("WARNING: ملف البيانات فارغ أو لا يحتوي على مفتاح 'sentences'.")
+                else:
+                    print("INFO: لا توجد جمل جديدة. النموذج محدث.")
+                return
+            deltas = [{} for _ in range(self.order - 1)]
+            self._count_lines(deltas, chain([first], new_lines), workers)
+        except json.JSONDecodeError:
+            print(f"ERROR: خطأ في قراءة ملف '{corpus_path}'. تأكد من أنه بصيغة JSON صحيحة.")
+            return
+
+        print(f"INFO: تدريب تراكمي على {len(seen) - known} جملة جديدة من أصل {total}.")
+        self._tables = [
+            table.updated(delta, dense_size=len(self.vocab) if n == 0 else None)
+            for n, (table, delta) in enumerate(zip(self._tables, deltas))
+        ]
+        self._tables_changed()
+        print("INFO: اكتمل تحديث النموذج. جاري حفظه...")
+        self.save_model()
+        self._append_seen(seen[known:])
 
-                self.model[current_word][next_word] += 1
+    def fit(self, lines, workers=1):
+        """تدريب كامل على قائمة جمل (أو أزواج (جملة، وزن)) في الذاكرة، بدون قراءة أو حفظ ملفات"""
+        self._reset_tables()
+        levels = self._new_levels()
+        self._count_lines(levels, lines, workers)
+        self._compile(levels)
 
-        print("INFO: اكتمل بناء النموذج. جاري حفظه...")
+    def _new_levels(self):
+        """
+        عدادات التدريب (واحد لكل طول سياق): قواميس دقيقة، أو مع memory_budget_mb
+        عدادات تقريبية بذاكرة محدودة (Count-Min Sketch + الأكثر تكراراً).
+        """
+        if not self.memory_budget_mb:
+            return [{} for _ in range(self.order - 1)]
+        return ApproximateCounts.split_budget(self.memory_budget_mb, self.order - 1)
+
+    def _count_lines(self, levels, lines, workers=1, shard_size=10000):
+        """
+        عدّ الجمل في العدادات، تسلسلياً أو على عدة عمليات.
+        lines قد يكون مولّداً: يُقسَّم لأجزاء بحجم shard_size، ولا يبقى في
+        الانتظار أكثر من جزأين لكل عملية حتى تبقى الذاكرة محدودة.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            self._count_sentences(levels, lines)
+            return
+
+        lines = iter(lines)
+        shard = list(islice(lines, shard_size))
+        if len(shard) < shard_size:
+            self._count_sentences(levels, shard)
+            return
+
+        print(f"INFO: عدّ الجمل على {workers} عمليات (أجزاء من {shard_size} جملة)...")
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while shard:
+                pending.append(executor.submit(count_shard, shard, self.order))
+                if len(pending) >= 2 * workers:
+                    self.merge_counts(levels, *pending.popleft().result())
+                shard = list(islice(lines, shard_size))
+            # الدمج بترتيب الأجزاء ليبقى ترقيم المفردات ثابتاً
+            while pending:
+                self.merge_counts(levels, *pending.popleft().result())
+        if not isinstance(levels[0], dict):
+            self._charge_vocab(levels)
+
+    def _charge_vocab(self, levels):
+        """حجز حجم المفردات من ميزانية العدادات التقريبية (موزعاً على الجداول)"""
+        vocab_bytes = len(self.vocab) * _VOCAB_ENTRY_BYTES
+        for level in levels:
+            level.reserve(vocab_bytes // len(levels))
+
+    def merge_counts(self, levels, other_vocab, other_levels):
+        """
+        دمج عدادات محسوبة بمفردات أخرى (جزء من عملية أو جهاز آخر) في levels،
+        مع تحويل أرقام الكلمات لمفردات هذا النموذج.
+        """
+        if len(other_levels) != len(levels):
+            raise ValueError("لا يمكن دمج عدادات برتب مختلفة")
+        id_map = [self._intern(word) for word in other_vocab]
+        for n, (level, other) in enumerate(zip(levels, other_levels), start=1):
+            # المفتاح يحوي n كلمات سياق + الكلمة التالية
+            shifts = [ID_BITS * j for j in range(n, -1, -1)]
+            for key, count in other.items():
+                new_key = 0
+                for shift in shifts:
+                    new_key = (new_key << ID_BITS) | id_map[(key >> shift) & ID_MASK]
+                if not isinstance(level, dict):
+                    level.add(new_key, count)
+                    continue
+                count += level.get(new_key, 0)
+                if count > 0:
+                    level[new_key] = count
+                else:
+                    level.pop(new_key, None)
+
+    @classmethod
+    def merge_models(cls, model_paths, output_path="riyadh_model.json"):
+        """
+        دمج عدة ملفات نماذج (مثلاً أجزاء عُدّت على أجهزة مختلفة) في نموذج واحد.
+        سجلات البصمات (.seen) تُدمج أيضاً إذا توفرت لكل الأجزاء.
+        """
+        merged = None
+        levels = None
+        seen = array('Q')
+        has_seen = True
+        for path in model_paths:
+            shard = cls(path)
+            shard.load_model()
+            if merged is None:
+                merged = cls(output_path, order=shard.order, heldout_percent=shard.heldout_percent)
+                levels = [{} for _ in range(merged.order - 1)]
+            elif shard.order != merged.order:
+                raise ValueError(f"رتبة '{path}' ({shard.order}) تختلف عن {merged.order}")
+            # الجمل المحجوزة عن النموذج المدمج: المحجوزة عن كل الأجزاء فقط
+            merged.heldout_percent = min(merged.heldout_percent, shard.heldout_percent)
+            merged.merge_counts(levels, shard.vocab, shard._thaw())
+            if has_seen and os.path.exists(shard.seen_path):
+                seen.extend(shard._load_seen())
+            else:
+                has_seen = False
+
+        if merged is None:
+            raise ValueError("لا توجد نماذج للدمج")
+        merged._compile(levels)
+        merged.save_model()
+        if has_seen:
+            merged._save_seen(seen)
+        return merged
+
+    def forget_sentences(self, sentences):
+        """
+        طرح جمل محذوفة من النموذج (عكس التدريب التراكمي).
+        تُطرح فقط الجمل التي سبق أن تدرب عليها النموذج. الجمل الموزونة تُمرر
+        كأزواج (جملة، وزن) بنفس وزنها في قاعدة الجمل.
+        """
+        if not os.path.exists(self.binary_path) or not os.path.exists(self.seen_path):
+            print("WARNING: لا يوجد سجل تدريب تراكمي. أعد التدريب الكامل بدلاً من ذلك.")
+            return 0
+
+        self.load_model()
+        seen = self._load_seen()
+        remaining = {}
+        for h in seen:
+            remaining[h] = remaining.get(h, 0) + 1
+
+        removed_lines = []
+        removed_hashes = {}
+        for line in sentences:
+            h = sentence_hash(entry_text(line))
+            if remaining.get(h, 0) > 0:
+                remaining[h] -= 1
+                removed_hashes[h] = removed_hashes.get(h, 0) + 1
+                removed_lines.append(line)
+
+        if not removed_lines:
+            print("INFO: لا توجد جمل مطابقة للطرح.")
+            return 0
+
+        levels = self._thaw()
+        self._count_sentences(levels, removed_lines, sign=-1)
+
+        kept = array('Q')
+        for h in seen:
+            if removed_hashes.get(h, 0) > 0:
+                removed_hashes[h] -= 1
+            else:
+                kept.append(h)
+
+        self._compile(levels)
         self.save_model()
+        self._save_seen(kept)
+        print(f"INFO: تم طرح {len(removed_lines)} جملة من النموذج.")
+        return len(removed_lines)
+
+    def prune(self, min_count=1, top_k=None, count_bits=32):
+        """
+        تصغير النموذج المحمّل: حذف الانتقالات الأقل من min_count، والإبقاء على
+        أكثر top_k انتقالاً لكل سياق، وتكميم الأعداد إلى 8 أو 16 بت (مع جداول
+        Alias إلى 16 بت).
+        النموذج الناتج للتقديم فقط: لا يُكمل عليه التدريب التراكمي.
+        """
+        if count_bits not in _COUNT_TYPECODES:
+            raise ValueError(f"count_bits يجب أن يكون واحداً من {sorted(_COUNT_TYPECODES)}")
+        self._compile([table.pruned(min_count, top_k) for table in self._tables])
+        if count_bits != 32:
+            self._tables = [table.quantized(count_bits) for table in self._tables]
+            self.count_bits = count_bits
+
+    def save_pruned(self, min_count=1, top_k=None, count_bits=32, output_path=None):
+        """
+        prune ثم الحفظ في output_path (أو نفس الملف). سجل البصمات (.seen)
+        للملف الناتج يُحذف لأن العدادات لم تعد كاملة، فيكون التدريب التالي كاملاً.
+        """
+        self.prune(min_count, top_k, count_bits)
+        if output_path is not None:
+            self.model_path = output_path
+            self.binary_path = os.path.splitext(output_path)[0] + ".bin"
+            self.seen_path = os.path.splitext(output_path)[0] + ".seen"
+        self.save_model()
+        if os.path.exists(self.seen_path):
+            os.remove(self.seen_path)
+
+    def perplexity(self, sentences, floor=1e-6):
+        """
+        الحيرة (perplexity) على جمل: exp لمتوسط -log لدرجة كل كلمة (مع _END_)
+        بدرجات stupid backoff. الكلمات غير المعروفة تأخذ الدرجة floor.
+        """
+        log_sum = 0.0
+        tokens = 0
+        context_size = self.order - 1
+        for line in sentences:
+            ids = [self._start_id]
+            ids.extend(self.word_ids.get(word, UNKNOWN_ID) for word in line.strip().split())
+            ids.append(self._end_id)
+            for i in range(1, len(ids)):
+                score = 0.0
+                if ids[i] != UNKNOWN_ID:
+                    score = self._score_ids(ids[max(0, i - context_size):i], ids[i])
+                log_sum -= math.log(max(score, floor))
+                tokens += 1
+        return math.exp(log_sum / tokens) if tokens else float("inf")
+
+    def size_report(self, heldout, load_repeats=5):
+        """حجم ملف النموذج وزمن تحميله (بالمللي ثانية) والحيرة على جمل heldout"""
+        start = time.perf_counter()
+        for _ in range(load_repeats):
+            RiyadhDialectGenerative(self.model_path)._open_binary(self.binary_path)
+        load_ms = (time.perf_counter() - start) * 1000 / load_repeats
+        return {
+            "bytes": os.path.getsize(self.binary_path),
+            "edges": sum(table.num_edges() for table in self._tables),
+            "load_ms": load_ms,
+            "perplexity": self.perplexity(heldout),
+        }
+
+    def _count_sentences(self, levels, lines, sign=1):
+        """
+        إضافة (أو طرح عند sign=-1) كل n-grams الجمل إلى العدادات.
+        levels[n-1] يحوي مفاتيح (سياق من n كلمات + الكلمة التالية).
+        الجملة قد تكون زوج (جملة، وزن): عداداتها تُضرب في الوزن.
+        العدادات التقريبية (ApproximateCounts) تدعم الإضافة فقط.
+        """
+        if not isinstance(levels[0], dict):
+            if sign < 0:
+                raise ValueError("العدادات التقريبية لا تدعم طرح الجمل")
+            self._count_sentences_approx(levels, lines)
+            return
+        max_context = len(levels)
+        start_id, end_id = self._start_id, self._end_id
+        for line in lines:
+            weight = sign
+            if not isinstance(line, str):
+                line, weight = split_entry(line)
+                weight *= sign
+            ids = [start_id]
+            ids.extend(self._intern(word) for word in line.strip().split())
+            ids.append(end_id)
+            for i in range(len(ids) - 1):
+                next_id = ids[i + 1]
+                context = 0
+                for n in range(1, min(max_context, i + 1) + 1):
+                    context |= ids[i - n + 1] << (ID_BITS * (n - 1))
+                    level = levels[n - 1]
+                    key = (context << ID_BITS) | next_id
+                    count = level.get(key, 0) + weight
+                    if count > 0:
+                        level[key] = count
+                    else:
+                        level.pop(key, None)
+
+    def _count_sentences_approx(self, levels, lines):
+        """نفس مفاتيح _count_sentences لكن في عدادات تقريبية"""
+        max_context = len(levels)
+        start_id, end_id = self._start_id, self._end_id
+        adders = [level.add for level in levels]
+        for count, line in enumerate(lines, start=1):
+            # المفردات تنمو مع النصوص: حجزها من الميزانية كل فترة
+            if count % 4096 == 0:
+                self._charge_vocab(levels)
+            weight = 1
+            if not isinstance(line, str):
+                line, weight = split_entry(line)
+            ids = [start_id]
+            ids.extend(self._intern(word) for word in line.strip().split())
+            ids.append(end_id)
+            for i in range(len(ids) - 1):
+                next_id = ids[i + 1]
+                context = 0
+                for n in range(1, min(max_context, i + 1) + 1):
+                    context |= ids[i - n + 1] << (ID_BITS * (n - 1))
+                    adders[n - 1]((context << ID_BITS) | next_id, weight)
+        self._charge_vocab(levels)
+
+    def _compile(self, levels):
+        """تحويل العدادات إلى جداول CSR مع بناء جداول Alias مرة واحدة"""
+        self._tables = [
+            TransitionTable.from_counts(level, dense_size=len(self.vocab) if n == 0 else None)
+            for n, level in enumerate(levels)
+        ]
+        self._tables_changed()
+
+    def _tables_changed(self):
+        """إلغاء ما بُني من الجداول السابقة (بعد بنائها من جديد أو تحديثها)"""
+        self.count_bits = 32
+        self._unigram_counts = None
+        self._reverse_table = None
+        self._normalized_ids = None
+        self._np_tables = None
+
+    def _thaw(self):
+        """تحويل الجداول إلى عدادات قابلة للتعديل (واحد لكل طول سياق)"""
+        return [table.to_counts() for table in self._tables]
+
+    @staticmethod
+    def _unseen_sentences(lines, seen, heldout_percent=0):
+        """
+        مولّد الجمل التي لم يتدرب عليها النموذج، بمرور واحد على الجمل،
+        مع إلحاق بصماتها بـ seen بنفس الترتيب. الجمل المحجوزة
+        (is_heldout بنفس البصمة) تُتخطى ولا تدخل seen.
+        المسار السريع: الملف أُضيف له من النهاية فقط (البصمات الأولى مطابقة)؛
+        عند أول اختلاف نقارن بقية الجمل بعدّاد البصمات المتبقية.
+        """
+        k = len(seen)
+        i = 0
+        remaining = None
+        for line in lines:
+            h = sentence_hash(entry_text(line))
+            if h % 100 < heldout_percent:
+                continue
+            if remaining is None:
+                if i < k and seen[i] == h:
+                    i += 1
+                    continue
+                remaining = {}
+                for old in seen[i:k]:
+                    remaining[old] = remaining.get(old, 0) + 1
+            if remaining.get(h, 0) > 0:
+                remaining[h] -= 1
+                continue
+            seen.append(h)
+            yield line
+
+    def _load_seen(self):
+        seen = array('Q')
+        with open(self.seen_path, 'rb') as f:
+            seen.frombytes(f.read())
+        if sys.byteorder != "little":
+            seen.byteswap()
+        return seen
+
+    def _save_seen(self, seen):
+        """حفظ بصمات الجمل المدرَّب عليها (بترتيب إضافتها)"""
+        if sys.byteorder != "little":
+            seen = array('Q', seen)
+            seen.byteswap()
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.seen_path)),
+            prefix=os.path.basename(self.seen_path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(seen.tobytes())
+            os.replace(tmp_path, self.seen_path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+
+    def _append_seen(self, hashes):
+        """إلحاق بصمات الجمل الجديدة بنهاية ملف .seen (بدون إعادة كتابة الموجود)"""
+        if sys.byteorder != "little":
+            hashes = array('Q', hashes)
+            hashes.byteswap()
+        with open(self.seen_path, 'ab') as f:
+            f.write(hashes.tobytes())
+
+    # ---- طبقة التوافق مع صيغة القاموس القديمة ----
+    @property
+    def model(self):
+        """
+        عرض انتقالات الكلمة الواحدة بصيغة {كلمة: {كلمة_تالية: عدد}} (للتوافق
+        والتصحيح فقط؛ يُبنى عند الطلب ولا يُستخدم في التوليد).
+        """
+        view = {}
+        vocab = self.vocab
+        table = self._tables[0]
+        offsets, successors, counts = table.offsets, table.successors, table.counts
+        for word_id in range(len(offsets) - 1):
+            start, end = offsets[word_id], offsets[word_id + 1]
+            if start != end:
+                view[vocab[word_id]] = {
+                    vocab[successors[i]]: counts[i] for i in range(start, end)
+                }
+        return view
+
+    @model.setter
+    def model(self, nested):
+        self._load_from_dict(nested)
+
+    def _load_from_dict(self, nested):
+        """بناء نموذج ثنائي الرتبة (bigram) من قاموس متداخل بالصيغة القديمة"""
+        self.order = 2
+        self.heldout_percent = 0
+        self._reset_tables()
+        bigrams = {}
+        for word, next_words_pool in nested.items():
+            context = self._intern(word) << ID_BITS
+            for next_word, count in next_words_pool.items():
+                key = context | self._intern(next_word)
+                bigrams[key] = bigrams.get(key, 0) + int(count)
+        self._compile([bigrams])
+
+    @classmethod
+    def shared(cls, model_path="riyadh_model.json", corpus_path="corpus.json", update=False):
+        """
+        النموذج المشترك للعملية: يُحمّل من الملف المحفوظ مرة واحدة (ويُدرَّب فقط
+        إذا لم يوجد نموذج محفوظ)، ثم تُرجع نفس النسخة لكل المستخدمين.
+        update=True: تدريب تراكمي على الجمل الجديدة عند أول تحميل.
+
+        الأصناف الفرعية (مثل EnhancedNano) تحصل على نسخة جديدة منها تشارك
+        جداول النسخة المحمّلة بدون نسخ. النسخة المشتركة للقراءة فقط.
+        """
+        key = os.path.abspath(model_path)
+        model = _shared_models.get(key)
+        if model is None:
+            with _shared_lock:
+                model = _shared_models.get(key)
+                if model is None:
+                    model = RiyadhDialectGenerative(model_path)
+                    model.train(corpus_path, incremental=update)
+                    _shared_models[key] = model
+
+        if cls is RiyadhDialectGenerative:
+            return model
+        instance = cls(model_path)
+        instance.share_tables(model)
+        return instance
+
+    def file_stamp(self):
+        """بصمة ملف النموذج الثنائي على القرص (None إذا لم يوجد)"""
+        try:
+            st = os.stat(self.binary_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def is_stale(self):
+        """هل على القرص نسخة من النموذج غير التي حُمّلت؟"""
+        stamp = self.file_stamp()
+        return stamp is not None and stamp != self._stamp
+
+    def reloaded(self):
+        """
+        نسخة جديدة من نفس الصنف محمّلة من ملف النموذج الحالي. النسخة القديمة
+        لا تتغير، فالطلبات الجارية تكمل عليها والتبديل يكون بتغيير المرجع.
+        النموذج المشترك (shared) لنفس الملف يُستبدل أيضاً.
+        """
+        fresh = RiyadhDialectGenerative(self.model_path, order=self.order,
+                                        backoff_alpha=self.backoff_alpha)
+        fresh.load_model()
+        key = os.path.abspath(self.model_path)
+        with _shared_lock:
+            current = _shared_models.get(key)
+            if current is not None and current._stamp != fresh._stamp:
+                _shared_models[key] = fresh
+
+        if type(self) is RiyadhDialectGenerative:
+            return fresh
+        instance = type(self)(self.model_path)
+        instance.share_tables(fresh)
+        return instance
+
+    def share_tables(self, source):
+        """ربط هذه النسخة بجداول نموذج آخر محمّل (بدون نسخ المصفوفات)"""
+        self.order = source.order
+        self.vocab = source.vocab
+        self.word_ids = source.word_ids
+        self._tables = source._tables
+        self._unigram_counts = source._unigram_counts
+        self._reverse_table = source._reverse_table
+        self._normalized_ids = source._normalized_ids
+        self._np_tables = source._np_tables
+        self._start_id = source._start_id
+        self._end_id = source._end_id
+        self._mmap = source._mmap
+        self.count_bits = source.count_bits
+        self.heldout_percent = source.heldout_percent
+        self._stamp = source._stamp
+
+    def is_trained(self):
+        return self._tables[0].num_edges() > 0
+
+    def model_exists(self):
+        return os.path.exists(self.binary_path) or os.path.exists(self.model_path)
 
     def save_model(self):
-        with open(self.model_path, 'w', encoding='utf-8') as f:
+        """حفظ النموذج بالصيغة الثنائية (كتابة لملف مؤقت ثم استبدال ذري)"""
+        vocab_blob = "\n".join(self.vocab).encode("utf-8")
+
+        # ملف مؤقت باسم فريد بجانب الملف: مدرّبان متزامنان لا يكتبان في نفس الملف المؤقت
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.binary_path)),
+            prefix=os.path.basename(self.binary_path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER.pack(MODEL_MAGIC, MODEL_FORMAT_VERSION,
+                                     self.order, len(self.vocab), len(vocab_blob), self.count_bits,
+                                     self.heldout_percent or 0))
+                f.write(vocab_blob)
+                f.write(b"\0" * _padding(_HEADER.size + len(vocab_blob)))
+                for table in self._tables:
+                    num_contexts = len(self.vocab) if table.keys is None else len(table.keys)
+                    f.write(_TABLE_HEADER.pack(num_contexts, table.num_edges(), table.alias_bits()))
+                    f.write(b"\0" * _padding(_TABLE_HEADER.size))
+                    for typecode, section in table.sections():
+                        if sys.byteorder != "little":
+                            section = array(typecode, section)
+                            section.byteswap()
+                        data = memoryview(section).cast('B')
+                        f.write(data)
+                        f.write(b"\0" * _padding(len(data)))
+            os.replace(tmp_path, self.binary_path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+        self._stamp = self.file_stamp()
+        print(f"INFO: تم حفظ النموذج في '{self.binary_path}'.")
+
+    def export_json(self, path=None):
+        """تصدير انتقالات الكلمة الواحدة بصيغة JSON المقروءة (للتصحيح فقط)"""
+        path = path or self.model_path
+        with open(path, 'w', encoding='utf-8') as f:
             json.dump(self.model, f, ensure_ascii=False, indent=2)
-        print(f"INFO: تم حفظ النموذج في '{self.model_path}'.")
+        print(f"INFO: تم تصدير النموذج بصيغة JSON إلى '{path}'.")
 
     def load_model(self):
+        if os.path.exists(self.binary_path):
+            try:
+                self._open_binary(self.binary_path)
+                print("INFO: تم تحميل النموذج بنجاح.")
+                return
+            except ValueError as e:
+                print(f"WARNING: تعذر قراءة '{self.binary_path}' ({e}). جاري التحميل من JSON...")
+
         with open(self.model_path, 'r', encoding='utf-8') as f:
-            self.model = json.load(f)
-        print(f"INFO: تم تحميل النموذج بنجاح.")
+            self._load_from_dict(json.load(f))
+        print("INFO: تم تحميل النموذج بنجاح.")
+
+    def _open_binary(self, path):
+        """
+        فتح الملف الثنائي عبر mmap وربط المصفوفات به مباشرة (zero-copy).
+        على ويندوز يُقرأ الملف للذاكرة لأن الملف المربوط لا يمكن استبداله.
+        """
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if os.name == "nt":
+                buffer = f.read()
+            else:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(buffer) < _HEADER_V2.size:
+            raise ValueError("الملف أقصر من الترويسة")
+        magic, version = struct.unpack_from("<8sI", buffer, 0)
+        if magic != MODEL_MAGIC:
+            raise ValueError("ليس ملف نموذج نانو")
+        table_header = _TABLE_HEADER if version >= 4 else _TABLE_HEADER_V3
+        if version == MODEL_FORMAT_VERSION:
+            header = _HEADER
+            _, _, order, vocab_size, vocab_bytes, count_bits, heldout_percent = header.unpack_from(buffer, 0)
+        elif version in (4, 3):
+            header = _HEADER_V4
+            _, _, order, vocab_size, vocab_bytes, count_bits = header.unpack_from(buffer, 0)
+            heldout_percent = 0
+        elif version == 2:
+            header = _HEADER_V2
+            _, _, order, vocab_size, vocab_bytes = header.unpack_from(buffer, 0)
+            count_bits, heldout_percent = 32, 0
+        else:
+            raise ValueError(f"إصدار غير مدعوم {version}")
+        if not 2 <= order <= MAX_ORDER:
+            raise ValueError(f"رتبة غير مدعومة {order}")
+        if count_bits not in _COUNT_TYPECODES:
+            raise ValueError(f"عرض أعداد غير مدعوم {count_bits}")
+        if len(buffer) < header.size or heldout_percent >= 100:
+            raise ValueError("ترويسة غير صالحة")
+
+        view = memoryview(buffer)
+        pos = header.size
+        vocab = bytes(view[pos:pos + vocab_bytes]).decode("utf-8").split("\n")
+        pos += vocab_bytes + _padding(header.size + vocab_bytes)
+
+        def section(typecode, length):
+            nonlocal pos
+            size = length * array(typecode).itemsize
+            if pos + size > len(buffer):
+                raise ValueError("الملف مقطوع")
+            data = view[pos:pos + size].cast(typecode)
+            pos += size + _padding(size)
+            if sys.byteorder != "little":
+                data = array(typecode, data)
+                data.byteswap()
+            return data
+
+        tables = []
+        for n in range(order - 1):
+            if pos + table_header.size > len(buffer):
+                raise ValueError("الملف مقطوع")
+            num_contexts, num_edges, *rest = table_header.unpack_from(buffer, pos)
+            pos += table_header.size + _padding(table_header.size)
+            alias_bits = rest[0] if rest else 32
+            if alias_bits not in _ALIAS_TYPECODES:
+                raise ValueError(f"عرض Alias غير مدعوم {alias_bits}")
+            prob_type, idx_type = _ALIAS_TYPECODES[alias_bits]
+            keys = None if n == 0 else section('Q', num_contexts)
+            tables.append(TransitionTable(
+                keys,
+                section('I', num_contexts + 1),
+                section('I', num_edges),
+                section(_COUNT_TYPECODES[count_bits], num_edges),
+                section(prob_type, num_edges),
+                section(idx_type, num_edges),
+            ))
+
+        self.order = order
+        self.count_bits = count_bits
+        self.heldout_percent = heldout_percent
+        self.vocab = vocab
+        self.word_ids = {word: i for i, word in enumerate(vocab)}
+        self._tables = tables
+        self._unigram_counts = None
+        self._reverse_table = None
+        self._normalized_ids = None
+        self._np_tables = None
+        self._start_id = self.word_ids[self._start_token]
+        self._end_id = self.word_ids[self._end_token]
+        self._mmap = buffer
+        self._stamp = stamp
+
+    def _choose_next_id(self, history, rand=random.random):
+        """
+        سحب رقم الكلمة التالية: أطول سياق معروف من آخر الكلمات،
+        ثم التراجع لسياق أقصر (stupid backoff).
+        """
+        tables = self._tables
+        context = 0
+        best = None
+        for n in range(1, min(len(tables), len(history)) + 1):
+            context |= history[-n] << (ID_BITS * (n - 1))
+            table = tables[n - 1]
+            start, end = table.row_bounds(context)
+            if start == end:
+                break
+            best = (table, start, end)
+
+        if best is None:
+            return self._end_id
+        table, start, end = best
+        return table.sample(start, end, rand)
 
     def _choose_next_word(self, current_word):
-        if current_word not in self.model or not self.model[current_word]:
+        word_id = self.word_ids.get(current_word)
+        if word_id is None:
             return self._end_token
+        return self.vocab[self._choose_next_id([word_id])]
 
-        next_words_pool = self.model[current_word]
-        words = list(next_words_pool.keys())
-        weights = list(next_words_pool.values())
+    def _unigrams(self):
+        """عدد ظهور كل كلمة (ككلمة تالية) محسوب من جدول الكلمة الواحدة"""
+        if self._unigram_counts is None:
+            unigrams = array('I', bytes(4 * len(self.vocab)))
+            table = self._tables[0]
+            for next_id, count in zip(table.successors, table.counts):
+                unigrams[next_id] += count
+            self._unigram_counts = unigrams
+        return self._unigram_counts
 
-        return random.choices(words, weights=weights, k=1)[0]
+    def _score_ids(self, history, next_id):
+        """درجة stupid backoff للكلمة التالية بعد سياق من الأرقام"""
+        tables = self._tables
+        n = min(len(tables), len(history))
+        penalty = 1.0
+        while n > 0:
+            table = tables[n - 1]
+            start, end = table.row_bounds(pack_ids(history[-n:]))
+            if start != end:
+                count = table.count_of(start, end, next_id)
+                if count:
+                    return penalty * count / sum(table.counts[start:end])
+            penalty *= self.backoff_alpha
+            n -= 1
 
-    def generate_sentence(self, start_word=None, max_length=15):
-        if not self.model:
+        unigrams = self._unigrams()
+        total = sum(unigrams)
+        if next_id < len(unigrams) and total:
+            return penalty * unigrams[next_id] / total
+        return 0.0
+
+    def score(self, history, next_word):
+        """
+        درجة الكلمة التالية بعد قائمة كلمات (stupid backoff: نسبة العد في أطول
+        سياق ظهرت فيه، مضروبة في backoff_alpha لكل تراجع).
+        """
+        next_id = self.word_ids.get(next_word)
+        if next_id is None:
+            return 0.0
+        ids = [self._start_id]
+        ids.extend(self.word_ids.get(word, UNKNOWN_ID) for word in history)
+        return self._score_ids(ids, next_id)
+
+    def _reverse(self):
+        """جدول الكلمة السابقة (يُبنى من جدول الكلمة الواحدة عند أول طلب)"""
+        if self._reverse_table is None:
+            self._reverse_table = self._tables[0].reversed()
+        return self._reverse_table
+
+    def _normalized_word_ids(self):
+        """
+        فهرس الشكل الموحّد (arabic_tokenizer.normalize) -> رقم أكثر أشكال الكلمة
+        تكراراً، ليطابق "إجتماع" الكلمة "اجتماع" في القاموس. يُبنى عند أول طلب.
+        """
+        if self._normalized_ids is None:
+            unigrams = self._unigrams()
+            index = {}
+            for word, word_id in self.word_ids.items():
+                if word_id >= len(unigrams) or not unigrams[word_id]:
+                    continue
+                key = normalize(word)
+                current = index.get(key)
+                if current is None or unigrams[word_id] > unigrams[current]:
+                    index[key] = word_id
+            self._normalized_ids = index
+        return self._normalized_ids
+
+    def find_anchor(self, text, preferred=()):
+        """
+        أفضل كلمة في النص لبناء الرد حولها: كلمة من preferred (كلمات موضوع)
+        إن وجدت، وإلا أندر كلمة معروفة للنموذج. البحث عبر فهرس word_ids
+        (ثم الفهرس الموحّد للكلمات المكتوبة بشكل آخر)، فالتكلفة بعدد كلمات
+        النص وليس بحجم النموذج. يرجع None إذا لم توجد.
+        """
+        unigrams = self._unigrams()
+        best, best_rank = None, None
+        for word in surface_words(text):
+            word_id = self.word_ids.get(word)
+            if word_id is None or word_id >= len(unigrams) or not unigrams[word_id]:
+                word_id = self._normalized_word_ids().get(normalize(word))
+                if word_id is None:
+                    continue
+                word = self.vocab[word_id]
+            rank = (word not in preferred, unigrams[word_id])
+            if best_rank is None or rank < best_rank:
+                best, best_rank = word, rank
+        return best
+
+    def _backward_ids(self, anchor_id, max_words, rand=random.random):
+        """الكلمات التي تسبق المرساة (من الأقرب للأبعد) حتى بداية جملة"""
+        reverse = self._reverse()
+        words = []
+        current, last_id = anchor_id, -1
+        while len(words) < max_words:
+            start, end = reverse.row_bounds(current)
+            if start == end:
+                break
+            prev_id = reverse.sample(start, end, rand)
+            if prev_id == self._start_id or prev_id == last_id:
+                break
+            words.append(prev_id)
+            current, last_id = prev_id, current
+        return words
+
+    def generate_around(self, anchor_word, max_length=15, rand=random.random):
+        """
+        توليد جملة تحتوي كلمة المرساة في أي موضع: مشي للخلف عبر الجدول
+        العكسي حتى بداية جملة، ثم إكمال للأمام بالسياق الكامل كالمعتاد.
+        """
+        if not self.is_trained():
             return "لم يتم تدريب النموذج بعد. يرجى تشغيل دالة train() أولاً."
 
-        if start_word and start_word in self.model:
-            current_word = start_word
-        else:
-            current_word = self._start_token
+        anchor_id = self.word_ids.get(anchor_word)
+        if anchor_id is None or anchor_id in (self._start_id, self._end_id):
+            return self._walk(None, max_length, rand)
 
-        sentence = []
-        if current_word != self._start_token:
-            sentence.append(current_word)
+        backward = self._backward_ids(anchor_id, max_length // 2, rand)
+        history = [self._start_id] + backward[::-1] + [anchor_id]
+        return self._walk_from(history, max_length, rand)
+
+    def _start_history(self, start_word):
+        """بداية السلسلة: _START_ وبعدها كلمة البداية إذا كان لها انتقالات"""
+        if start_word:
+            word_id = self.word_ids.get(start_word)
+            if word_id is not None:
+                start, end = self._tables[0].row_bounds(word_id)
+                if start != end:
+                    return [self._start_id, word_id]
+        return [self._start_id]
+
+    def _walk(self, start_word, max_length, rand=random.random):
+        return self._walk_from(self._start_history(start_word), max_length, rand)
+
+    def _walk_from(self, history, max_length, rand=random.random):
+        """إكمال سلسلة أرقام (أولها _START_) للأمام حتى نهاية الجملة"""
+        sentence = [self.vocab[word_id] for word_id in history[1:]]
 
         # منع الحلقات المفرغة البسيطة
-        last_word = ""
+        last_id = -1
         while len(sentence) < max_length:
-            next_word = self._choose_next_word(current_word)
-            if next_word == self._end_token or next_word == last_word:
+            current_id = history[-1]
+            next_id = self._choose_next_id(history, rand)
+            if next_id == self._end_id or next_id == last_id:
                 break
 
-            sentence.append(next_word)
-            last_word = current_word
-            current_word = next_word
+            sentence.append(self.vocab[next_id])
+            history.append(next_id)
+            last_id = current_id
 
         return " ".join(sentence)
 
+    def generate_sentence(self, start_word=None, max_length=15):
+        if not self.is_trained():
+            return "لم يتم تدريب النموذج بعد. يرجى تشغيل دالة train() أولاً."
+
+        return self._walk(start_word, max_length)
+
+    def generate_batch(self, n, start_words=None, max_length=15, seed=None):
+        """
+        توليد n جملة دفعة واحدة.
+
+        start_words: None، أو كلمة واحدة لكل الجمل، أو قائمة بطول n.
+        مع NumPy تتقدم كل السلاسل خطوة بخطوة معاً (سحب واحد متجه لكل خطوة)،
+        وبدونه تُولَّد الجمل واحدة واحدة بنفس المنطق.
+        """
+        if not self.is_trained():
+            return ["لم يتم تدريب النموذج بعد. يرجى تشغيل دالة train() أولاً."] * n
+
+        if start_words is None or isinstance(start_words, str):
+            start_words = [start_words] * n
+        elif len(start_words) != n:
+            raise ValueError("start_words يجب أن تكون بطول n")
+
+        if np is None:
+            rand = random.Random(seed).random
+            return [self._walk(word, max_length, rand) for word in start_words]
+
+        return self._generate_batch_numpy(start_words, max_length, np.random.default_rng(seed))
+
+    def _numpy_tables(self):
+        """عروض NumPy على مصفوفات الجداول (بدون نسخ، تُبنى مرة لكل نموذج)"""
+        if self._np_tables is None:
+            self._np_tables = [
+                (
+                    None if table.keys is None else np.frombuffer(table.keys, dtype=np.uint64),
+                    np.frombuffer(table.offsets, dtype=np.uint32).astype(np.int64),
+                    np.frombuffer(table.successors, dtype=np.uint32),
+                    # الاحتمالات المكممة تُحوَّل مرة واحدة إلى float32 من 0 إلى 1
+                    np.frombuffer(table.alias_prob, dtype=np.float32) if table.alias_one == 1.0
+                    else np.frombuffer(table.alias_prob, dtype=np.uint16) / np.float32(table.alias_one),
+                    np.frombuffer(table.alias_idx,
+                                  dtype=np.uint32 if _typecode(table.alias_idx) == 'I' else np.uint16),
+                )
+                for table in self._tables
+            ]
+        return self._np_tables
+
+    def _generate_batch_numpy(self, start_words, max_length, rng):
+        tables = self._numpy_tables()
+        n = len(start_words)
+
+        # seq[:, 0] = _START_، وطول كل سلسلة في hist_len
+        seq = np.full((n, max_length + 2), self._start_id, dtype=np.int64)
+        hist_len = np.ones(n, dtype=np.int64)
+        for row, word in enumerate(start_words):
+            history = self._start_history(word)
+            if len(history) == 2:
+                seq[row, 1] = history[1]
+                hist_len[row] = 2
+        last_id = np.full(n, -1, dtype=np.int64)
+        alive = hist_len - 1 < max_length
+
+        while True:
+            rows = np.flatnonzero(alive)
+            if rows.size == 0:
+                break
+            m = rows.size
+            lengths = hist_len[rows]
+
+            # أطول سياق معروف لكل سلسلة (نفس منطق _choose_next_id)
+            level = np.full(m, -1, dtype=np.int64)
+            start = np.zeros(m, dtype=np.int64)
+            end = np.zeros(m, dtype=np.int64)
+            context = np.zeros(m, dtype=np.uint64)
+            ok = np.ones(m, dtype=bool)
+            for k, (keys, offsets, _, _, _) in enumerate(tables, start=1):
+                ok &= lengths >= k
+                if not ok.any():
+                    break
+                ids = seq[rows, np.maximum(lengths - k, 0)].astype(np.uint64)
+                context |= ids << np.uint64(ID_BITS * (k - 1))
+                if keys is None:
+                    s = offsets[context]
+                    e = offsets[context + np.uint64(1)]
+                elif keys.size:
+                    pos = np.minimum(np.searchsorted(keys, context), keys.size - 1)
+                    hit = keys[pos] == context
+                    s = np.where(hit, offsets[pos], 0)
+                    e = np.where(hit, offsets[pos + 1], 0)
+                else:
+                    break
+                ok &= e > s
+                start = np.where(ok, s, start)
+                end = np.where(ok, e, end)
+                level = np.where(ok, k - 1, level)
+
+            # سحب Alias متجه لكل السلاسل في هذه الخطوة
+            draws = rng.random((2, m))
+            next_ids = np.full(m, self._end_id, dtype=np.int64)
+            for k, (_, _, successors, alias_prob, alias_idx) in enumerate(tables):
+                sel = level == k
+                if not sel.any():
+                    continue
+                row_start = start[sel]
+                degree = end[sel] - row_start
+                idx = row_start + np.minimum((draws[0, sel] * degree).astype(np.int64), degree - 1)
+                keep = draws[1, sel] < alias_prob[idx]
+                idx = np.where(keep, idx, row_start + alias_idx[idx])
+                next_ids[sel] = successors[idx]
+
+            current = seq[rows, lengths - 1]
+            stop = (next_ids == self._end_id) | (next_ids == last_id[rows])
+            go = rows[~stop]
+            seq[go, hist_len[go]] = next_ids[~stop]
+            hist_len[go] += 1
+            last_id[go] = current[~stop]
+            alive[rows[stop]] = False
+            alive[go] = hist_len[go] - 1 < max_length
+
+        vocab = self.vocab
+        return [
+            " ".join(vocab[word_id] for word_id in seq[row, 1:hist_len[row]].tolist())
+            for row in range(n)
+        ]
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="تدريب ودمج نموذج لهجة الرياض")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="تدريب النموذج من ملف البيانات")
+    train_parser.add_argument("--corpus", default="corpus.json")
+    train_parser.add_argument("--model", default="riyadh_model.json")
+    train_parser.add_argument("--order", type=int, default=3)
+    train_parser.add_argument("--workers", type=int, default=None, help="عدد العمليات (الافتراضي: كل الأنوية)")
+    train_parser.add_argument("--incremental", action="store_true", help="تدريب تراكمي على الجمل الجديدة فقط")
+    train_parser.add_argument("--memory-mb", type=float, default=None,
+                              help=f"ميزانية ذاكرة للعدّ التقريبي، {MIN_MEMORY_BUDGET_MB} على الأقل "
+                                   "(الافتراضي: عدّ دقيق). جودة أقل وبدون تدريب تراكمي")
+    train_parser.add_argument("--heldout-percent", type=int, default=None,
+                              help="نسبة جمل تُحجز للتقييم ولا يُتدرب عليها "
+                                   "(الافتراضي: نسبة النموذج المحفوظ، أو 0)")
+
+    prune_parser = subparsers.add_parser("prune", help="تصغير النموذج بالحذف والتكميم مع تقرير الحجم والجودة")
+    prune_parser.add_argument("--model", default="riyadh_model.json")
+    prune_parser.add_argument("--output", default=None, help="مسار النموذج الناتج (الافتراضي: نفس الملف)")
+    prune_parser.add_argument("--min-count", type=int, default=1)
+    prune_parser.add_argument("--top-k", type=int, default=None, help="أقصى عدد انتقالات لكل سياق")
+    prune_parser.add_argument("--bits", type=int, choices=sorted(_COUNT_TYPECODES), default=32,
+                              help="عرض الأعداد المحفوظة")
+    prune_parser.add_argument("--heldout", required=True,
+                              help="ملف جمل لم يتدرب عليها النموذج لقياس الحيرة "
+                                   "(جمل التدريب نفسها تُظهر خسارة التصغير أقل من حقيقتها)")
+    prune_parser.add_argument("--heldout-size", type=int, default=2000)
+
+    merge_parser = subparsers.add_parser("merge", help="دمج ملفات نماذج في نموذج واحد")
+    merge_parser.add_argument("output", help="مسار النموذج الناتج")
+    merge_parser.add_argument("models", nargs="+", help="ملفات النماذج المراد دمجها")
+
+    args = parser.parse_args()
+    if args.command == "train":
+        nano = RiyadhDialectGenerative(args.model, order=args.order, memory_budget_mb=args.memory_mb,
+                                       heldout_percent=args.heldout_percent)
+        nano.train(args.corpus, force_retrain=not args.incremental,
+                   incremental=args.incremental, workers=args.workers)
+    elif args.command == "prune":
+        nano = RiyadhDialectGenerative(args.model)
+        nano.load_model()
+        if not os.path.exists(nano.binary_path):
+            nano.save_model()  # النموذج القديم بصيغة JSON: نحفظه ثنائياً للمقارنة
+        heldout = list(islice(iter_sentences(args.heldout), args.heldout_size))
+        before = nano.size_report(heldout)
+        nano.save_pruned(args.min_count, args.top_k, args.bits, args.output)
+        after = nano.size_report(heldout)
+        print(f"{'':12}{'قبل':>14}{'بعد':>14}")
+        for key, fmt in (("bytes", "{:,}"), ("edges", "{:,}"), ("load_ms", "{:.2f}"), ("perplexity", "{:.2f}")):
+            print(f"{key:12}{fmt.format(before[key]):>14}{fmt.format(after[key]):>14}")
+    else:
+        RiyadhDialectGenerative.merge_models(args.models, args.output)
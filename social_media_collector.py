@@ -3,6 +3,8 @@ import json
 import random
 from typing import List, Dict
 import re
+from itertools import compress
+from quality_filter import BatchValidator
 
 class SocialMediaCollector:
     """جامع النصوص من محادثات وسائل التواصل الاجتماعي"""
@@ -10,6 +12,10 @@ class SocialMediaCollector:
     def __init__(self):
         self.riyadh_dialect_patterns = self.setup_riyadh_patterns()
         self.conversation_types = self.setup_conversation_types()
+        # فحص الجودة: 5 أحرف على الأقل، حتى 20 كلمة، 60% عربي، وكلمة من لهجة الرياض
+        self.quality_validator = BatchValidator(
+            min_length=5, max_words=20, min_arabic_ratio=0.6, strip=True,
+            phrases=[word for words in self.riyadh_dialect_patterns.values() for word in words])
     
     def setup_riyadh_patterns(self) -> Dict:
         """أنماط لهجة أهل الرياض المميزة"""
@@ -216,10 +222,8 @@ class SocialMediaCollector:
         all_conversations.extend(additional_convos)
         
         # تصفية وتحسين
-        quality_conversations = []
-        for conv in all_conversations:
-            if self.is_quality_conversation(conv):
-                quality_conversations.append(conv)
+        quality_conversations = list(compress(all_conversations,
+                                              self.quality_validator.mask(all_conversations)))
         
         # خلط وإرجاع العدد المطلوب
         random.shuffle(quality_conversations)
@@ -259,28 +263,7 @@ class SocialMediaCollector:
     
     def is_quality_conversation(self, text: str) -> bool:
         """فحص جودة المحادثة"""
-        # فحوصات الجودة
-        if len(text.strip()) < 5:  # قصير جداً
-            return False
-        
-        if len(text.split()) > 20:  # طويل جداً
-            return False
-        
-        # فحص الأحرف العربية
-        arabic_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-        if arabic_chars < len(text) * 0.6:  # قليل العربية
-            return False
-        
-        # فحص وجود كلمات من لهجة الرياض
-        riyadh_words_found = 0
-        text_lower = text.lower()
-        
-        for category, words in self.riyadh_dialect_patterns.items():
-            for word in words:
-                if word in text_lower:
-                    riyadh_words_found += 1
-        
-        return riyadh_words_found > 0
+        return self.quality_validator(text)
     
     def export_to_corpus(self, output_file: str = "social_media_corpus.json"):
         """تصدير إلى ملف corpus"""
@@ -0,0 +1,96 @@
+# template_engine.py - تنويعات فريدة من قوالب الجمل (سحب بدون إعادة بحساب الفهارس)
+import math
+import random
+from bisect import bisect_right
+from itertools import accumulate, islice
+from string import Formatter
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+
+class Template:
+    """
+    قالب بخانات مسماة مثل "{feeling} اليوم لأن {reason}". التركيبات = حاصل
+    الضرب الديكارتي لمفردات الخانات، ولكل تركيبة رقم من 0 إلى len-1.
+    """
+
+    def __init__(self, pattern: str, slots: Dict[str, Sequence[str]]):
+        self.pattern = pattern
+        # الخانات بترتيب ظهورها (الخانة المكررة تأخذ نفس القيمة)
+        self.fields = list(dict.fromkeys(
+            name for _, name, _, _ in Formatter().parse(pattern) if name))
+        self.vocabularies = [tuple(slots[name]) for name in self.fields]
+        self.size = math.prod(len(vocabulary) for vocabulary in self.vocabularies)
+
+    def __len__(self):
+        return self.size
+
+    def render(self, index: int) -> str:
+        """التركيبة رقم index: أرقامه بنظام عدّ مختلط الأساس (أساس كل خانة = عدد مفرداتها)"""
+        values = {}
+        for name, vocabulary in zip(reversed(self.fields), reversed(self.vocabularies)):
+            index, digit = divmod(index, len(vocabulary))
+            values[name] = vocabulary[digit]
+        return self.pattern.format(**values)
+
+
+def permuted_indices(size: int, rng: random.Random) -> Iterator[int]:
+    """
+    الأعداد 0..size-1 كل عدد مرة واحدة بترتيب مخلوط، بدون قائمة في الذاكرة:
+    i -> (a*i + b) mod size تبديل كامل لأن a أولي نسبياً مع size.
+    """
+    if size <= 0:
+        return
+    a = rng.randrange(1, size) if size > 2 else 1
+    while math.gcd(a, size) != 1:
+        a += 1
+    b = rng.randrange(size)
+    for i in range(size):
+        yield (a * i + b) % size
+
+
+class TemplateSet:
+    """عدة قوالب كفضاء تركيبات واحد: الرقم الكلي -> (القالب، رقم التركيبة داخله)"""
+
+    def __init__(self, templates: Iterable[Template]):
+        self.templates = [template for template in templates if len(template)]
+        self.offsets = list(accumulate(len(template) for template in self.templates))
+
+    def __len__(self):
+        return self.offsets[-1] if self.offsets else 0
+
+    def render(self, index: int) -> str:
+        i = bisect_right(self.offsets, index)
+        return self.templates[i].render(index - (self.offsets[i - 1] if i else 0))
+
+    def sample(self, count: Optional[int] = None, seed=None) -> Iterator[str]:
+        """
+        count تركيبة مختلفة (أو كل التركيبات) بدون سحب مكرر أو رفض: كل رقم
+        من التبديل يُحوَّل مباشرة إلى تركيبة، فالتكلفة O(count). نفس seed =
+        نفس الجمل بنفس الترتيب، وseed=None يأخذ البذرة من random العام.
+        """
+        rng = random.Random(random.getrandbits(64) if seed is None else seed)
+        total = len(self)
+        count = total if count is None else min(count, total)
+        for index in islice(permuted_indices(total, rng), count):
+            yield self.render(index)
+
+
+def variation_templates(base_sentences: Iterable[str],
+                        substitutions: Sequence[Tuple[str, Sequence[str]]],
+                        prefixes: Sequence[str] = ("",),
+                        suffixes: Sequence[str] = ("",)) -> TemplateSet:
+    """
+    قالب لكل جملة أساسية: بادئة + الجملة + لاحقة، وكل كلمة من substitutions
+    (أزواج: كلمة، بدائلها) موجودة في الجملة تصبح خانة بتلك البدائل.
+    """
+    templates = []
+    for base in base_sentences:
+        pattern = base.replace("{", "{{").replace("}", "}}")
+        slots = {"prefix": prefixes, "suffix": suffixes}
+        for i, (word, replacements) in enumerate(substitutions):
+            if word in pattern:
+                name = f"slot{i}"
+                pattern = pattern.replace(word, "{" + name + "}")
+                slots[name] = replacements
+        templates.append(Template("{prefix}" + pattern + "{suffix}", slots))
+    return TemplateSet(templates)
@@ -0,0 +1,84 @@
+# test_arabic_tokenizer.py - اختبار التقسيم المشترك: توحيد الحروف، حذف السوابق، الذاكرة المؤقتة والدفعات
+import traceback
+
+from arabic_tokenizer import (
+    analyze, batch_words, keyword_map, keyword_set, normalize, strip_clitics, tokenize,
+)
+from continuous_learning import is_high_quality_sentence
+
+
+def test_normalize_letters_and_diacritics():
+    """الهمزات على الألف ← ا، التاء المربوطة ← ه، الألف المقصورة ← ي، بدون تشكيل أو تطويل"""
+    assert normalize("أحمد إسلام آمال ٱلله") == "احمد اسلام امال الله"
+    assert normalize("مدرسة ليلى") == "مدرسه ليلي"
+    assert normalize("جمـــيل") == "جميل"
+    assert normalize("مَرْحَبًا بِكُمْ") == "مرحبا بكم"
+    assert normalize("Hello يا Ahmed") == "hello يا ahmed"
+
+
+def test_strip_clitics():
+    """السوابق تُحذف واحدة واحدة، بدون أن يقل الجذع عن ثلاثة حروف"""
+    assert strip_clitics("وبالبيت") == ["بالبيت", "البيت", "بيت"]
+    assert strip_clitics("فالسوق") == ["السوق", "سوق"]
+    assert strip_clitics("والله") == ["الله"]
+    assert strip_clitics("الله") == []
+    assert strip_clitics("ولد") == []
+
+
+def test_tokenize_terms_and_cache():
+    """الكلمات الموحّدة + جذوعها + العبارات، ونفس الرسالة تُقسَّم مرة واحدة"""
+    tokens = analyze("والله، الجوّ حلو!! إن شاء الله")
+    assert tokens.words == ("والله", "الجو", "حلو", "ان", "شاء", "الله")
+    assert len(tokens) == 6
+    assert {"الله", "ان شاء الله", "الجو حلو"} <= tokens.terms
+    assert "جو" not in tokens.terms
+
+    tokenize.cache_clear()
+    first = tokenize("صباح الخير يا الغالي")
+    assert tokenize("صباح الخير يا الغالي") is first
+    info = tokenize.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_batch_words_matches_analyze():
+    """batch_words لعدة نصوص = words لكل نص وحده، مع الترقيم والنصوص الفارغة"""
+    texts = ["صباح الخير", "كيفك؟ 😊 تمام", "", "أهلاً وسهلاً!", "ok فهمت", "فيه\0فاصل"]
+    assert batch_words(texts) == [list(analyze(text).words) for text in texts]
+    assert batch_words(texts[:1] + texts[4:5]) == [["صباح", "الخير"], ["ok", "فهمت"]]
+    assert batch_words([]) == []
+
+
+def test_keywords_match_clitic_forms():
+    """الكلمات المفتاحية تطابق أشكالها بالسوابق: "والله" تطابق "الله" في فحص الجودة"""
+    keywords = keyword_set(["الله", "إن شاء الله"])
+    assert keywords == {"الله", "ان شاء الله"}
+    assert keyword_map(["مدرسة"]) == {"مدرسه": "مدرسة"}
+    assert "الله" in tokenize("عادي والله متعب").terms
+    # "الله" (بالسابقة) و"متعب" كلمتان مهمتان، فالجملة تُقبل في التعلم المستمر
+    assert is_high_quality_sentence("عادي والله متعب")
+    assert not is_high_quality_sentence("عادي واحد متعب")
+
+
+def main():
+    tests = [
+        test_normalize_letters_and_diacritics,
+        test_strip_clitics,
+        test_tokenize_terms_and_cache,
+        test_batch_words_matches_analyze,
+        test_keywords_match_clitic_forms,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            print(traceback.format_exc())
+    print(f"\n🎯 النتيجة: {passed}/{len(tests)} اختبارات نجحت")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,148 @@
+# test_corpus_sqlite.py - اختبار قاعدة الجمل في SQLite: منع التكرار، الأوزان، البحث، والتدريب منها
+import json
+import os
+import sqlite3
+import tempfile
+import traceback
+
+from corpus_sqlite import SQLiteCorpusStore, _signed
+from corpus_store import iter_weighted, open_corpus, sentence_hash
+from riyadh_dialect_generative_module import RiyadhDialectGenerative
+
+SENTENCES = [f"جملة رقم {i} عن الشغل والقهوة" for i in range(30)]
+
+# جدول الجمل قبل إضافة عمود الوزن
+_OLD_SCHEMA = """
+CREATE TABLE sentences (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    hash INTEGER NOT NULL UNIQUE,
+    source TEXT,
+    category TEXT,
+    quality REAL,
+    added_at TEXT
+);
+"""
+
+
+def test_add_new_skips_duplicates():
+    """add_new يتجاهل الموجود والمكرر داخل الدفعة، ويرجع (المضاف، الإجمالي)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCorpusStore(os.path.join(tmp, "corpus.sqlite"))
+        assert store.add_new(SENTENCES[:10], source="test") == (10, 10)
+        assert store.add_new(SENTENCES[5:15] + SENTENCES[12:15]) == (5, 15)
+        assert store.add_new(SENTENCES[:15]) == (0, 15)
+        assert store.add_new([]) == (0, 15)
+        assert list(store) == SENTENCES[:15]
+        assert len(store) == 15 and store.stats()["by_source"] == {"test": 10, "": 5}
+        store.close()
+
+
+def test_iter_weighted_keeps_order():
+    """الأوزان بترتيب الإضافة، ووزن الجملة المكررة يبقى وزنها الأول"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.sqlite")
+        store = SQLiteCorpusStore(path)
+        store.add_new([(SENTENCES[0], 3), SENTENCES[1], (SENTENCES[2], 2)])
+        store.add_new([(SENTENCES[1], 5), (SENTENCES[3], 4)])
+        expected = [(SENTENCES[0], 3), (SENTENCES[1], 1), (SENTENCES[2], 2), (SENTENCES[3], 4)]
+        assert list(store.iter_weighted()) == expected
+        assert list(iter_weighted(path)) == expected
+        assert isinstance(open_corpus(path), SQLiteCorpusStore)
+        assert store.stats()["total_weight"] == 10
+        store.close()
+
+
+def test_weight_column_migration():
+    """قاعدة أُنشئت قبل عمود الوزن تُفتح بإضافة العمود، والجمل القديمة بوزن 1"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.sqlite")
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.executescript(_OLD_SCHEMA)
+            conn.executemany("INSERT INTO sentences (text, hash) VALUES (?, ?)",
+                             [(s, _signed(sentence_hash(s))) for s in SENTENCES[:3]])
+        conn.close()
+
+        store = SQLiteCorpusStore(path)
+        assert store.add_new([(SENTENCES[2], 7), (SENTENCES[3], 2)]) == (1, 4)
+        assert list(store.iter_weighted()) == [(s, 1) for s in SENTENCES[:3]] + [(SENTENCES[3], 2)]
+        store.close()
+
+
+def test_search_fts_and_like():
+    """البحث بالكلمات الموحّدة عبر FTS5، وبـ LIKE على نفس الكلمات الموحّدة بدون FTS"""
+    sentences = ["رحت السوق واشتريت قهوة", "الجو حار مرة اليوم", "أبي قهوة عربية بالهيل"]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCorpusStore(os.path.join(tmp, "corpus.sqlite"))
+        store.add_new(sentences)
+        if store.fts:
+            # "قهوه" بالهاء تطابق "قهوة" بعد التوحيد، والترتيب حسب bm25
+            assert sorted(store.search("قهوه")) == sorted([sentences[0], sentences[2]])
+            assert store.search("الجو") == [sentences[1]]
+            assert len(store.search("قهوة الجو", limit=2)) == 2
+        assert store.search("!!") == []
+        store.compact()
+        store.close()
+
+        fallback = SQLiteCorpusStore(os.path.join(tmp, "like.sqlite"), fts=False)
+        fallback.add_new(sentences)
+        assert not fallback.fts
+        assert fallback.search("السوق") == [sentences[0]]
+        assert sorted(fallback.search("قهوه")) == sorted([sentences[0], sentences[2]])
+        assert sorted(fallback.search("حار عربية")) == sorted([sentences[1], sentences[2]])
+        assert fallback.search("حار عربية", limit=1) in ([sentences[1]], [sentences[2]])
+        fallback.close()
+
+
+def test_train_from_sqlite():
+    """التدريب (الكامل والتراكمي) من قاعدة SQLite = التدريب من ملف JSON بنفس الجمل والأوزان"""
+    entries = [(f"{a} {b} {c}", 1 + i % 3) for i, (a, b, c) in enumerate(
+        (a, b, c) for a in ("انا", "احنا", "هو") for b in ("رايح", "جاي") for c in ("البيت", "السوق"))]
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "corpus.sqlite")
+        store = SQLiteCorpusStore(database)
+        store.add_new(entries[:8])
+        model = RiyadhDialectGenerative(os.path.join(tmp, "model.json"))
+        model.train(database, force_retrain=True)
+        store.add_new(entries[8:])
+        model = RiyadhDialectGenerative(model.model_path)
+        model.train(database, incremental=True)
+        store.close()
+
+        corpus = os.path.join(tmp, "corpus.json")
+        with open(corpus, 'w', encoding='utf-8') as f:
+            json.dump({"sentences": [{"text": text, "weight": weight} for text, weight in entries]},
+                      f, ensure_ascii=False)
+        full = RiyadhDialectGenerative(os.path.join(tmp, "full.json"))
+        full.train(corpus, force_retrain=True)
+
+        copy = RiyadhDialectGenerative(model.model_path)
+        copy.load_model()
+        assert copy.vocab == full.vocab
+        assert copy.model == full.model
+
+
+def main():
+    tests = [
+        test_add_new_skips_duplicates,
+        test_iter_weighted_keeps_order,
+        test_weight_column_migration,
+        test_search_fts_and_like,
+        test_train_from_sqlite,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            print(traceback.format_exc())
+    print(f"\n🎯 النتيجة: {passed}/{len(tests)} اختبارات نجحت")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,262 @@
+# test_corpus_store.py - اختبار قاعدة الجمل (الأجزاء، الدمج، الأوزان) وفهرس البصمات
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import traceback
+
+from corpus_store import (
+    CorpusStore, CorpusWriter, is_heldout, iter_sentences, iter_weighted, sentence_hash,
+    write_sentences,
+)
+from hash_index import BloomFilter, HashIndex, read_hashes, write_hashes
+
+SENTENCES = [f"جملة رقم {i} عن الشغل والقهوة" for i in range(50)]
+
+
+def write_corpus(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"sentences": entries}, f, ensure_ascii=False)
+
+
+def test_iter_weighted_formats():
+    """الجمل النصية بوزن 1 والموزونة بوزنها، في JSON وJSONL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        entries = ["صباح الخير", {"text": "مساء الخير", "weight": 3}]
+        write_corpus(os.path.join(tmp, "corpus.json"), entries)
+        write_sentences(os.path.join(tmp, "corpus.jsonl"), entries)
+
+        for name in ("corpus.json", "corpus.jsonl"):
+            path = os.path.join(tmp, name)
+            assert list(iter_weighted(path)) == [("صباح الخير", 1), ("مساء الخير", 3)]
+            assert list(iter_sentences(path)) == ["صباح الخير", "مساء الخير"]
+
+
+def test_add_new_skips_duplicates():
+    """add_new يضيف الجديد فقط (ولا المكرر داخل الدفعة) كجزء جديد، بنفس الترتيب"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.json")
+        write_corpus(path, SENTENCES[:30])
+        store = CorpusStore(path)
+
+        added, total = store.add_new(SENTENCES[20:40] + SENTENCES[35:40])
+        assert (added, total) == (10, 40)
+        assert store.add_new(SENTENCES[:40]) == (0, 40)
+        assert list(store) == SENTENCES[:40]
+        assert os.path.exists(os.path.join(store.segment_dir, "segment-000001.jsonl"))
+
+        # نسخة جديدة تبني فهرسها من القرص وترى نفس الجمل
+        assert CorpusStore(path).add_new(SENTENCES[:45]) == (5, 45)
+
+
+def test_compaction_keeps_order_and_weights():
+    """الدمج يكتب الأساسي + الأجزاء في ملف واحد بنفس الترتيب والأوزان ويحذف الأجزاء"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.json")
+        write_corpus(path, SENTENCES[:10])
+        store = CorpusStore(path, max_segments=100)
+        for start in range(10, 50, 10):
+            store.append([(sentence, 2) for sentence in SENTENCES[start:start + 10]])
+        before = list(store.iter_weighted())
+
+        assert store.compact() == 50
+        assert list(iter_weighted(path)) == before
+        assert list(store.iter_weighted()) == before
+        assert not [name for name in os.listdir(store.segment_dir) if name.startswith("segment-")]
+        assert store.add_new(SENTENCES + ["جملة بعد الدمج"]) == (1, 51)
+
+
+def test_write_sentences_keeps_original_on_error():
+    """فشل المولّد أثناء الكتابة: الخطأ الأصلي يُرفع والملف الأصلي لا يتغير"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.json")
+        write_corpus(path, SENTENCES[:5])
+
+        def failing():
+            yield SENTENCES[5]
+            raise KeyError("مولّد معطوب")
+
+        try:
+            write_sentences(path, failing())
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("الخطأ الأصلي لم يُرفع")
+        assert list(iter_sentences(path)) == SENTENCES[:5]
+        assert sorted(os.listdir(tmp)) == ["corpus.json"]
+
+
+def append_in_process(path, first, count):
+    """عملية منفصلة تضيف جملها على دفعات صغيرة (دالة على مستوى الملف لتعمل مع spawn)"""
+    store = CorpusStore(path)
+    for start in range(first, first + count, 10):
+        store.add_new(f"جملة {i} من عملية" for i in range(start, min(start + 10, first + count)))
+
+
+def test_processes_append_through_lock():
+    """عمليتان تضيفان جملاً متداخلة في نفس الوقت: كل جملة مرة واحدة وبدون ضياع"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.json")
+        write_corpus(path, SENTENCES[:5])
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=append_in_process, args=(path, first, 150))
+                     for first in (0, 100)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            assert process.exitcode == 0
+
+        sentences = list(CorpusStore(path))
+        assert len(sentences) == len(set(sentences)) == 5 + 250
+        assert set(sentences) == set(SENTENCES[:5]) | {f"جملة {i} من عملية" for i in range(250)}
+
+
+class FlakyStore:
+    """قاعدة جمل في الذاكرة تفشل أول failures محاولات حفظ"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+        self.sentences = []
+
+    def add_new(self, batch):
+        self.batches.append(list(batch))
+        if self.failures:
+            self.failures -= 1
+            raise OSError("القرص ممتلئ")
+        new = [sentence for sentence in batch if sentence not in self.sentences]
+        self.sentences.extend(new)
+        return len(new), len(self.sentences)
+
+
+def test_writer_batches_submissions():
+    """عدة submit خلال max_delay تُحفظ في التزام واحد، وmax_batch يحفظ بدون انتظار"""
+    store = FlakyStore()
+    writer = CorpusWriter(store, max_delay=1.0)
+    for start in range(0, 30, 10):
+        writer.submit(SENTENCES[start:start + 10])
+    assert writer.flush(timeout=10)
+    assert store.batches == [SENTENCES[:30]]
+    assert writer.stats() == {"commits": 1, "added": 30, "errors": 0, "queued": 0}
+
+    writer = CorpusWriter(store, max_batch=10, max_delay=60)
+    writer.submit(SENTENCES[30:40])
+    assert writer.flush(timeout=10)
+    assert store.sentences == SENTENCES[:40]
+    assert writer.stop(timeout=10)
+
+
+def test_writer_flush_without_start():
+    """الخيط يبدأ مع أول submit، فـ flush() بدون مهلة لا تعلق"""
+    store = FlakyStore()
+    writer = CorpusWriter(store, max_delay=0.05)
+    assert writer.flush()
+    writer.submit(SENTENCES[:3])
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(writer.flush()))
+    waiter.start()
+    waiter.join(10)
+    assert not waiter.is_alive() and results == [True]
+    assert store.sentences == SENTENCES[:3]
+    assert writer.stop(timeout=10)
+
+
+def test_writer_retries_failed_commit():
+    """فشل الحفظ: flush ترجع False والدفعة تبقى، ثم تنجح إعادة المحاولة بنفس الجمل"""
+    store = FlakyStore(failures=1)
+    writer = CorpusWriter(store, max_delay=0.05, retry_delay=0.05)
+    writer.submit(SENTENCES[:5])
+    assert not writer.flush(timeout=10)
+    assert writer.errors == 1 and isinstance(writer.last_error, OSError)
+    assert writer.flush(timeout=10)
+    assert store.batches == [SENTENCES[:5], SENTENCES[:5]]
+    assert store.sentences == SENTENCES[:5]
+    assert writer.stop(timeout=10)
+
+    # فشل دائم: stop ترجع False والجمل تبقى في الطابور حتى start() لاحقاً
+    store = FlakyStore(failures=10 ** 6)
+    writer = CorpusWriter(store, max_delay=0.05, retry_delay=0.05)
+    writer.submit(SENTENCES[:3])
+    assert not writer.stop(timeout=10)
+    assert writer.stats()["queued"] == 3
+    store.failures = 0
+    assert writer.flush(timeout=10)
+    assert store.sentences == SENTENCES[:3]
+    assert writer.stop(timeout=10)
+
+
+def test_heldout_split_is_stable():
+    """القسم المحجوز يعتمد على بصمة الجملة فقط (بدون المسافات الطرفية)"""
+    sentences = [f"جملة {i}" for i in range(2000)]
+    heldout = [sentence for sentence in sentences if is_heldout(sentence, 10)]
+    assert 100 < len(heldout) < 300
+    assert all(is_heldout(f"  {sentence} ", 10) for sentence in heldout)
+    assert not any(is_heldout(sentence, 0) for sentence in sentences)
+    assert sentence_hash("صباح الخير") == sentence_hash("صباح الخير\n")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    rng = random.Random(1)
+    hashes = [rng.getrandbits(64) for _ in range(5000)]
+    bloom = BloomFilter(len(hashes))
+    for h in hashes:
+        bloom.add(h)
+    assert all(h in bloom for h in hashes)
+    others = [rng.getrandbits(64) for _ in range(5000)]
+    assert sum(h in bloom for h in others) < 250
+
+
+def test_hash_index_save_load():
+    """الفهرس المحفوظ يطابق البصمات، والمضاف بعد البناء (pending) لا يُحفظ"""
+    rng = random.Random(2)
+    hashes = [rng.getrandbits(64) for _ in range(3000)]
+    index = HashIndex.build(hashes + hashes[:100])
+    assert len(index) == 3000
+    extra = rng.getrandbits(64)
+    index.add(extra)
+    assert extra in index and len(index) == 3001
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bin")
+        index.save(path)
+        loaded = HashIndex.load(path)
+        assert all(h in loaded for h in hashes)
+        assert extra not in loaded
+        assert rng.getrandbits(64) not in loaded
+
+        write_hashes(os.path.join(tmp, "segment.hashes"), hashes)
+        assert list(read_hashes(os.path.join(tmp, "segment.hashes"))) == hashes
+
+
+def main():
+    tests = [
+        test_iter_weighted_formats,
+        test_add_new_skips_duplicates,
+        test_compaction_keeps_order_and_weights,
+        test_write_sentences_keeps_original_on_error,
+        test_processes_append_through_lock,
+        test_writer_batches_submissions,
+        test_writer_flush_without_start,
+        test_writer_retries_failed_commit,
+        test_heldout_split_is_stable,
+        test_bloom_filter_has_no_false_negatives,
+        test_hash_index_save_load,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            print(traceback.format_exc())
+    print(f"\n🎯 النتيجة: {passed}/{len(tests)} اختبارات نجحت")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,128 @@
+# test_expansion_tools.py - اختبار أدوات التوسع: القوالب الفريدة، تصفية الجودة بالتوازي، وأوزان الفئات
+import random
+import traceback
+
+from massive_expansion import MAX_CATEGORY_WEIGHT, MassiveCorpusExpansion
+from quality_filter import MIN_PARALLEL, BatchValidator, filter_sentences, quality_mask
+from template_engine import Template, TemplateSet, permuted_indices, variation_templates
+
+FEELINGS = ["مبسوط", "زعلان", "تعبان", "مرتاح"]
+REASONS = ["الشغل", "الجو", "الأهل"]
+DAYS = ["اليوم", "أمس"]
+
+
+def template_set():
+    return TemplateSet([
+        Template("{feeling} {day} بسبب {reason}", {"feeling": FEELINGS, "reason": REASONS, "day": DAYS}),
+        Template("{feeling} مرة و{feeling} {day}", {"feeling": FEELINGS, "day": DAYS}),
+    ])
+
+
+def test_template_renders_every_combination_once():
+    """كل رقم من 0 إلى len-1 تركيبة مختلفة، والخانة المكررة تأخذ نفس القيمة"""
+    templates = template_set()
+    assert len(templates) == 4 * 3 * 2 + 4 * 2
+    rendered = [templates.render(i) for i in range(len(templates))]
+    assert len(set(rendered)) == len(rendered)
+    assert "مبسوط مرة ومبسوط اليوم" in rendered
+    assert "تعبان أمس بسبب الجو" in rendered
+
+
+def test_permuted_indices_is_a_permutation():
+    for size in (1, 2, 7, 64, 1000):
+        assert sorted(permuted_indices(size, random.Random(size))) == list(range(size))
+    assert list(permuted_indices(0, random.Random(0))) == []
+
+
+def test_sample_is_distinct_and_deterministic():
+    """sample بدون تكرار، ونفس البذرة = نفس الجمل بنفس الترتيب"""
+    templates = template_set()
+    first = list(templates.sample(20, seed=5))
+    assert len(first) == 20 and len(set(first)) == 20
+    assert list(templates.sample(20, seed=5)) == first
+    assert list(templates.sample(20, seed=6)) != first
+    assert sorted(templates.sample(seed=1)) == sorted(templates.render(i) for i in range(len(templates)))
+    assert len(list(templates.sample(10 ** 6, seed=1))) == len(templates)
+
+
+def test_variation_templates():
+    """كل كلمة من substitutions في الجملة تصبح خانة، والأقواس في الجملة تبقى نصاً"""
+    templates = variation_templates(
+        ["رحت السوق {أمس}", "ما عندي شي"],
+        [("السوق", ["السوق", "المول"])],
+        prefixes=("", "والله "))
+    assert len(templates) == 2 * 2 + 2
+    assert set(templates.sample(seed=0)) == {
+        "رحت السوق {أمس}", "رحت المول {أمس}", "والله رحت السوق {أمس}", "والله رحت المول {أمس}",
+        "ما عندي شي", "والله ما عندي شي",
+    }
+
+
+def sample_sentences(count):
+    base = ["صباح الخير كيف الحال", "hello there", "ok", "الجو حار مرة اليوم والله",
+            "وش", "hi صديقي", "الحمدلله بخير وعافية والله يسلمك"]
+    return [f"{base[i % len(base)]} {i % 13}".strip() if i % 3 else base[i % len(base)]
+            for i in range(count)]
+
+
+def test_batch_mask_matches_single_checks():
+    """قناع الدفعة = فحص كل جملة وحدها (الحدود، نسبة العربي، الكلمات المهمة)"""
+    validator = BatchValidator(min_length=3, max_length=40, min_words=2, max_words=8,
+                               min_arabic_ratio=0.6, keywords={"الحمدلله", "الجو", "صباح"})
+    sentences = sample_sentences(300)
+    mask = validator.mask(sentences)
+    assert mask == [validator(sentence) for sentence in sentences]
+    assert any(mask) and not all(mask)
+    assert not validator("hello there")
+    assert validator("صباح الخير كيف الحال")
+
+
+def test_parallel_mask_keeps_order():
+    """quality_mask على عدة عمليات يرجع نفس القناع بنفس الترتيب"""
+    validator = BatchValidator(min_words=2, min_arabic_ratio=0.5, phrases=["الخير", "الجو"])
+    sentences = sample_sentences(MIN_PARALLEL + 1500)
+    expected = validator.mask(sentences)
+    assert quality_mask(sentences, validator.mask, workers=2, chunk_size=1000, batch=True) == expected
+    kept, stats = filter_sentences(sentences, validator, workers=1)
+    assert kept == [s for s, ok in zip(sentences, expected) if ok]
+    assert stats["checked"] == len(sentences) and stats["kept"] == len(kept)
+
+
+def test_category_weights_are_modest():
+    """وزن جمل الفئات الإضافية بين 1 وMAX_CATEGORY_WEIGHT، بالتناسب مع هدف الفئة"""
+    expansion = MassiveCorpusExpansion(verbose=False)
+    weights = {name: expansion.category_weight(name) for name in expansion.expansion_categories}
+    assert set(weights.values()) <= set(range(1, MAX_CATEGORY_WEIGHT + 1))
+    largest = max(expansion.expansion_categories, key=expansion.expansion_categories.get)
+    assert weights[largest] == MAX_CATEGORY_WEIGHT
+    assert weights["family_relationships"] > weights["travel_places"]
+    assert expansion.category_weight("فئة غير معروفة") == 1
+    pairs = list(expansion.generate_additional_categories())
+    assert pairs and all(1 <= weight <= MAX_CATEGORY_WEIGHT for _, weight in pairs)
+
+
+def main():
+    tests = [
+        test_template_renders_every_combination_once,
+        test_permuted_indices_is_a_permutation,
+        test_sample_is_distinct_and_deterministic,
+        test_variation_templates,
+        test_batch_mask_matches_single_checks,
+        test_parallel_mask_keeps_order,
+        test_category_weights_are_modest,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            print(traceback.format_exc())
+    print(f"\n🎯 النتيجة: {passed}/{len(tests)} اختبارات نجحت")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
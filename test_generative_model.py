@@ -0,0 +1,320 @@
+# test_generative_model.py - اختبار نموذج اللهجة: الحفظ الثنائي، التدريب التراكمي والمتوازي، الدمج، المرساة، الطرح، العدّ التقريبي
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import traceback
+
+from corpus_store import CorpusStore, is_heldout, iter_weighted
+from count_sketch import ApproximateCounts, CountMinSketch
+from model_evaluation import evaluate, log_likelihood
+from riyadh_dialect_generative_module import ID_BITS, ID_MASK, RiyadhDialectGenerative
+
+SUBJECTS = ["انا", "احنا", "اخوي", "الوالد", "صاحبي", "الجماعة"]
+VERBS = ["رايح", "جاي", "قاعد", "طالع", "نازل"]
+PLACES = ["البيت", "الدوام", "السوق", "الاستراحة", "المطعم", "البر", "الرياض"]
+TIMES = ["الحين", "بكرة", "العصر", "الليلة", "بعدين"]
+
+
+def make_sentences(count, seed):
+    rng = random.Random(seed)
+    return [" ".join((rng.choice(SUBJECTS), rng.choice(VERBS), rng.choice(PLACES), rng.choice(TIMES)))
+            for _ in range(count)]
+
+
+def write_corpus(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"sentences": entries}, f, ensure_ascii=False)
+
+
+def transition_counts(model):
+    """{(السياق بالكلمات، الكلمة التالية): العدد} لكل جداول النموذج (مستقل عن أرقام الكلمات)"""
+    counts = {}
+    for n, table in enumerate(model._tables):
+        for row in range(len(table.offsets) - 1):
+            key = row if table.keys is None else table.keys[row]
+            context = tuple(model.vocab[(key >> (ID_BITS * j)) & ID_MASK] for j in range(n + 1))
+            for edge in range(table.offsets[row], table.offsets[row + 1]):
+                counts[context, model.vocab[table.successors[edge]]] = table.counts[edge]
+    return counts
+
+
+def trained(tmp, name, corpus_path, **kwargs):
+    model = RiyadhDialectGenerative(os.path.join(tmp, name), **kwargs)
+    model.train(corpus_path, force_retrain=True)
+    return model
+
+
+def loaded(path):
+    model = RiyadhDialectGenerative(path)
+    model.load_model()
+    return model
+
+
+def test_binary_round_trip():
+    """الحفظ ثم التحميل عبر mmap يعيد نفس المفردات والانتقالات ونسبة الجمل المحجوزة"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        write_corpus(corpus, make_sentences(300, 1) + [{"text": "انا رايح البر بكرة", "weight": 4}])
+        model = trained(tmp, "model.json", corpus, order=4, heldout_percent=10)
+
+        copy = loaded(model.model_path)
+        assert copy.order == 4 and copy.heldout_percent == 10 and copy.count_bits == 32
+        assert copy.vocab == model.vocab
+        assert transition_counts(copy) == transition_counts(model)
+        assert all(sentence.split()[0] == "انا" for sentence in copy.generate_batch(20, ["انا"] * 20))
+
+
+def test_quantized_round_trip():
+    """النموذج المكمم (8 بت + Alias بـ 16 بت) يُحفظ ويُحمّل بنفس أعداده ويولّد جملاً صحيحة"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        write_corpus(corpus, make_sentences(500, 2))
+        model = trained(tmp, "model.json", corpus)
+        model.prune(count_bits=8)
+        assert {table.alias_bits() for table in model._tables} == {16}
+        model.save_model()
+
+        copy = loaded(model.model_path)
+        assert copy.count_bits == 8
+        assert {table.alias_bits() for table in copy._tables} == {16}
+        assert transition_counts(copy) == transition_counts(model)
+        words = set(SUBJECTS + VERBS + PLACES + TIMES)
+        for sentence in copy.generate_batch(50, seed=3):
+            assert set(sentence.split()) <= words
+
+
+def test_incremental_matches_full_training():
+    """التدريب التراكمي على الإضافات = تدريب كامل على الملف بعد الإضافة (مع الأوزان)"""
+    for order in (2, 3, 4):
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = os.path.join(tmp, "corpus.json")
+            write_corpus(corpus, make_sentences(400, order))
+            model = trained(tmp, "model.json", corpus, order=order)
+            CorpusStore(corpus).add_new(
+                [(sentence, 3) for sentence in make_sentences(100, 10 + order)] + ["كلمة جديدة تماما"])
+
+            model = RiyadhDialectGenerative(model.model_path, order=order)
+            model.train(corpus, incremental=True)
+            full = trained(tmp, "full.json", corpus, order=order)
+            assert transition_counts(loaded(model.model_path)) == transition_counts(full)
+
+            # بدون جمل جديدة: الملف لا يُعاد حفظه
+            stamp = model.file_stamp()
+            model.train(corpus, incremental=True)
+            assert model.file_stamp() == stamp
+
+
+def test_heldout_sentences_are_not_trained():
+    """الجمل المحجوزة لا تدخل التدريب الكامل ولا التراكمي"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        sentences = make_sentences(600, 4)
+        write_corpus(corpus, sentences[:400])
+        model = trained(tmp, "model.json", corpus, heldout_percent=20)
+        CorpusStore(corpus).add_new(sentences[400:])
+        model = RiyadhDialectGenerative(model.model_path)
+        model.train(corpus, incremental=True)
+
+        expected = RiyadhDialectGenerative(order=3)
+        expected.fit([entry for entry in iter_weighted(corpus) if not is_heldout(entry[0], 20)])
+        assert model.heldout_percent == 20
+        assert transition_counts(loaded(model.model_path)) == transition_counts(expected)
+
+
+def test_evaluate_scores_candidate_on_heldout():
+    """تقييم النموذج المرشح على الجمل المحجوزة = تقييم نموذج يُدرَّب على بقية الجمل، مع الأوزان"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        sentences = make_sentences(800, 11)
+        write_corpus(corpus, [{"text": s, "weight": 3} if i % 4 == 0 else s for i, s in enumerate(sentences)])
+        candidate = trained(tmp, "model.json", corpus, heldout_percent=10)
+
+        result = evaluate(corpus, model=candidate)
+        assert result == dict(evaluate(corpus, heldout_percent=10), timestamp=result["timestamp"],
+                              sentences_per_sec=result["sentences_per_sec"])
+        heldout = [s for s in sentences if is_heldout(s, 10)]
+        assert result["heldout_sentences"] == len(heldout)
+        assert result["train_sentences"] == len(sentences) - len(heldout)
+
+        # الجملة بوزن 3 تُحتسب كثلاث جمل
+        pair = ["انا رايح البيت الحين", "الجماعة قاعد البر بكرة"]
+        weighted, tokens = log_likelihood(candidate, pair, [3, 1])
+        repeated, repeated_tokens = log_likelihood(candidate, [pair[0]] * 3 + [pair[1]])
+        assert tokens == repeated_tokens and math.isclose(weighted, repeated)
+
+
+def test_forget_sentences():
+    """طرح جمل (بأوزانها) = تدريب كامل على الملف بدونها"""
+    with tempfile.TemporaryDirectory() as tmp:
+        kept = make_sentences(300, 5)
+        removed = [(sentence, 2) for sentence in dict.fromkeys(make_sentences(50, 6))
+                   if sentence not in kept]
+        corpus = os.path.join(tmp, "corpus.json")
+        write_corpus(corpus, kept + [{"text": text, "weight": weight} for text, weight in removed])
+        model = trained(tmp, "model.json", corpus)
+
+        assert model.forget_sentences(removed + [("جملة لم يتدرب عليها", 1)]) == len(removed)
+        write_corpus(corpus, kept)
+        full = trained(tmp, "full.json", corpus)
+        assert transition_counts(loaded(model.model_path)) == transition_counts(full)
+        # الجمل المطروحة خرجت من سجل البصمات: طرحها مرة ثانية لا يغير شيئاً
+        assert model.forget_sentences(removed) == 0
+
+
+def test_parallel_training_matches_serial():
+    """التدريب على عدة عمليات (workers) = التدريب التسلسلي، كاملاً وتراكمياً"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        sentences = make_sentences(25000, 13)
+        write_corpus(corpus, sentences[:22000])
+        serial = trained(tmp, "serial.json", corpus)
+        parallel = RiyadhDialectGenerative(os.path.join(tmp, "parallel.json"))
+        parallel.train(corpus, force_retrain=True, workers=2)
+        assert transition_counts(loaded(parallel.model_path)) == transition_counts(serial)
+
+        CorpusStore(corpus).add_new(sentences[22000:] + [f"جملة جديدة {i}" for i in range(12000)])
+        parallel = RiyadhDialectGenerative(parallel.model_path)
+        parallel.train(corpus, incremental=True, workers=2)
+        full = trained(tmp, "full.json", corpus)
+        assert transition_counts(loaded(parallel.model_path)) == transition_counts(full)
+
+
+def test_merge_models_equals_whole_corpus():
+    """دمج نموذجين دُرّب كل منهما على نصف الجمل = نموذج دُرّب على كل الجمل (والدمج من سطر الأوامر)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sentences = make_sentences(600, 14) + ["كلمة في النصف الثاني فقط"]
+        paths = []
+        for name, half in (("first", sentences[:300]), ("second", sentences[300:])):
+            write_corpus(os.path.join(tmp, f"{name}.json"), half)
+            paths.append(trained(tmp, f"{name}_model.json", os.path.join(tmp, f"{name}.json")).model_path)
+        corpus = os.path.join(tmp, "corpus.json")
+        write_corpus(corpus, sentences)
+        full = trained(tmp, "full.json", corpus)
+
+        merged = RiyadhDialectGenerative.merge_models(paths, os.path.join(tmp, "merged.json"))
+        assert transition_counts(loaded(merged.model_path)) == transition_counts(full)
+        # سجلات البصمات دُمجت: التدريب التراكمي على كل الجمل لا يجد جديداً
+        stamp = merged.file_stamp()
+        merged.train(corpus, incremental=True)
+        assert merged.file_stamp() == stamp
+
+        module = os.path.join(os.path.dirname(os.path.abspath(__file__)), "riyadh_dialect_generative_module.py")
+        output = os.path.join(tmp, "cli.json")
+        subprocess.run([sys.executable, module, "merge", output] + paths, check=True,
+                       cwd=tmp, capture_output=True)
+        assert transition_counts(loaded(output)) == transition_counts(full)
+
+
+def test_find_anchor_prefers_rare_known_word():
+    """المرساة أندر كلمة معروفة (أو كلمة موضوع مفضلة)، مع مطابقة الأشكال الموحّدة"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        write_corpus(corpus, make_sentences(300, 12) + ["انا رايح المقهى الحين"])
+        model = trained(tmp, "model.json", corpus)
+
+        assert model.find_anchor("ابي اروح المقهى او البيت") == "المقهى"
+        assert model.find_anchor("ابي اروح المقهى او البيت", preferred={"البيت"}) == "البيت"
+        assert model.find_anchor("رحت الإستراحة") == "الاستراحة"
+        assert model.find_anchor("كلام ما يعرفه النموذج") is None
+
+
+def test_generate_around_places_anchor_mid_sentence():
+    """generate_around يمشي للخلف عبر الجدول العكسي حتى بداية جملة، فالمرساة في وسط الرد"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        write_corpus(corpus, make_sentences(300, 15))
+        model = trained(tmp, "model.json", corpus)
+        seen = set()
+        for sentence in make_sentences(300, 15):
+            words = sentence.split()
+            seen.update(zip(words, words[1:]))
+
+        rand = random.Random(3).random
+        for _ in range(30):
+            words = model.generate_around("السوق", rand=rand).split()
+            # الجمل كلها: فاعل فعل مكان زمن، فالسياق الأيسر فاعل وفعل
+            assert len(words) == 4 and words[2] == "السوق"
+            assert words[0] in SUBJECTS and words[1] in VERBS and words[3] in TIMES
+            assert set(zip(words, words[1:])) <= seen
+
+
+def test_count_min_sketch_never_underestimates():
+    rng = random.Random(7)
+    true_counts = {}
+    sketch = CountMinSketch(width=256)
+    for _ in range(20000):
+        key = rng.getrandbits(84) if rng.random() < 0.5 else rng.randrange(50)
+        true_counts[key] = true_counts.get(key, 0) + 1
+        sketch.add(key)
+    assert all(sketch.estimate(key) >= count for key, count in true_counts.items())
+
+
+def test_approximate_counts_stay_in_budget():
+    """الأكثر تكراراً تبقى، والحجز للمفردات (reserve) يصغّر القائمة داخل الميزانية"""
+    counts = ApproximateCounts(64 * 1024)
+    rng = random.Random(8)
+    for _ in range(50000):
+        counts.add(rng.randrange(20) if rng.random() < 0.5 else rng.getrandbits(60))
+    top = {key for key, _ in counts.items()}
+    assert set(range(20)) <= top
+    assert counts.nbytes() <= counts.memory_bytes
+
+    counts.reserve(24 * 1024)
+    assert counts.nbytes() + 24 * 1024 <= counts.memory_bytes
+    assert set(range(20)) <= {key for key, _ in counts.items()}
+
+
+def test_memory_budget_training():
+    """العدّ التقريبي يدرّب نموذجاً قريباً من الدقيق، بدون سجل .seen، ويرفض الميزانية الصغيرة"""
+    try:
+        RiyadhDialectGenerative(memory_budget_mb=2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ميزانية أقل من الحد الأدنى قُبلت")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        write_corpus(corpus, make_sentences(1000, 9))
+        exact = trained(tmp, "exact.json", corpus)
+        approx = trained(tmp, "approx.json", corpus, memory_budget_mb=8)
+        assert not os.path.exists(approx.seen_path)
+        # الجمل قليلة: كل الانتقالات تتسع في الميزانية وتقديراتها دقيقة
+        assert transition_counts(approx) == transition_counts(exact)
+
+
+def main():
+    tests = [
+        test_binary_round_trip,
+        test_quantized_round_trip,
+        test_incremental_matches_full_training,
+        test_heldout_sentences_are_not_trained,
+        test_evaluate_scores_candidate_on_heldout,
+        test_forget_sentences,
+        test_parallel_training_matches_serial,
+        test_merge_models_equals_whole_corpus,
+        test_find_anchor_prefers_rare_known_word,
+        test_generate_around_places_anchor_mid_sentence,
+        test_count_min_sketch_never_underestimates,
+        test_approximate_counts_stay_in_budget,
+        test_memory_budget_training,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            print(traceback.format_exc())
+    print(f"\n🎯 النتيجة: {passed}/{len(tests)} اختبارات نجحت")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,85 @@
+# test_model_reload.py - اختبار إعادة تحميل النموذج في الخادم: كشف الملف الجديد، النموذج المشترك، ومخزون الردود
+import json
+import os
+import tempfile
+import traceback
+
+from enhanced_nano_module import EnhancedNano
+from model_watcher import ModelWatcher
+from reply_pool import ReplyPool
+from riyadh_dialect_generative_module import RiyadhDialectGenerative
+
+OLD_SENTENCES = ["هلا والله كيفك", "هلا وغلا بالغالي", "كيفك اليوم يا الغالي", "الحمدلله بخير وانت"]
+NEW_SENTENCES = OLD_SENTENCES + ["هلا بالضيف الجديد", "الضيف الجديد وصل اليوم"]
+
+
+def write_corpus(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"sentences": entries}, f, ensure_ascii=False)
+
+
+def test_watcher_reloads_shared_model_and_reply_pool():
+    """
+    ملف نموذج جديد على القرص: check() تحمّله، والنموذج المشترك (shared) يُستبدل،
+    ومخزون الردود ينتقل للنسخة الجديدة ويُفرَّغ ليُعبأ منها.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.json")
+        model_path = os.path.join(tmp, "model.json")
+        write_corpus(corpus, OLD_SENTENCES)
+        RiyadhDialectGenerative(model_path).train(corpus, force_retrain=True)
+
+        nano = EnhancedNano.shared(model_path, corpus)
+        old_shared = RiyadhDialectGenerative.shared(model_path, corpus)
+        assert isinstance(nano, EnhancedNano) and nano.vocab == old_shared.vocab
+        pool = nano.reply_pool = ReplyPool(nano, validate=nano.is_response_logical,
+                                           pool_size=4, anchored=True, start_words=["هلا"])
+        pool.refill()
+        assert pool.stats()["ready"] > 0
+        generation = pool._generation
+
+        watcher = ModelWatcher(nano)
+        assert not nano.is_stale() and not watcher.check()
+
+        # التدريب اليومي يكتب نسخة جديدة من الملف
+        write_corpus(corpus, NEW_SENTENCES)
+        RiyadhDialectGenerative(model_path).train(corpus, force_retrain=True)
+        assert nano.is_stale()
+        assert watcher.check() and watcher.reloads == 1
+
+        fresh = watcher.model
+        assert isinstance(fresh, EnhancedNano) and fresh is not nano
+        assert "الضيف" in fresh.vocab and "الضيف" not in nano.vocab
+        shared = RiyadhDialectGenerative.shared(model_path, corpus)
+        assert shared is not old_shared and shared.vocab == fresh.vocab
+        assert "الضيف" in EnhancedNano.shared(model_path, corpus).vocab
+
+        assert fresh.reply_pool is pool and pool.model is fresh
+        assert pool._generation == generation + 1 and pool.stats()["ready"] == 0
+        pool.refill()
+        words = {word for reply in pool._pools["هلا"] for word in reply.split()}
+        assert words and words <= set(fresh.vocab)
+
+        # الملف لم يتغير بعد التحميل
+        assert not watcher.check() and watcher.reloads == 1
+
+
+def main():
+    tests = [
+        test_watcher_reloads_shared_model_and_reply_pool,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            print(traceback.format_exc())
+    print(f"\n🎯 النتيجة: {passed}/{len(tests)} اختبارات نجحت")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
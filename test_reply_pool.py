@@ -0,0 +1,116 @@
+# test_reply_pool.py - اختبار مخزون الردود الجاهزة: الإصابة والإخفاق، حذف الأقدم، التعبئة بعد إعادة التحميل، والفحص
+import itertools
+import traceback
+
+from reply_pool import ReplyPool
+
+REPLIES = ["هلا والله", "ياهلا فيك", "مرحبا بك", "حياك الله", "اهلين والله", "هلا بالغالي"]
+
+
+class FakeModel:
+    """نموذج يولّد الردود بالترتيب (ويمكن أن يُعاد تحميله أثناء التوليد عبر on_generate)"""
+
+    def __init__(self, replies=REPLIES):
+        self.replies = itertools.cycle(replies)
+        self.requests = []
+        self.on_generate = None
+
+    def generate_batch(self, n, start_words=None, max_length=15):
+        self.requests.append((n, start_words[0] if start_words else None))
+        if self.on_generate is not None:
+            self.on_generate()
+        return [next(self.replies) for _ in range(n)]
+
+
+def test_hits_and_misses():
+    """المخزن الفارغ: إخفاق ويُطلب تعبئته، وبعد التعبئة: إصابة بأقدم رد"""
+    model = FakeModel()
+    pool = ReplyPool(model, pool_size=4, batch_size=4)
+    assert pool.get() is None
+    assert pool._wakeup.is_set()
+    pool.refill()
+    assert pool.stats()["ready"] == 4
+    assert [pool.get() for _ in range(4)] == REPLIES[:4]
+    assert pool.get() is None
+
+    stats = pool.stats()
+    assert (stats["hits"], stats["misses"], stats["generated"]) == (4, 2, 4)
+    assert stats["hit_rate"] == 4 / 6
+
+
+def test_least_recently_used_key_is_evicted():
+    """max_keys: كلمة بداية جديدة تحذف أقدم الكلمات استخداماً"""
+    pool = ReplyPool(FakeModel(), max_keys=3, start_words=["هلا"])
+    pool.get("مرحبا")
+    pool.get("هلا")
+    pool.get("صباح")
+    assert list(pool._pools) == ["مرحبا", "هلا", "صباح"]
+    pool.get("مساء")
+    assert list(pool._pools) == ["هلا", "صباح", "مساء"]
+    assert pool.stats()["keys"] == 3
+
+
+def test_refresh_during_refill_drops_stale_replies():
+    """إعادة تحميل النموذج أثناء التوليد: ردود النموذج القديم لا تدخل المخزن"""
+    model = FakeModel()
+    pool = ReplyPool(model, pool_size=4, batch_size=4)
+    model.on_generate = pool.refresh
+    pool.refill()
+    assert pool.stats()["ready"] == 0 and pool.stats()["generated"] == 4
+
+    model.on_generate = None
+    pool.refill()
+    assert pool.stats()["ready"] == 4
+    pool.refresh()
+    assert pool.stats()["ready"] == 0 and pool.get() is None
+
+
+def test_validation_against_user_input():
+    """
+    الرد الذي يرفضه validate لرسالة المستخدم لا يُسحب ويبقى لطلبات أخرى،
+    والفحص يتم بعد تحرير القفل.
+    """
+    calls = []
+
+    def validate(reply, user_input):
+        # القفل محرر أثناء الفحص: طلبات أخرى لا تنتظره
+        assert pool._lock.acquire(blocking=False)
+        pool._lock.release()
+        calls.append((reply, user_input))
+        # رفض الرد الذي يكرر كلمة من رسالة المستخدم
+        return not set(reply.split()) & set(user_input.split())
+
+    pool = ReplyPool(FakeModel(), validate=validate, pool_size=4, batch_size=4)
+    pool.refill()
+    assert calls == [(reply, "") for reply in REPLIES[:4]]
+
+    assert pool.get(user_input="والله مشتاق") == REPLIES[1]
+    assert pool.get() == REPLIES[0]
+    assert pool.get(user_input="الله يحييك") == REPLIES[2]
+    assert pool.get(user_input="حياك الله") is None
+    assert pool.get() == REPLIES[3]
+    assert pool.stats()["hits"] == 4 and pool.stats()["misses"] == 1
+
+
+def main():
+    tests = [
+        test_hits_and_misses,
+        test_least_recently_used_key_is_evicted,
+        test_refresh_during_refill_drops_stale_replies,
+        test_validation_against_user_input,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            print(traceback.format_exc())
+    print(f"\n🎯 النتيجة: {passed}/{len(tests)} اختبارات نجحت")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -5,12 +5,41 @@ import time
 from datetime import datetime
 from typing import List, Dict, Set
 import itertools
+from corpus_store import open_corpus
+from quality_filter import BatchValidator, filter_sentences
+from template_engine import Template, TemplateSet
+
+# الكلمات المهمة لفحص الجودة (مطابقة جزئية داخل الجملة)
+IMPORTANT_WORDS = (
+    "الحمدلله", "ان شاء الله", "ما شاء الله", "بإذن الله",
+    "اليوم", "امس", "بكرة", "الصبح", "المساء", "الليل",
+    "اكل", "شرب", "نوم", "شغل", "بيت", "اهل", "اصدقاء",
+    "سعيد", "مبسوط", "متعب", "مرتاح", "زين", "حلو"
+)
+
+
+# معايير الجودة (بعد حذف المسافات من الطرفين): 5-200 حرف، 2-20 كلمة،
+# 50% حروف عربية، وكلمة مهمة واحدة على الأقل
+QUALITY_VALIDATOR = BatchValidator(min_length=5, max_length=200, min_words=2, max_words=20,
+                                   min_arabic_ratio=0.5, phrases=IMPORTANT_WORDS, strip=True)
+
+
+def high_quality_mask(sentences: List[str]) -> List[bool]:
+    """قناع الجودة لدفعة جمل كاملة (دالة على مستوى الملف لتعمل داخل عمليات quality_filter)"""
+    return QUALITY_VALIDATOR.mask(sentences)
+
+
+def is_high_quality_sentence(sentence: str) -> bool:
+    """فحص جودة جملة واحدة"""
+    return QUALITY_VALIDATOR(sentence)
+
 
 class UltraAdvancedTrainer:
     """نظام التدريب الفائق لتطوير ذكاء نانو إلى أقصى درجة"""
     
     def __init__(self, corpus_path="corpus.json"):
         self.corpus_path = corpus_path
+        self.corpus = open_corpus(corpus_path)
         self.mega_conversations = self.build_mega_conversation_database()
         
     def build_mega_conversation_database(self) -> Dict:
@@ -674,10 +703,8 @@ class UltraAdvancedTrainer:
         
         return unique_conversations[:target_size]
     
-    def create_dynamic_combinations(self) -> List[str]:
-        """إنشاء تراكيب ديناميكية جديدة"""
-        combinations = []
-        
+    def create_dynamic_combinations(self, seed=None) -> List[str]:
+        """إنشاء تراكيب ديناميكية جديدة مختلفة (نفس seed = نفس التراكيب)"""
         # قوالب متقدمة
         templates = [
             "{feeling} اليوم لأن {reason}",
@@ -692,43 +719,32 @@ class UltraAdvancedTrainer:
             "الحمدلله على {blessing} وأتمنى {more}"
         ]
         
-        # كلمات للتنويع
-        feelings = ["مبسوط", "مرتاح", "متحمس", "هادي", "متفائل", "راضي", "مطمئن"]
-        reasons = ["الجو حلو", "خلصت شغلي", "اكلت زين", "نمت كفاية", "شفت اهلي", "ساعدت حد"]
-        actions = ["صليت", "قريت", "تمشيت", "طبخت", "رتبت", "درست", "شغلت"]
-        times = ["الصباح", "المساء", "الليل", "العصر", "الفجر"]
-        activities = ["أقرا", "أتأمل", "أستريح", "أخطط", "أفكر", "أدعي"]
-        
-        # إنتاج تراكيب
-        for template in templates:
-            for _ in range(20):  # 20 تركيبة لكل قالب
-                try:
-                    filled = template.format(
-                        feeling=random.choice(feelings),
-                        reason=random.choice(reasons),
-                        action=random.choice(actions),
-                        time=random.choice(times),
-                        activity=random.choice(activities),
-                        experience=random.choice(["شغلي", "دراستي", "سفري", "حياتي"]),
-                        wisdom=random.choice(["الصبر مفيد", "التعلم مستمر", "الصحة أهم", "العائلة أولوية"]),
-                        opinion=random.choice(["التكنولوجيا مفيدة", "الرياضة ضرورية", "القراءة مهمة"]),
-                        justification=random.choice(["تساعد في التطور", "تحسن الصحة", "توسع المدارك"]),
-                        condition=random.choice(["أشوف المطر", "أشم القهوة", "أسمع الأذان"]),
-                        memory=random.choice(["الطفولة", "الأصدقاء", "البيت", "المدرسة"]),
-                        wish=random.choice(["أتطور", "أساعد", "أتعلم", "أنجح"]),
-                        goal=random.choice(["أفيد المجتمع", "أحقق أحلامي", "أرضي ربي"]),
-                        topic=random.choice(["الصداقة", "العمل", "العائلة", "الحياة"]),
-                        key_point=random.choice(["الصدق", "الاحترام", "التفاهم", "المحبة"]),
-                        advice=random.choice(["اصبر", "اجتهد", "اتوكل", "ادعي"]),
-                        benefit=random.choice(["تنجح", "تتطور", "تفرح", "ترتاح"]),
-                        blessing=random.choice(["الصحة", "العافية", "الرزق", "العائلة"]),
-                        more=random.choice(["يديمها", "يزيدها", "يبارك فيها"])
-                    )
-                    combinations.append(filled)
-                except KeyError:
-                    continue
+        # مفردات كل خانة
+        slots = {
+            "feeling": ["مبسوط", "مرتاح", "متحمس", "هادي", "متفائل", "راضي", "مطمئن"],
+            "reason": ["الجو حلو", "خلصت شغلي", "اكلت زين", "نمت كفاية", "شفت اهلي", "ساعدت حد"],
+            "action": ["صليت", "قريت", "تمشيت", "طبخت", "رتبت", "درست", "شغلت"],
+            "time": ["الصباح", "المساء", "الليل", "العصر", "الفجر"],
+            "activity": ["أقرا", "أتأمل", "أستريح", "أخطط", "أفكر", "أدعي"],
+            "experience": ["شغلي", "دراستي", "سفري", "حياتي"],
+            "wisdom": ["الصبر مفيد", "التعلم مستمر", "الصحة أهم", "العائلة أولوية"],
+            "opinion": ["التكنولوجيا مفيدة", "الرياضة ضرورية", "القراءة مهمة"],
+            "justification": ["تساعد في التطور", "تحسن الصحة", "توسع المدارك"],
+            "condition": ["أشوف المطر", "أشم القهوة", "أسمع الأذان"],
+            "memory": ["الطفولة", "الأصدقاء", "البيت", "المدرسة"],
+            "wish": ["أتطور", "أساعد", "أتعلم", "أنجح"],
+            "goal": ["أفيد المجتمع", "أحقق أحلامي", "أرضي ربي"],
+            "topic": ["الصداقة", "العمل", "العائلة", "الحياة"],
+            "key_point": ["الصدق", "الاحترام", "التفاهم", "المحبة"],
+            "advice": ["اصبر", "اجتهد", "اتوكل", "ادعي"],
+            "benefit": ["تنجح", "تتطور", "تفرح", "ترتاح"],
+            "blessing": ["الصحة", "العافية", "الرزق", "العائلة"],
+            "more": ["يديمها", "يزيدها", "يبارك فيها"],
+        }
         
-        return combinations
+        # إنتاج تراكيب مختلفة (20 تركيبة لكل قالب في المتوسط) بدون سحب مكرر
+        combinations = TemplateSet(Template(template, slots) for template in templates)
+        return list(combinations.sample(20 * len(templates), seed))
     
     def apply_ultra_training(self, mega_dataset: List[str]):
         """تطبيق التدريب الفائق"""
@@ -737,71 +753,28 @@ class UltraAdvancedTrainer:
         print("🎯 الهدف: الوصول لأعلى مستويات الذكاء الاصطناعي")
         print("="*70)
         
-        # تحميل الcorpus الحالي
+        # تصفية الجمل الجديدة وإلحاق غير الموجود منها بقاعدة الجمل
+        high_quality_sentences, stats = filter_sentences(mega_dataset, high_quality_mask, batch=True)
+        print(f"🔎 فحص {stats['checked']} جملة في {stats['seconds']:.2f} ثانية "
+              f"({stats['sentences_per_sec']:,.0f} جملة/ثانية)")
         try:
-            with open(self.corpus_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                current_sentences = data.get("sentences", [])
-        except:
-            current_sentences = []
-        
-        initial_count = len(current_sentences)
-        print(f"📊 الجمل الحالية: {initial_count}")
-        
-        # تصفية وإضافة الجمل الجديدة
-        added_count = 0
-        high_quality_sentences = []
-        
-        for sentence in mega_dataset:
-            if self.is_high_quality_sentence(sentence) and sentence not in current_sentences:
-                high_quality_sentences.append(sentence)
-                current_sentences.append(sentence)
-                added_count += 1
-        
-        # حفظ البيانات المحدثة
-        updated_data = {"sentences": current_sentences}
-        with open(self.corpus_path, 'w', encoding='utf-8') as f:
-            json.dump(updated_data, f, ensure_ascii=False, indent=2)
-        
-        final_count = len(current_sentences)
+            added_count, final_count = self.corpus.add_new(high_quality_sentences, source="ultra_training")
+        except json.JSONDecodeError:
+            print(f"❌ خطأ في قراءة '{self.corpus_path}'. لم يتم تعديل الملف.")
+            return 0, 0
         
+        initial_count = final_count - added_count
+        print(f"📊 الجمل السابقة: {initial_count}")
         print(f"✅ تم إضافة: {added_count} جملة عالية الجودة")
         print(f"📈 إجمالي الجمل الآن: {final_count}")
-        print(f"📊 نسبة النمو: {((final_count - initial_count) / initial_count * 100):.1f}%")
-        print(f"⭐ معدل الجودة: {(added_count / len(mega_dataset) * 100):.1f}%")
+        print(f"📊 نسبة النمو: {((final_count - initial_count) / max(initial_count, 1) * 100):.1f}%")
+        print(f"⭐ معدل الجودة: {(added_count / max(len(mega_dataset), 1) * 100):.1f}%")
         
         return added_count, final_count
     
     def is_high_quality_sentence(self, sentence: str) -> bool:
         """فحص جودة الجملة"""
-        # تنظيف الجملة
-        sentence = sentence.strip()
-        
-        # فحوصات الجودة
-        if len(sentence) < 5 or len(sentence) > 200:
-            return False
-        
-        word_count = len(sentence.split())
-        if word_count < 2 or word_count > 20:
-            return False
-        
-        # فحص الأحرف العربية
-        arabic_chars = sum(1 for c in sentence if '\u0600' <= c <= '\u06FF')
-        if arabic_chars < len(sentence) * 0.5:
-            return False
-        
-        # فحص وجود كلمات مهمة
-        important_words = [
-            "الحمدلله", "ان شاء الله", "ما شاء الله", "بإذن الله",
-            "اليوم", "امس", "بكرة", "الصبح", "المساء", "الليل",
-            "اكل", "شرب", "نوم", "شغل", "بيت", "اهل", "اصدقاء",
-            "سعيد", "مبسوط", "متعب", "مرتاح", "زين", "حلو"
-        ]
-        
-        sentence_lower = sentence.lower()
-        has_important_word = any(word in sentence_lower for word in important_words)
-        
-        return has_important_word
+        return is_high_quality_sentence(sentence)
     
     def run_ultra_training_program(self):
         """برنامج التدريب الفائق الشامل"""